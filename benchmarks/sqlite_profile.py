@@ -0,0 +1,71 @@
+#! /usr/bin/env python3
+"""
+    This script measures the create and read throughput of a model stored in
+    a sqlite file with and without the tuned sqlite profile.
+
+    Usage: python benchmarks/sqlite_profile.py --records 2000
+"""
+# external imports
+import os
+import tempfile
+import time
+import click
+# local imports
+import nautilus
+from nautilus import models
+from nautilus.api.filter import filter_model
+
+
+def run_profile(path, records, **options):
+    # point the database to a fresh file
+    nautilus.database.init_db('sqlite:///%s' % path, **options)
+
+    # the model to benchmark
+    class Recipe(models.BaseModel):
+        name = models.fields.CharField()
+
+    # create the table
+    Recipe.create_table()
+
+    # time the creation of each record in its own transaction (like the create handler)
+    start = time.perf_counter()
+    for index in range(records):
+        with nautilus.database.db.atomic():
+            Recipe.create(name='recipe %s' % index)
+    create_time = time.perf_counter() - start
+
+    # time reading each record back by its primary key (like the read handler)
+    start = time.perf_counter()
+    for pk in range(1, records + 1):
+        list(filter_model(Recipe, {'pk': pk}, fields=['name']))
+    read_time = time.perf_counter() - start
+
+    # clean up
+    nautilus.database.db.close()
+    nautilus.database.router.close()
+
+    # return the throughput
+    return records / create_time, records / read_time
+
+
+@click.command()
+@click.option('--records', default=2000, help='The number of records to create and read.')
+def benchmark(records):
+    # the configurations to compare
+    profiles = [
+        ('default pragmas', {'tune_sqlite': False}),
+        ('tuned', {}),
+    ]
+
+    # for each configuration
+    for name, options in profiles:
+        # use a separate directory for the database files
+        with tempfile.TemporaryDirectory() as directory:
+            # measure the configuration
+            creates, reads = run_profile(os.path.join(directory, 'bench.db'), records, **options)
+        # print the result
+        print('%-30s creates/s: %8.0f   reads/s: %8.0f' % (name, creates, reads))
+
+
+if __name__ == '__main__':
+    benchmark()
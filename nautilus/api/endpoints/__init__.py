@@ -3,6 +3,7 @@ import os
 # local imports
 from .requestHandlers.graphiql import GraphiQLRequestHandler
 from .requestHandlers.graphql import GraphQLRequestHandler
+from .requestHandlers.subscriptions import SubscriptionRequestHandler
 
 root_dir = os.path.dirname(__file__)
 template_dir = os.path.join(root_dir, 'templates')
@@ -4,7 +4,6 @@ import graphql
 import functools
 # local imports
 import nautilus
-from nautilus.config import Config
 from nautilus.network.http import Response
 from nautilus.api.util import parse_string
 from .graphql import GraphQLRequestHandler
@@ -50,21 +49,8 @@ class APIQueryHandler(GraphQLRequestHandler):
             # send the result of the introspection to the user
             return Response(body=result.encode())
 
-        # by default there is no current user
-        current_user = None
-
-        # if there is an authorization header
-        if 'Authorization' in self.request.headers:
-            # the authorization header value
-            auth_header = self.request.headers['Authorization']
-            # the name of the token method
-            method = 'Bearer'
-            # only accept bearer tokens
-            if method in auth_header:
-                # pull the session token out from the header value
-                session_token = auth_header.replace(method, '').strip()
-                # create a config object from the current user session
-                current_user = Config(self.service._read_session_token(session_token))
+        # the user making the request (if there is one)
+        current_user = self.service.current_user(self.request.headers)
 
         # otherwise its a normal query/mutation so walk it like normal
         response = await parse_string(
@@ -76,7 +62,9 @@ class APIQueryHandler(GraphQLRequestHandler):
                 'loginUser': self.service.login_user,
                 'registerUser': self.service.register_user
             },
-            current_user=current_user
+            current_user=current_user,
+            traversal_resolver=self.service.traversal_resolver,
+            fused_resolver=self.service.fused_resolver
         )
 
         # pass the result to the request
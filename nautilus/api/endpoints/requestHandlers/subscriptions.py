@@ -0,0 +1,112 @@
+# external imports
+import json
+from aiohttp import web, WSMsgType
+# local imports
+from nautilus.network.http import RequestHandler
+
+
+class SubscriptionRequestHandler(RequestHandler):
+    """
+        This request handler upgrades the connection to a websocket and lets
+        the client manage its subscriptions over it. Clients send json messages
+        of the form:
+
+            {"type": "start", "id": "1", "query": "subscription { recipe { id } }"}
+            {"type": "stop", "id": "1"}
+
+        and receive the changes to matching records as they happen. Clients
+        authenticate with the same bearer token as queries and only receive
+        the records they are allowed to see.
+    """
+
+    async def get(self):
+        try:
+            # the user opening the connection (if there is one)
+            current_user = self.service.current_user(self.request.headers)
+        # if the session token is not valid
+        except Exception:
+            # refuse the connection
+            return web.Response(status=401, text="Invalid session token.")
+
+        # create the websocket for the client
+        socket = web.WebSocketResponse()
+        # perform the handshake
+        await socket.prepare(self.request)
+
+        # the registry of subscriptions
+        registry = self.service.subscriptions
+        # register the client
+        connection = registry.connect(socket, user=current_user)
+
+        try:
+            # for each message sent by the client
+            async for message in socket:
+                # if the message is text
+                if message.type == WSMsgType.TEXT:
+                    # handle the message (if the client can't be told about an error, let it go)
+                    if not self._handle_message(registry, connection, message.data):
+                        break
+                # otherwise if something went wrong
+                elif message.type == WSMsgType.ERROR:
+                    # stop listening
+                    break
+
+        # when the client is done (one way or another)
+        finally:
+            # clean up after the client
+            await registry.disconnect(connection)
+
+        # return the socket to aiohttp
+        return socket
+
+
+    @property
+    def service(self):
+        return self.__class__.service
+
+
+    def _handle_message(self, registry, connection, data):
+        """
+            This method applies a message sent by the client and replies with
+            an error if it couldn't be applied.
+
+            Returns:
+                (bool): False if the client needs to be disconnected.
+        """
+        # the id of the subscription the message refers to
+        subscription_id = None
+
+        try:
+            # the message is a json object
+            message = json.loads(data)
+            # if it isn't
+            if not isinstance(message, dict):
+                # yell loudly
+                raise ValueError("Subscription messages must be json objects.")
+            # grab the id of the subscription
+            subscription_id = message.get('id')
+
+            # if the client is starting a subscription
+            if message.get('type') == 'start':
+                # add the subscription to the registry
+                registry.subscribe(connection, subscription_id, message['query'])
+            # otherwise if the client is done with the subscription
+            elif message.get('type') == 'stop':
+                # remove the subscription
+                registry.unsubscribe(connection, subscription_id)
+            # otherwise we don't know what to do
+            else:
+                # yell loudly
+                raise ValueError("Unknown subscription message type: %s" % message.get('type'))
+
+        # if something goes wrong
+        except Exception as err:
+            # tell the client (unless it isn't keeping up)
+            return connection.push({
+                'type': 'error',
+                'id': subscription_id,
+                'payload': str(err),
+            })
+
+        # the message was applied
+        return True
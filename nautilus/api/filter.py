@@ -1,11 +1,57 @@
 # external imports
+import base64
+import json
+import operator
+from functools import reduce
+from types import SimpleNamespace
 from graphene import List
 from graphql.type.scalars import GraphQLString
-from graphene.core.types.scalars import Int
+from graphene.core.types.scalars import Boolean, Float, Int, String
+from peewee import fn, SQL
 # local imports
 from nautilus.contrib.graphene_peewee import convert_peewee_field
+from nautilus.database import read_query, model_shards, filter_usage
+from nautilus.models.validation import _to_bool
 
 def args_for_model(model):
+    # start with the filters for the fields of the model
+    full_args = _field_args_for_model(model)
+
+    # add integer valued model filters
+    for arg in ['first', 'last', 'offset']:
+        # add the arg to the dict
+        full_args[arg] = Int()
+
+    # add the list of string values model filters
+    for arg in ['order_by']:
+        # add the arg to the dict
+        full_args[arg] = List(GraphQLString)
+
+    # add the opaque cursor filters
+    for arg in ['after', 'before']:
+        # add the arg to the dict
+        full_args[arg] = String()
+
+    # return the complete dictionary of arguments
+    return full_args
+
+
+def aggregate_args_for_model(model):
+    """
+        This function returns the arguments accepted by the aggregate query of
+        a model: the same field filters as `args_for_model` along with the
+        list of fields to group the records by.
+    """
+    # start with the filters for the fields of the model
+    full_args = _field_args_for_model(model)
+    # add the grouping argument
+    full_args['group_by'] = List(GraphQLString)
+
+    # return the complete dictionary of arguments
+    return full_args
+
+
+def _field_args_for_model(model):
     # import the model field helper
     from .util import fields_for_model
 
@@ -16,84 +62,253 @@ def args_for_model(model):
     # create a copy of the argument dict we can mutate
     full_args = args.copy()
 
-    # todo: add type-specific filters
     # go over the arguments
     for arg, field_type in args.items():
         # add the list member filter
         full_args[arg + '_in'] = List(field_type)
+        # add the null check
+        full_args[arg + '_isnull'] = Boolean()
 
-    # add integer valued model filters
-    for arg in ['first', 'last', 'offset']:
-        # add the arg to the dict
-        full_args[arg] = Int()
+        # add the comparison filters
+        for operator_name in ['gt', 'gte', 'lt', 'lte', 'ne']:
+            # which take values of the same type as the field
+            full_args[arg + '_' + operator_name] = type(field_type)()
 
-    # add the list of string values model filters
-    for arg in ['order_by']:
-        # add the arg to the dict
-        full_args[arg] = List(GraphQLString)
+        # if the field holds text
+        if isinstance(field_type, String):
+            # add the text-specific filters
+            for operator_name in ['contains', 'startswith']:
+                # add the arg to the dict
+                full_args[arg + '_' + operator_name] = String()
 
-    # return the complete dictionary of arguments
+    # return the dictionary of field filters
     return full_args
 
 
-def filter_model(model, args):
+# the operators that can be added as a suffix to a field filter
+filter_operators = {
+    'in': lambda field, value: field.in_(value),
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'ne': operator.ne,
+    'contains': lambda field, value: field.contains(value),
+    'startswith': lambda field, value: field.startswith(value),
+    'isnull': lambda field, value: field.is_null(value),
+}
+
+
+def filter_model(model, args, fields=None):
+    """
+        This function returns the records of the model that satisfy the given
+        filters.
+
+        Args:
+            model (nautilus.BaseModel): The model to filter.
+            args (dict): The filters to apply, following the conventions of
+                `args_for_model`.
+            fields (list of str): If provided, only these fields (along with
+                the primary key) are loaded from the database. The rows are then
+                produced lazily as lightweight objects instead of model instances.
+
+        Returns:
+            (list of nautilus.BaseModel or iterator of objects): The matching records.
+    """
+    # if only some of the fields were requested
+    if fields is not None:
+        # load only the corresponding columns, one row at a time
+        return (SimpleNamespace(**row) for row in _load_rows(model, args, fields))
+
+    # if the records are spread over several databases
+    if model_shards(model):
+        # collect them from every shard
+        return _gather_shards(model, args, _load_records, getattr)
+
+    # load the matching records
+    records = _load_records(*_filter_query(model, args))
+    # return them in the right order
+    return records[::-1] if _reversed_page(args) else records
+
+
+def _load_records(query, ordering):
+    # the filtered list
+    records = list(query)
+    # for each record
+    for record in records:
+        # save the cursor pointing to the record
+        record._cursor = encode_cursor(record, ordering)
+
+    # return the filtered list
+    return records
+
+
+def project_model(model, args, fields):
+    """
+        This function lazily produces the requested fields of the records that
+        satisfy the given filters as plain dictionaries, ready to be serialized.
+        Only the requested columns are loaded and the rows are never held in
+        memory all at once.
+
+        Args:
+            model (nautilus.BaseModel): The model to filter.
+            args (dict): The filters to apply, following the conventions of
+                `args_for_model`.
+            fields (list of str): The fields to include in each row. `pk` and
+                `cursor` refer to the primary key and the pagination cursor.
+
+        Returns:
+            (iterator of dict): The requested values of each matching record.
+    """
+    # the key of each requested field in the loaded rows
+    sources = {'pk': model.primary_key().name, 'cursor': '_cursor'}
+    # for each requested field
+    for field in fields:
+        # if the field is one of the aliases
+        if field in sources:
+            # we already know where to find it
+            continue
+        # grab the field of the model
+        model_field = _model_field(model, field)
+        # if the field doesn't refer to anything we can load
+        if model_field is None:
+            # yell loudly
+            raise ValueError("Cannot query for field %s" % field)
+        # the value is stored under the name of the model field
+        sources[field] = model_field.name
+
+    # for each matching row
+    for row in _load_rows(model, args, fields):
+        # only keep the requested values
+        yield {field: row.get(sources[field]) for field in fields}
+
+
+def _load_rows(model, args, fields):
+    """
+        This function lazily loads the requested fields of the records that
+        satisfy the given filters (see `_iterate_rows`).
+    """
+    # if the records are spread over several databases
+    if model_shards(model):
+        # collect the rows from every shard (along with the values they are ordered by)
+        return iter(_gather_shards(
+            model,
+            args,
+            lambda query, ordering: _iterate_rows(model, query, ordering, fields, with_ordering=True),
+            lambda row, name: row[name]
+        ))
+
+    # build the query for the matching records
+    query, ordering = _filter_query(model, args)
+    # load the rows
+    rows = _iterate_rows(model, query, ordering, fields)
+    # if the page was read backwards, load it to put it back in order (the page is limited)
+    return iter(list(rows)[::-1]) if _reversed_page(args) else rows
+
+
+def _gather_shards(model, args, load, value):
+    """
+        This function runs the filter against every shard of the model and
+        merges the results, applying the ordering and segmentation to the
+        combined records.
+
+        Args:
+            load (callable): Loads the results of a query for a shard given
+                the query and its ordering.
+            value (callable): Returns the value of a result for the given
+                field name.
+
+        Returns:
+            (list): The merged results.
+    """
+    # the filters to apply to each shard
+    shard_args = dict(args)
+    # the offset has to be applied to the merged results
+    offset = int(shard_args.pop('offset', None) or 0)
+    # the maximum number of results
+    limit = shard_args.get('first') or shard_args.get('last')
+    # if there is one
+    if limit:
+        # each shard has to provide enough records to skip the offset
+        shard_args['first' if shard_args.get('first') else 'last'] = int(limit) + offset
+
+    # build the query for the shards
+    query, ordering = _filter_query(model, shard_args)
+
+    def load_shard(database):
+        # point a copy of the query to the shard
+        shard_query = query.clone()
+        shard_query.database = database
+        # load its results
+        return list(load(shard_query, ordering))
+
+    # the results of every shard (which are queried at the same time)
+    results = [result for shard in model_shards(model).map(load_shard) for result in shard]
+
+    # wether the records were read from the end of the ordering
+    backwards = bool(shard_args.get('last'))
+    # python sorts are stable so apply each ordering from the last to the first
+    for field, descending in reversed(ordering):
+        # apply the ordering (with empty values first like the database)
+        results.sort(
+            key=lambda result: (value(result, field.name) is not None, value(result, field.name)),
+            reverse=descending != backwards
+        )
+
+    # apply the segmentation to the merged results
+    results = results[offset:offset + int(limit)] if limit else results[offset:]
+    # return them in the right order
+    return results[::-1] if _reversed_page(args) else results
+
+
+def _filter_query(model, args):
+    """
+        This function builds the query for the records of the model that
+        satisfy the given filters.
+
+        The `last` records are read by walking the ordering backwards, so the
+        result comes out reversed (see `_reversed_page`). Cursors always refer
+        to the ordering itself: `after` selects the records past the cursor
+        and `before` the ones that precede it.
+
+        Returns:
+            (tuple): The query along with the keys that order the records
+                (see `_ordering_keys`).
+    """
+    # if the user specified both first and last filters
+    if args.get('first') and args.get('last'):
+        # the page would be ambiguous so yell loudly
+        raise ValueError("Please specify one of first and last filters")
 
     # convert any args referencing pk to the actual field
-    filter_args = {key.replace('pk', model.primary_key().name): value \
-                        for key, value in args.items()}
+    filter_args = _resolve_pk_args(model, args)
 
     # pull out the meta filters
     first = filter_args.pop('first', None)
     last = filter_args.pop('last', None)
     order_by = filter_args.pop('order_by', None)
     offset = filter_args.pop('offset', None)
-
-    if len({'first', 'last', 'order_by'}.intersection(set(filter_args.keys()))) > 1:
-    # if the user specified both first and last filters
-        # yell loudly
-        raise ValueError("Please specify one of first, last, and order_by filters")
+    after = filter_args.pop('after', None)
+    before = filter_args.pop('before', None)
 
     # start off with the full list of models
-    models = model.select()
+    models = _apply_filters(model, read_query(model.select()), filter_args)
 
-    # for each argument
-    for arg, value in filter_args.items():
-        # if the filter is for a group of values
-        if isinstance(value, list):
-            # remove the `_in` from the key
-            model_attribute = getattr(model, arg[:-3])
-            # filter the query
-            models = models.where(model_attribute.in_(value))
-        else:
-            try:
-                # filter the argument
-                models = models.where(getattr(model, arg) == value)
-            # if the model doesn't have the attribute
-            except AttributeError:
-                # maybe the capitalization is off
-                try:
-                    # invert the first letter
-                    first_letter = arg[0].title() if arg[0].islower() else arg[0].lower()
-                    # try filtering with the first letter invetered
-                    models = models.where(getattr(model, first_letter + arg[1:]) == value)
-                    # print(first_letter + arg[1:])
-
-                # if that still fails
-                except AttributeError as err:
-                    # yell loudly
-                    raise ValueError("Could not handle filter %s: %s" % (arg, err))
-
-
-    # if the user specified an ordering
-    if order_by:
-        # apply the ordering to the model
-        models = models.order_by(*_parse_order_by(model, order_by))
-    # otherwise there is no order by
-    else:
-        # the filter to use for the primary key
-        model_filter = ('-' if last else '+') + model.primary_key().name
-        # order the models by their primary key
-        models = models.order_by(*_parse_order_by(model, [model_filter]))
+    # the keys that determine the order of the results
+    ordering = _ordering_keys(model, order_by)
+    # apply the ordering to the model (walking it backwards to get the last records)
+    models = models.order_by(*[
+        field.desc() if descending != bool(last) else field for field, descending in ordering
+    ])
+
+    # if there is a cursor to start after
+    if after:
+        # only include the records that come after the cursor
+        models = models.where(_cursor_condition(ordering, after, after=True))
+    # if there is a cursor to end before
+    if before:
+        # only include the records that come before the cursor
+        models = models.where(_cursor_condition(ordering, before, after=False))
 
     # if there is an offset
     if offset:
@@ -105,8 +320,437 @@ def filter_model(model, args):
         # apply the limiting segmentations
         models = models.limit(first or last)
 
-    # return the filtered list
-    return list(models)
+    # return the query and the ordering of the result
+    return models, ordering
+
+
+def _reversed_page(args):
+    """
+        This function returns wether the records selected by the given filters
+        have to be reversed after they were loaded. The last records before or
+        after a cursor are read backwards but handed back in the order of the
+        query so that they line up with the page the cursor came from. (Without
+        a cursor, the last records keep coming out from the end.)
+    """
+    return bool(args.get('last')) and bool(args.get('after') or args.get('before'))
+
+
+def _iterate_rows(model, query, ordering, fields, with_ordering=False):
+    """
+        This function lazily loads the rows of the query, selecting only the
+        columns needed for the given fields (and the ordering keys if
+        `with_ordering` is true).
+
+        Returns:
+            (iterator of dict): The values of each row keyed by field name
+                (with the pagination cursor under `_cursor` if it was requested).
+    """
+    # the fields we have to load (the primary key is always included)
+    columns = [model.primary_key()] + [_model_field(model, name) for name in fields]
+
+    # wether or not we have to compute the cursor of each row
+    with_cursor = 'cursor' in fields
+    # if we do (or the caller needs the values)
+    if with_cursor or with_ordering:
+        # make sure the ordering values are loaded
+        columns += [field for field, _ in ordering]
+
+    # only select each column once (fields compare by name since == builds an expression)
+    columns = list({field.name: field for field in columns if field is not None}.values())
+    # the names of the selected columns
+    names = [field.name for field in columns]
+
+    # execute the projected query (reading the cursor directly so rows are never cached)
+    cursor = query.database.execute_sql(*query.select(*columns).sql())
+
+    # for each row of the result
+    for values in cursor:
+        # pair the values with their names (converted like the model would)
+        row = {name: field.python_value(value) for name, field, value in zip(names, columns, values)}
+        # if we need to point to the row
+        if with_cursor:
+            # add the cursor to the row
+            row['_cursor'] = encode_cursor(SimpleNamespace(**row), ordering)
+        # hand the row to the caller
+        yield row
+
+
+def aggregate_model(model, args, fields=None):
+    """
+        This function computes aggregate values over the records of a model
+        that satisfy the given filters. The aggregates are computed by the
+        database so only the summarized values are loaded. If the records are
+        spread over several shards, each one computes its aggregates and the
+        partial results are combined (counts and sums are added up, the
+        bounds are compared).
+
+        Args:
+            model (nautilus.BaseModel): The model to aggregate.
+            args (dict): The filters to apply, following the conventions of
+                `aggregate_args_for_model`. The `group_by` entry designates the
+                fields to group the records by.
+            fields (list of str): The aggregates to compute (ie, `count`,
+                `sum_price`, `max_date`) and the grouped fields to include. If
+                not provided every aggregate is computed.
+
+        Returns:
+            (list of dict): One entry for each group (or a single entry if the
+                records were not grouped).
+    """
+    # convert any args referencing pk to the actual field
+    filter_args = _resolve_pk_args(model, args)
+    # pull out the fields to group by
+    group_by = filter_args.pop('group_by', None) or []
+
+    # the fields of the model to group the records by
+    group_fields = []
+    # for each field to group by
+    for name in group_by:
+        # grab the field of the model
+        field = model.primary_key() if name == 'pk' else _model_field(model, name)
+        # if the model doesn't have the field
+        if field is None:
+            # yell loudly
+            raise ValueError("Cannot group by %s" % name)
+        # add the field to the list
+        group_fields.append((name, field))
+
+    # the aggregates the model supports
+    available = aggregate_fields(model)
+    # the aggregates to compute
+    requested = available.keys() if fields is None else \
+                    [field for field in fields if field in available]
+
+    # the columns to select (the grouped values followed by the aggregates)
+    selection = [field.alias(name) for name, field in group_fields] + \
+                    [available[name].alias(name) for name in requested]
+
+    # if there is nothing to compute
+    if not selection:
+        # yell loudly
+        raise ValueError("Please specify at least one aggregate to compute.")
+
+    # build the aggregate query over the filtered records
+    query = _apply_filters(model, read_query(model.select(*selection)), filter_args)
+
+    # if there are fields to group by
+    if group_fields:
+        # group and order the result by the fields
+        query = query.group_by(*[field for _, field in group_fields]) \
+                     .order_by(*[field for _, field in group_fields])
+
+    # the shards of the model
+    shards = model_shards(model)
+    # if the records are all in one database
+    if not shards:
+        # return the aggregated values
+        return list(query.dicts())
+
+    # the names of the grouped values
+    group_names = [name for name, _ in group_fields]
+    # the combined aggregates of each group
+    groups = {}
+
+    def aggregate_shard(database):
+        # point a copy of the query to the shard
+        shard_query = query.clone()
+        shard_query.database = database
+        # load its aggregates
+        return list(shard_query.dicts())
+
+    # for the aggregates of each shard (which are computed at the same time)
+    for rows in shards.map(aggregate_shard):
+        # for each group the shard has
+        for row in rows:
+            # the values identifying the group
+            key = tuple(row[name] for name in group_names)
+            # combine the partial aggregates with the ones of the other shards
+            groups[key] = _combine_aggregates(groups[key], row) if key in groups else row
+
+    # return the groups in the order the database would (with empty values first)
+    return [groups[key] for key in sorted(
+        groups,
+        key=lambda key: [(value is not None, value) for value in key]
+    )]
+
+
+def _combine_aggregates(aggregates, partial):
+    """
+        This function combines the aggregates of a group computed by two
+        different databases.
+    """
+    # the combined aggregates
+    combined = dict(aggregates)
+    # for each aggregate
+    for name, value in partial.items():
+        # the value computed so far
+        current = aggregates.get(name)
+        # if the aggregate wasn't computed by one of the databases (ie, no records to sum)
+        if value is None or current is None:
+            # use the one we have
+            combined[name] = current if value is None else value
+        # otherwise if the aggregate adds up the records
+        elif name == 'count' or name.startswith('sum_'):
+            # add the partial value
+            combined[name] = current + value
+        # otherwise if it's a bound of the values
+        elif name.startswith('min_') or name.startswith('max_'):
+            # keep the right one
+            combined[name] = (min if name.startswith('min_') else max)(current, value)
+
+    # return the combined aggregates
+    return combined
+
+
+def aggregate_fields(model):
+    """
+        This function returns the aggregates that can be computed over the
+        given model: the total number of records as well as the minimum and
+        maximum value of every field and the sum of the numeric ones.
+
+        Returns:
+            (dict): The name of each aggregate mapped to the SQL expression
+                that computes it.
+    """
+    # every model can count its records
+    aggregates = {'count': fn.COUNT(SQL('*'))}
+
+    # for each field of the model
+    for field in model.fields():
+        # the bounds of every field can be computed
+        aggregates['min_' + field.name] = fn.MIN(field)
+        aggregates['max_' + field.name] = fn.MAX(field)
+
+        # if the field is numeric (and not just an identifier)
+        if isinstance(convert_peewee_field(field), (Int, Float)):
+            # the values can be summed
+            aggregates['sum_' + field.name] = fn.SUM(field)
+
+    # return the aggregates
+    return aggregates
+
+
+def _resolve_pk_args(model, args):
+    """
+        This function replaces any filter referencing the `pk` alias with the
+        name of the primary key of the model.
+    """
+    # the name of the primary key
+    pk_name = model.primary_key().name
+    # convert any args referencing pk to the actual field
+    return {pk_name + key[2:] if key == 'pk' or key.startswith('pk_') else key: value \
+                        for key, value in args.items()}
+
+
+def _apply_filters(model, query, filter_args):
+    """
+        This function restricts the given query to the records of the model
+        that satisfy the field filters.
+    """
+    # the columns the query is filtered by
+    columns = []
+    # for each argument
+    for arg, value in filter_args.items():
+        # figure out the field and operator the argument refers to
+        field_name, operator_name = split_filter(arg, lambda name: _model_field(model, name))
+        # grab the field of the model
+        field = _model_field(model, field_name)
+
+        # if the model doesn't have the attribute
+        if field is None:
+            # yell loudly
+            raise ValueError("Could not handle filter %s" % arg)
+
+        # keep track of the column
+        columns.append(field.db_column)
+
+        # if there is no explicit operator but we were given a group of values
+        if not operator_name and isinstance(value, list):
+            # treat it like a membership check
+            operator_name = 'in'
+
+        # if there is an operator
+        if operator_name:
+            # filter the query with the corresponding expression
+            query = query.where(filter_operators[operator_name](field, value))
+        # otherwise the filter is a simple equality check
+        else:
+            query = query.where(field == value)
+
+    # record the filter so we know which indexes would help
+    filter_usage.record(model, columns)
+
+    # return the filtered query
+    return query
+
+
+def split_filter(arg, is_field):
+    """
+        This function splits a filter argument into the name of the field it
+        refers to and the operator to apply (if any).
+
+        Args:
+            arg (str): The filter argument (ie, `name_startswith`).
+            is_field (function): Returns true if the given name refers to a field.
+                Field names that happen to end in an operator take precedence.
+
+        Returns:
+            (tuple): The name of the field and the operator, or None if the
+                argument is a simple equality check.
+    """
+    # if the argument is a field on its own
+    if is_field(arg):
+        # its an equality check
+        return arg, None
+
+    # split the possible operator off the end of the argument
+    field_name, _, operator_name = arg.rpartition('_')
+
+    # if the suffix is a known operator
+    if field_name and operator_name in filter_operators:
+        # use it
+        return field_name, operator_name
+
+    # otherwise treat the argument like a field
+    return arg, None
+
+
+def _model_field(model, name):
+    """
+        This function returns the field of the model with the given name,
+        tolerating an inverted capitalization of the first letter.
+    """
+    # the fields of the model
+    fields = model._meta.fields
+
+    # if the name refers to a field
+    if name in fields:
+        # we're done
+        return fields[name]
+
+    # maybe the capitalization is off
+    if name:
+        # invert the first letter
+        first_letter = name[0].title() if name[0].islower() else name[0].lower()
+        # try the name with the first letter inverted
+        return fields.get(first_letter + name[1:])
+
+
+def encode_cursor(record, ordering):
+    """
+        This function creates an opaque cursor that identifies the position
+        of the given record in a result ordered by the given keys. The cursor
+        remembers the ordering (and its direction) so it can't be used to
+        paginate a different one.
+
+        Args:
+            record (object): The record to point to.
+            ordering (list of (field, bool) tuples): The fields that order the
+                result and wether they are descending.
+
+        Returns:
+            (str): The opaque cursor.
+    """
+    # the values of the ordering keys for the record
+    values = [[_ordering_key(field, descending), getattr(record, field.name)] \
+                    for field, descending in ordering]
+    # encode the values as url-safe text
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+        This function retrieves the list of (ordering key, value) pairs encoded
+        in a cursor created by `encode_cursor`. The keys are the names of the
+        fields prefixed with their direction (ie, `+name` or `-date`).
+    """
+    try:
+        # decode the cursor
+        return [tuple(entry) for entry in json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())]
+    # if the cursor is not one of ours
+    except (ValueError, TypeError):
+        # yell loudly
+        raise ValueError("Invalid cursor: %s" % cursor)
+
+
+def _ordering_key(field, descending):
+    # the name of the field along with the direction of the ordering
+    return ('-' if descending else '+') + field.name
+
+
+def _ordering_keys(model, order_by):
+    """
+        This function computes the list of fields that totally order the
+        results of a query. The primary key is always used as the final
+        tie-breaker so that cursors point to a unique position.
+
+        Returns:
+            (list of (field, bool) tuples): The fields to order by and wether the
+                ordering is descending.
+    """
+    # the primary key of the model
+    primary_key = model.primary_key()
+
+    # if there is no explicit ordering
+    if not order_by:
+        # order by the primary key
+        return [(primary_key, False)]
+
+    # the list of keys
+    keys = []
+    # for each attribute we have to order by
+    for key in order_by:
+        # remove any whitespace
+        key = key.strip()
+        # if the key starts with a plus or minus
+        if key.startswith('+') or key.startswith('-'):
+            # add the explicit ordering to the list
+            keys.append((getattr(model, key[1:]), key.startswith('-')))
+        # otherwise the key needs the default ordering
+        else:
+            # add the ascending ordering to the list
+            keys.append((getattr(model, key), False))
+
+    # if the primary key is not part of the ordering
+    if primary_key.name not in {field.name for field, _ in keys}:
+        # use it to break ties
+        keys.append((primary_key, False))
+
+    # return the list of keys
+    return keys
+
+
+def _cursor_condition(ordering, cursor, after=True):
+    """
+        This function builds the condition that selects the records before or
+        after the given cursor. For an ordering (a, b) the records after the
+        cursor satisfy `a > a0 OR (a = a0 AND b > b0)` (and the ones before it
+        use `<`, both flipped for descending keys), which lets the database
+        seek directly to the position using the index of the ordering keys.
+    """
+    # the values encoded in the cursor
+    values = decode_cursor(cursor)
+
+    # make sure the cursor was created with the same ordering (in the same direction)
+    if [key for key, _ in values] != [_ordering_key(field, descending) for field, descending in ordering]:
+        # yell loudly
+        raise ValueError("Cursor does not match the ordering of the query.")
+
+    # the alternatives of the condition
+    alternatives = []
+    # for each key in the ordering
+    for index, (field, descending) in enumerate(ordering):
+        # the records after the cursor are further along the ordering (the others precede it)
+        comparison = operator.gt if descending != after else operator.lt
+        # as long as the previous keys are equal
+        terms = [key == value for (key, _), (_, value) in zip(ordering[:index], values)]
+        # add the comparison for the current key
+        terms.append(comparison(field, values[index][1]))
+        # add the alternative to the list
+        alternatives.append(reduce(operator.and_, terms))
+
+    # the record has to match one of the alternatives
+    return reduce(operator.or_, alternatives)
 
 
 def _parse_order_by(model, order_by):
@@ -124,24 +768,149 @@ def _parse_order_by(model, order_by):
         Returns:
             (list of filters): the model filters to apply to the query
     """
-    # the list of filters for the models
-    out = []
-    # for each attribute we have to order by
-    for key in order_by:
-        # remove any whitespace
-        key = key.strip()
-        # if the key starts with a plus
-        if key.startswith("+"):
-            # add the ascending filter to the list
-            out.append(getattr(model, key[1:]))
-        # otherwise if the key starts with a minus
-        elif key.startswith("-"):
-            # add the descending filter to the list
-            out.append(getattr(model, key[1:]).desc())
-        # otherwise the key needs the default filter
-        else:
-            # add the default filter to the list
-            out.append(getattr(model, key))
+    # build the orderings out of the keys (without the tie-breaker)
+    return [field.desc() if descending else field \
+                for field, descending in _ordering_keys(model, order_by)[:len(order_by)]]
+
+
+def match_record(record, filters):
+    """
+        This function checks if a serialized record satisfies the given filters
+        without going through the database. Only the filters that restrict the
+        matching records are considered, segmentation filters (first, last,
+        offset, order_by) are ignored.
+
+        Args:
+            record (dict): The serialized record to check.
+            filters (dict): The filters to check against, following the
+                conventions of `args_for_model`.
+
+        Returns:
+            (bool): Wether or not the record satisfies every filter.
+    """
+    # for each filter to apply
+    for arg, value in filters.items():
+        # segmentation filters do not restrict individual records
+        if arg in segmentation_filters:
+            # so skip it
+            continue
+
+        # figure out the field and operator the argument refers to
+        field_name, operator_name = split_filter(arg, lambda name: name in record or name == 'pk')
+        # the value of the record for the attribute
+        record_value = _record_value(record, field_name)
+
+        # if there is no explicit operator but we were given a group of values
+        if not operator_name and isinstance(value, list):
+            # treat it like a membership check
+            operator_name = 'in'
+
+        # if the record does not satisfy the filter
+        if not _local_operators[operator_name](record_value, value):
+            return False
+
+    # the record passed every filter
+    return True
+
+
+# the filters that segment the result rather than restrict the records
+segmentation_filters = {'first', 'last', 'offset', 'order_by', 'after', 'before'}
+
+
+def _record_value(record, attribute):
+    """
+        This function returns the value of the given attribute of a
+        serialized record, treating `pk` as an alias for the primary key.
+    """
+    # if the attribute refers to the primary key
+    if attribute == 'pk' and 'pk' not in record:
+        # use the conventional name for the primary key
+        return record.get('id')
+
+    # otherwise just use the value in the record
+    return record.get(attribute)
+
+
+def _coerce(filter_value, record_value):
+    """
+        This function converts a filter value, which might have lost its type on
+        the way (ie, an id passed as a string), to the type of the record value.
+    """
+    # if there is nothing to convert or the types already match
+    if filter_value is None or record_value is None or type(filter_value) == type(record_value):
+        # use the value as is
+        return filter_value
+
+    try:
+        # if the record holds a flag
+        if isinstance(record_value, bool):
+            # parse the value like the database would (bool("false") is true)
+            return _to_flag(filter_value)
+        # convert the value to the same type as the record's
+        return type(record_value)(filter_value)
+    # if the value could not be converted
+    except (TypeError, ValueError):
+        # compare the string representations
+        return str(filter_value)
+
+
+def _to_flag(value):
+    """
+        This function converts a filter value to a boolean, parsing the usual
+        spellings of strings (see `nautilus.models.validation`).
+    """
+    return _to_bool(value) if isinstance(value, str) else bool(value)
+
+
+def _values_equal(record_value, filter_value):
+    """
+        This function compares a record value with a filter value.
+    """
+    # the filter value with the type of the record
+    filter_value = _coerce(filter_value, record_value)
+    # if the value had to be compared as a string
+    if isinstance(filter_value, str) and not isinstance(record_value, str) and record_value is not None:
+        # compare the string representation of the record value
+        return str(record_value) == filter_value
+
+    # compare the two values
+    return record_value == filter_value
+
+
+def _compare(comparison):
+    """
+        This function wraps a comparison so that it fails (rather than raising
+        an exception) for empty or incomparable values.
+    """
+    def compare(record_value, filter_value):
+        # empty values never satisfy a comparison
+        if record_value is None or filter_value is None:
+            return False
+        try:
+            # compare the values
+            return comparison(record_value, _coerce(filter_value, record_value))
+        # if the values cannot be compared
+        except TypeError:
+            return False
+
+    # return the safe comparison
+    return compare
+
 
-    # returnt the list of filters
-    return out
+# the local equivalent of each filter operator
+_local_operators = {
+    None: _values_equal,
+    'in': lambda record_value, values: any(_values_equal(record_value, value) for value in values),
+    'gt': _compare(operator.gt),
+    'gte': _compare(operator.ge),
+    'lt': _compare(operator.lt),
+    'lte': _compare(operator.le),
+    # like sql, empty values are never different from anything
+    'ne': lambda record_value, value: record_value is not None and value is not None and \
+                                    not _values_equal(record_value, value),
+    'contains': lambda record_value, value: record_value is not None and \
+                                    str(value).lower() in str(record_value).lower(),
+    'startswith': lambda record_value, value: record_value is not None and \
+                                    str(record_value).lower().startswith(str(value).lower()),
+    'isnull': lambda record_value, value: (record_value is None) == _to_flag(value),
+}
@@ -0,0 +1,250 @@
+"""
+    This module defines the in-memory replicas of remote models that the api
+    gateway can maintain in order to resolve queries without asking the
+    owning service.
+"""
+# local imports
+from nautilus.conventions.actions import success_status, single_method, action_records, apply_delta
+from .filter import match_record, segmentation_filters, split_filter
+
+
+class MaterializedView:
+    """
+        This class maintains an in-memory copy of the records of a remote model.
+        The view is bootstrapped with a single bulk read and kept up to date by
+        applying the records carried by successful crud actions. Until the view
+        is ready (or if it grows beyond its limits) queries should fall back to
+        the remote service.
+
+        Args:
+            name (str): The name of the model to replicate.
+            fields (list of str): The fields of the model.
+            max_records (int): The maximum number of records to keep in memory.
+                If the model grows beyond this limit, the view is disabled.
+    """
+
+    # the crud methods that modify the replicated records
+    methods = ('create', 'update', 'upsert', 'delete')
+
+
+    def __init__(self, name, fields, max_records=10000):
+        self.name = name
+        self.fields = set(fields) | {'pk'}
+        self.max_records = max_records
+        self.records = {}
+        self.ready = False
+        self.disabled = False
+        # the changes that arrived while the view was being bootstrapped
+        self._pending = []
+
+
+    async def bootstrap(self, fetch):
+        """
+            This method fills the view with the result of the given coroutine
+            function and then applies any changes that arrived in the meantime.
+
+            Args:
+                fetch (coroutine function): Resolves to the list of every record
+                    of the model (with their `pk`).
+        """
+        try:
+            # retrieve the full list of records
+            records = await fetch()
+        # if something went wrong
+        except Exception:
+            # the view cannot be trusted
+            self.disable()
+            # bubble up
+            raise
+
+        # if there are too many records to hold in memory
+        if len(records) > self.max_records:
+            # don't bother
+            return self.disable()
+
+        # for each record
+        for record in records:
+            # the key of the record
+            pk = _record_key(record)
+            # add it to the view
+            self.records[pk] = dict(record, pk=pk)
+
+        # the view is now ready to receive changes directly
+        self.ready = True
+
+        # apply the changes that arrived during the bootstrap
+        for method, record in self._pending:
+            self.apply(method, record)
+        # clear the list of pending changes
+        self._pending = []
+
+
+    def disable(self):
+        """
+            This method gives up on replicating the model and frees the memory
+            used by the view.
+        """
+        self.disabled = True
+        self.ready = False
+        self.records = {}
+        self._pending = []
+
+
+    def handle_action(self, action_type, record):
+        """
+            This method applies the record carried by the given action if it
+            refers to a successful change of the replicated model. Bulk actions
+            apply each of the records they carry.
+        """
+        try:
+            # the components of the action type
+            method, model, status = action_type.split('.')
+        # if the action type doesn't follow crud conventions
+        except ValueError:
+            # there's nothing to do
+            return
+
+        # if the action is a successful change to our model
+        if model == self.name and status == success_status() and single_method(method) in self.methods:
+            # for each record changed by the action
+            for changed in action_records(method, record):
+                # apply the change
+                self.apply(single_method(method), changed)
+
+
+    def apply(self, method, record):
+        """
+            This method applies a single change to the view.
+
+            Args:
+                method (str): One of create, update, upsert, or delete.
+                record (dict): The serialized record that changed.
+        """
+        # if we gave up on the model
+        if self.disabled:
+            # there's nothing to do
+            return
+
+        # if we're still waiting on the initial records
+        if not self.ready:
+            # if the backlog is getting too big
+            if len(self._pending) >= self.max_records:
+                # stop trying
+                return self.disable()
+            # save the change for later
+            self._pending.append((method, record))
+            # we're done here
+            return
+
+        # the primary key of the record
+        pk = _record_key(record)
+
+        # if the record was removed
+        if method == 'delete':
+            # remove it from the view
+            self.records.pop(pk, None)
+        # otherwise the record was created or updated
+        else:
+            # merge the changes on top of any values we already know about (changes can be deltas)
+            self.records[pk] = dict(apply_delta(self.records.get(pk, {}), record), pk=pk)
+
+            # if the view has grown too big
+            if len(self.records) > self.max_records:
+                # give up on the model
+                self.disable()
+
+
+    def can_serve(self, fields, filters):
+        """
+            Returns true if the view can resolve the given request locally.
+        """
+        # the view has to be up to date
+        if not self.ready or self.disabled:
+            return False
+
+        # every requested field has to be replicated
+        if not set(fields) <= self.fields:
+            return False
+
+        # for each filter
+        for arg in filters.keys():
+            # if the filter is a segmentation
+            if arg in segmentation_filters:
+                # cursors are only understood by the owning service
+                if arg in ('after', 'before'):
+                    return False
+                # we can handle the rest
+                continue
+            # the field that the argument filters
+            field, _ = split_filter(arg, lambda name: name in self.fields)
+            # if we don't know about the field
+            if field not in self.fields:
+                # we can't resolve the filter
+                return False
+
+        # we can resolve the request
+        return True
+
+
+    def query(self, fields, first=None, last=None, offset=None, order_by=None, **filters):
+        """
+            This method resolves the given request against the local records,
+            following the same conventions as `nautilus.api.filter.filter_model`.
+        """
+        # if the user specified both first and last filters
+        if first and last:
+            # yell loudly
+            raise ValueError("Please specify one of first and last filters")
+
+        # the records that satisfy the filters
+        matches = [record for record in self.records.values() \
+                                            if match_record(record, filters)]
+
+        # if there was no explicit ordering
+        if not order_by:
+            # order the records by their primary key
+            order_by = ['+pk']
+
+        # python sorts are stable so apply each ordering from the last to the first
+        for key in reversed(order_by):
+            # remove any whitespace
+            key = key.strip()
+            # figure out the direction of the ordering
+            descending = key.startswith('-')
+            # the name of the field to order by
+            field = key.lstrip('+-')
+            # apply the ordering (walking it backwards to get the last records like the database)
+            matches.sort(
+                key=lambda record: _sort_value(field, record.get(field)),
+                reverse=descending != bool(last)
+            )
+
+        # if there is an offset
+        if offset:
+            # apply the offset to the selection
+            matches = matches[int(offset):]
+
+        # if there are any limits to apply
+        if first or last:
+            # apply the limiting segmentations
+            matches = matches[:int(first or last)]
+
+        # only return the requested fields
+        return [{field: record.get(field) for field in fields} for record in matches]
+
+
+def _record_key(record):
+    """
+        This function returns the key of a record in the view. Reads return
+        primary keys as strings while the payloads of actions carry integers
+        so every key is stored as a string.
+    """
+    return str(record.get('pk', record.get('id')))
+
+
+def _sort_value(field, value):
+    # primary keys are strings so order the numeric ones like numbers
+    if field == 'pk' and value is not None:
+        return (True, (0, int(value), '') if value.isdigit() else (1, 0, value))
+    # empty values go first
+    return (value is not None, value)
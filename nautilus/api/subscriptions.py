@@ -0,0 +1,476 @@
+"""
+    This module defines the registry used by the api gateway to push the
+    changes announced by successful crud actions to websocket subscribers.
+"""
+# external imports
+import asyncio
+import inspect
+import json
+from graphql import parse
+# local imports
+from nautilus.conventions.actions import (
+    success_status,
+    single_method,
+    action_records,
+    is_delta,
+    apply_delta
+)
+from .filter import match_record, split_filter, segmentation_filters
+from .util.walk_query import build_arg_tree
+
+
+class Subscription:
+    """
+        This class represents a single subscription registered by a client. A
+        subscription follows a single model and only cares about the records
+        that satisfy its filters.
+
+        Args:
+            id (str): The client-provided identifier of the subscription.
+            model (str): The name of the model to follow.
+            fields (list of str): The fields to push for each change.
+            filters (dict): The filters a record must satisfy in order to be
+                pushed to the subscriber.
+    """
+
+    def __init__(self, id, model, fields, filters=None):
+        self.id = id
+        self.model = model
+        self.fields = fields
+        self.filters = filters or {}
+        # the keys of the pushed records that still satisfy the filters
+        self.pks = set()
+
+
+    @classmethod
+    def from_query(cls, id, query):
+        """
+            This method creates a subscription out of a graphql query string
+            with a single selection, for example:
+
+                subscription { recipe(name: "foo") { id, name } }
+        """
+        # parse the query
+        operation = parse(query).definitions[0]
+        # the selections of the operation
+        selections = operation.selection_set.selections
+
+        # make sure there is only one model to subscribe to
+        if len(selections) != 1:
+            # yell loudly
+            raise ValueError("Subscriptions must follow exactly one model.")
+
+        # the model to subscribe to
+        selection = selections[0]
+
+        # if there are no fields to push
+        if not selection.selection_set:
+            # yell loudly
+            raise ValueError("Subscriptions must specify the fields to push.")
+
+        # return the subscription
+        return cls(
+            id=id,
+            model=selection.name.value,
+            fields=[field.name.value for field in selection.selection_set.selections],
+            filters={arg.name.value: build_arg_tree(arg.value) for arg in selection.arguments}
+        )
+
+
+    def matches(self, record):
+        """
+            Returns true if the given serialized record is relevant to the
+            subscription.
+        """
+        return match_record(record, self.filters)
+
+
+    def can_match(self, record):
+        """
+            Returns true if the given serialized record (possibly a delta)
+            holds every field needed to check the filters of the subscription.
+        """
+        # for each filter that restricts the records
+        for arg in [arg for arg in self.filters if arg not in segmentation_filters]:
+            # the field the filter refers to
+            field_name, _ = split_filter(arg, lambda name: name in record or name == 'pk')
+            # if the record doesn't have a value for it
+            if field_name not in record and not (field_name == 'pk' and 'id' in record):
+                return False
+        # every filter can be checked
+        return True
+
+
+    def project(self, record):
+        """
+            This method returns the subset of the record that was asked for
+            by the subscriber.
+        """
+        # the projected record
+        projection = {}
+        # for each field the subscriber asked for
+        for field in self.fields:
+            # if the field is the primary key alias
+            if field == 'pk' and 'pk' not in record:
+                # use the conventional primary key
+                projection[field] = record.get('id')
+            # otherwise if the field is in the record
+            elif field in record:
+                # add it to the projection
+                projection[field] = record[field]
+
+        # return the projected record
+        return projection
+
+
+class SubscriptionConnection:
+    """
+        This class wraps a single websocket client along with the buffer of
+        messages that have not been sent yet. Messages are written to the socket
+        by a separate task so that a slow client never blocks the gateway.
+
+        Args:
+            socket (aiohttp.web.WebSocketResponse): The socket to write to.
+            buffer_size (int): The maximum number of messages waiting to be
+                sent before the client is considered too slow.
+            user (nautilus.config.Config): The session of the client (None if
+                it is anonymous).
+    """
+
+    def __init__(self, socket, buffer_size=100, loop=None, user=None):
+        self.socket = socket
+        self.user = user
+        self.subscriptions = {}
+        self.closed = False
+        self.loop = loop or asyncio.get_event_loop()
+        # the messages waiting to be sent to the client
+        self._buffer = asyncio.Queue(maxsize=buffer_size)
+        # start draining the buffer into the socket
+        self._writer = self.loop.create_task(self._drain())
+
+
+    def push(self, message):
+        """
+            This method adds the given message to the send buffer.
+
+            Returns:
+                (bool): False if the buffer was full and the message was dropped.
+        """
+        try:
+            # add the message to the buffer without waiting
+            self._buffer.put_nowait(message)
+        # if the buffer is full
+        except asyncio.QueueFull:
+            # the client is not keeping up
+            return False
+
+        # the message was buffered
+        return True
+
+
+    @property
+    def pending(self):
+        """
+            The number of messages waiting to be sent to the client.
+        """
+        return self._buffer.qsize()
+
+
+    async def close(self, message=''):
+        """
+            This method stops sending messages and closes the socket.
+        """
+        # if we have already been closed
+        if self.closed:
+            # there's nothing to do
+            return
+
+        # mark the connection as closed
+        self.closed = True
+        # stop draining the buffer
+        self._writer.cancel()
+
+        # close the socket
+        await self.socket.close(message=message.encode())
+
+
+    async def _drain(self):
+        # continuously loop
+        while True:
+            # wait for the next message
+            message = await self._buffer.get()
+            # send it to the client
+            result = self.socket.send_str(json.dumps(message))
+            # older versions of aiohttp send synchronously
+            if inspect.isawaitable(result):
+                await result
+
+
+class SubscriptionRegistry:
+    """
+        This class keeps track of the subscriptions of every connected client
+        and pushes the records announced by successful crud actions to the
+        ones that care about them.
+
+        Each subscription remembers the records that were pushed to it so that
+        deletes (which only carry the primary key) and updates that move a
+        record out of its filters (pushed as deletes) reach the clients
+        holding that record.
+
+        Changes that only carry the fields that changed (deltas) are pushed
+        as is (marked with `delta`). If a subscription filters on a field the
+        delta doesn't carry, the whole record is loaded with `fetch` to check
+        it (without a way to load it, the change isn't pushed).
+
+        Args:
+            buffer_size (int): The size of the send buffer of each connection.
+                Clients whose buffer fills up are disconnected.
+            fetch (coroutine function): Called with the name of a model and a
+                primary key, returns the serialized record (or None).
+            authorize (coroutine function): Called with the name of a model, a
+                serialized record and the user of a connection, returns wether
+                the user is allowed to see the record. Records are only pushed
+                to the clients that pass.
+    """
+
+    # the crud methods that produce changes for subscribers
+    methods = ('create', 'update', 'upsert', 'delete')
+
+
+    def __init__(self, buffer_size=100, loop=None, fetch=None, authorize=None):
+        self.buffer_size = buffer_size
+        self.loop = loop
+        self.fetch = fetch
+        self.authorize = authorize
+        self.connections = set()
+        # an index of model names to the (connection, subscription) pairs
+        self._subscriptions = {}
+
+
+    def connect(self, socket, user=None):
+        """
+            This method registers a new client (with the session of its user)
+            with the registry.
+        """
+        # create a connection for the socket
+        connection = SubscriptionConnection(
+            socket,
+            buffer_size=self.buffer_size,
+            loop=self.loop,
+            user=user
+        )
+        # add it to the list
+        self.connections.add(connection)
+        # return the connection for the request handler
+        return connection
+
+
+    async def disconnect(self, connection, message=''):
+        """
+            This method removes a client and all of its subscriptions.
+        """
+        # for each subscription of the connection
+        for subscription_id in list(connection.subscriptions.keys()):
+            # remove the subscription
+            self.unsubscribe(connection, subscription_id)
+
+        # forget the connection
+        self.connections.discard(connection)
+        # close the underlying socket
+        await connection.close(message=message)
+
+
+    def subscribe(self, connection, subscription_id, query):
+        """
+            This method adds a subscription to the given connection.
+        """
+        # create the subscription
+        subscription = Subscription.from_query(subscription_id, query)
+
+        # if the client is replacing an existing subscription
+        if subscription_id in connection.subscriptions:
+            # remove the old one first
+            self.unsubscribe(connection, subscription_id)
+
+        # register the subscription with the connection
+        connection.subscriptions[subscription_id] = subscription
+        # and add it to the model index
+        self._subscriptions.setdefault(subscription.model, []).append((connection, subscription))
+
+        # return the subscription
+        return subscription
+
+
+    def unsubscribe(self, connection, subscription_id):
+        """
+            This method removes the designated subscription from the connection.
+        """
+        # remove the subscription from the connection
+        subscription = connection.subscriptions.pop(subscription_id, None)
+
+        # if there was no such subscription
+        if not subscription:
+            # there's nothing to do
+            return
+
+        # the subscriptions for the model
+        model_subscriptions = self._subscriptions.get(subscription.model, [])
+        # remove the entry from the index
+        model_subscriptions[:] = [entry for entry in model_subscriptions \
+                                        if entry[1] is not subscription]
+
+
+    async def publish(self, action_type, payload):
+        """
+            This method pushes the record carried by the given action to the
+            matching subscriptions.
+        """
+        try:
+            # the components of the action type
+            method, model, status = action_type.split('.')
+        # if the action type doesn't follow crud conventions
+        except ValueError:
+            # there's nothing to do
+            return
+
+        # if the action isn't a successful change to a record
+        if status != success_status() or single_method(method) not in self.methods:
+            # there's nothing to do
+            return
+
+        # the subscriptions that follow the model
+        model_subscriptions = self._subscriptions.get(model)
+
+        # if there are none
+        if not model_subscriptions:
+            # there's nothing to do
+            return
+
+        # treat the payload like json if its a string
+        payload = json.loads(payload) if isinstance(payload, str) else payload
+
+        # the connections that couldn't keep up
+        slow_connections = set()
+
+        # the kind of change carried by the action
+        action = single_method(method)
+
+        # for each record changed by the action (bulk actions carry many)
+        for record in action_records(method, payload):
+            # the key of the record
+            pk = _record_key(record)
+            # the whole record (only loaded if a delta isn't enough to check a subscription)
+            full_record = None
+
+            # for each subscription to the model (the list changes if a client is evicted)
+            for connection, subscription in list(model_subscriptions):
+                # if the connection is going to be evicted
+                if connection in slow_connections:
+                    # move along
+                    continue
+
+                # if the record was deleted
+                if action == 'delete':
+                    # if the client doesn't hold the record (and the filters can't tell)
+                    if pk not in subscription.pks and not (
+                        subscription.can_match(record) and subscription.matches(record) \
+                            and await self._authorized(model, record, connection)
+                    ):
+                        # move along
+                        continue
+                    # the client won't hold the record anymore
+                    subscription.pks.discard(pk)
+                    # push the delete
+                    message = _message(subscription, action, record)
+
+                # otherwise the record was created or updated
+                else:
+                    # the values to check against the subscription
+                    candidate = record
+                    # if the change doesn't carry every field the subscription filters on
+                    if is_delta(record) and not subscription.can_match(record):
+                        # if we haven't loaded the whole record yet
+                        if full_record is None:
+                            full_record = await self._fetch_record(model, record)
+                        # check the whole record instead
+                        candidate = full_record
+
+                    # if we couldn't tell what the record looks like
+                    if not candidate:
+                        # move along
+                        continue
+
+                    # if the record matches the subscription (and the client can see it)
+                    if subscription.matches(candidate) and \
+                            await self._authorized(model, candidate, connection):
+                        # the client holds the record now
+                        subscription.pks.add(pk)
+                        # push the change
+                        message = _message(subscription, action, record)
+                        # if the change only carries some of the fields
+                        if is_delta(record):
+                            # let the client know to merge them
+                            message['delta'] = True
+
+                    # otherwise if the change moved a record the client holds out of the filters
+                    elif pk in subscription.pks:
+                        # the client won't hold the record anymore
+                        subscription.pks.discard(pk)
+                        # let it know to drop the record
+                        message = _message(subscription, 'delete', record)
+
+                    # otherwise the client doesn't care about the record
+                    else:
+                        # move along
+                        continue
+
+                # if the message could not be buffered
+                if not connection.push(message):
+                    # the connection needs to be evicted
+                    slow_connections.add(connection)
+
+        # for every connection that couldn't keep up
+        for connection in slow_connections:
+            # remove it from the registry
+            await self.disconnect(connection, message='slow consumer')
+
+
+    async def _authorized(self, model, record, connection):
+        """
+            This method returns wether the user of the connection is allowed to
+            see the given record.
+        """
+        # if there is nothing to check
+        if not self.authorize:
+            return True
+        # check the record
+        return await self.authorize(model, record, connection.user)
+
+
+    async def _fetch_record(self, model, record):
+        """
+            This method loads the whole record that the given delta applies to
+            (or returns an empty record if it can't be found).
+        """
+        # if there is no way to load the record
+        if not self.fetch:
+            return {}
+        # load the record
+        loaded = await self.fetch(model, record.get('pk', record.get('id')))
+        # apply the delta on top of it (in case the record was read before the change)
+        return apply_delta(loaded, record) if loaded else {}
+
+
+def _record_key(record):
+    # the key of a record (events carry integers while reads return strings)
+    return str(record.get('pk', record.get('id')))
+
+
+def _message(subscription, action, record):
+    # the message pushing a change to the subscriber
+    return {
+        'type': 'data',
+        'id': subscription.id,
+        'action': action,
+        'payload': subscription.project(record),
+    }
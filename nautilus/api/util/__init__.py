@@ -9,6 +9,7 @@ from .graphql_mutation_from_summary import graphql_mutation_from_summary
 from .summarize_mutation_io import summarize_mutation_io
 from .convert_typestring_to_api_native import convert_typestring_to_api_native
 from .serialize_native_type import serialize_native_type
+from .serialize_rows import serialize_rows
 from .graph_entity import GraphEntity
-from .query_for_model import query_for_model
+from .query_for_model import query_for_model, aggregate_query_for_model, structured_query_for_model
 from .arg_string_from_dict import arg_string_from_dict
\ No newline at end of file
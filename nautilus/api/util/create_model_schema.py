@@ -1,9 +1,18 @@
 # external imports
+from types import SimpleNamespace
 import graphene
-from graphene import Field, List
+from graphene import Field, Int, List, String
+from graphql.language import ast
 # local imports
-from ..filter import filter_model, args_for_model
+from ..filter import (
+    filter_model,
+    args_for_model,
+    aggregate_model,
+    aggregate_args_for_model,
+    aggregate_fields
+)
 from nautilus.contrib.graphene_peewee import PeeweeObjectType, convert_peewee_field
+from nautilus.models.versioned import is_versioned, changes
 
 
 def create_model_schema(target_model):
@@ -24,22 +33,82 @@ def create_model_schema(target_model):
             model = target_model
 
         pk = Field(primary_key_type, description="The primary key for this object.")
+        cursor = String(description="An opaque cursor pointing to this object.")
 
         @graphene.resolve_only_args
         def resolve_pk(self):
-            return getattr(self, self.primary_key().name)
+            return getattr(self, primary_key.name)
+
+        @graphene.resolve_only_args
+        def resolve_cursor(self):
+            return getattr(self, '_cursor', None)
+
+
+    # the model fields that can be used to group aggregates
+    group_fields = {field.name: convert_peewee_field(field) for field in target_model.fields()}
+    # the type of each aggregate
+    aggregate_types = {
+        name: Int() if name == 'count' else type(group_fields[name.split('_', 1)[1]])() \
+                    for name in aggregate_fields(target_model).keys()
+    }
+
+    # create a graphene object for the aggregated values
+    AggregateObjectType = type('AggregateObjectType', (graphene.ObjectType,), {
+        **{name: type(field_type)() for name, field_type in group_fields.items()},
+        **aggregate_types,
+        # the primary key can be used for grouping too
+        'pk': Field(primary_key_type),
+    })
 
 
     class Query(graphene.ObjectType):
         """ the root level query """
         all_models = List(ModelObjectType, args=args_for_model(target_model))
+        aggregate_models = List(AggregateObjectType, args=aggregate_args_for_model(target_model))
 
 
-        @graphene.resolve_only_args
-        def resolve_all_models(self, **args):
-            # filter the model query according to the arguments
-            # print(filter_model(target_model, args)[0].__dict__)
-            return filter_model(target_model, args)
+        def resolve_aggregate_models(self, args, info):
+            # the fields that were requested
+            fields = _requested_fields(info)
+            # compute the aggregates in the database
+            return [SimpleNamespace(**row) for row in aggregate_model(target_model, args, fields)]
+
+
+        def resolve_all_models(self, args, info):
+            # the fields that were requested
+            fields = _requested_fields(info)
+            # filter the model query according to the arguments, only loading what we need
+            return filter_model(target_model, args, fields)
+
+
+    # if we are keeping track of the changes to the model
+    if is_versioned(target_model):
+
+        class ChangesObjectType(graphene.ObjectType):
+            """ the changes made to the model since a version """
+            version = Int(description="The version of the last change.")
+            records = List(ModelObjectType, description="The records that were created or updated.")
+            deleted = List(String(), description="The primary keys of the records that were removed.")
+
+
+        class Query(Query):
+            """ the root level query (along with the changes to the model) """
+            changes = Field(ChangesObjectType, since=Int(), limit=Int())
+
+
+            def resolve_changes(self, args, info):
+                # find the changes since the given version
+                records, deleted, version = changes(
+                    target_model,
+                    since=args.get('since', 0),
+                    limit=args.get('limit')
+                )
+                # return the summary
+                return SimpleNamespace(
+                    version=version,
+                    records=records,
+                    deleted=[str(pk) for pk in deleted]
+                )
 
 
     # add the query to the schema
@@ -47,3 +116,20 @@ def create_model_schema(target_model):
 
     return schema
 
+
+def _requested_fields(info):
+    """
+        This function returns the names of the fields selected by the query
+        being resolved, or None if they cannot be determined statically (ie,
+        the selection uses fragments).
+    """
+    # the selections of the field being resolved
+    selections = info.field_asts[0].selection_set.selections
+
+    # if any of the selections is not a simple field
+    if any(not isinstance(selection, ast.Field) for selection in selections):
+        # we can't tell which fields will be needed
+        return None
+
+    # return the names of the selected fields
+    return [selection.name.value for selection in selections]
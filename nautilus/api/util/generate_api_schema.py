@@ -15,8 +15,12 @@ def generate_api_schema(models, connections=[], mutations=[], **schema_args):
         # find any matching connections
         model_connections = [connection for connection in connections \
                     if connection['connection']['from']['service'] == model['name']]
+        # find any connections that can be walked back to the model
+        reverse_connections = [connection for connection in connections \
+                    if connection['connection']['to']['service'] == model['name'] \
+                        and 'reverse' in connection]
         # build a graphql type for the model
-        graphql_type = graphql_type_from_summary(model, model_connections)
+        graphql_type = graphql_type_from_summary(model, model_connections, reverse_connections)
 
         # add the graphql type to the list
         schema_types.append(graphql_type)
@@ -112,7 +112,9 @@ class GraphEntity:
                 self.service.object_resolver,
                 self.service.connection_resolver,
                 self.service.mutation_resolver,
-                obey_auth=False
+                obey_auth=False,
+                traversal_resolver=self.service.traversal_resolver,
+                fused_resolver=self.service.fused_resolver
             )
             # go to the bottom of the result for the list of matching ids
             return self._find_id(result['data'], args[0])
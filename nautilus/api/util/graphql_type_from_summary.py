@@ -1,7 +1,7 @@
 # third party imports
 import graphene
 
-def graphql_type_from_summary(summary, connections=[]):
+def graphql_type_from_summary(summary, connections=[], reverse_connections=[]):
     # the name of the type
     name = summary['name']
     # the fields of the type
@@ -15,11 +15,17 @@ def graphql_type_from_summary(summary, connections=[]):
         field['name']: graphene.List(field['connection']['to']['service']) \
                                     for field in connections
     }
+    # add the connections that lead back to the model
+    reverse_connections = {
+        field['reverse']['name']: graphene.List(field['connection']['from']['service']) \
+                                    for field in reverse_connections
+    }
     # print(connections)
-    # merge the two field dictionaries
+    # merge the field dictionaries
     class_fields = {
         **fields,
-        **connections
+        **connections,
+        **reverse_connections
     }
 
     graphql_type = type(name, (graphene.ObjectType,), class_fields)
@@ -3,7 +3,7 @@ from graphql import parse
 # local imports
 from .walk_query import walk_query
 
-async def parse_string(query, resolver, connection_resolver, mutation_resolver, extra_mutations={}, current_user=None, obey_auth=True):
+async def parse_string(query, resolver, connection_resolver, mutation_resolver, extra_mutations={}, current_user=None, obey_auth=True, traversal_resolver=None, fused_resolver=None):
     # start off with an empty dictionary
     result = {}
     # collect the errors in a list
@@ -33,7 +33,9 @@ async def parse_string(query, resolver, connection_resolver, mutation_resolver,
                 connection_resolver,
                 errors,
                 obey_auth=obey_auth,
-                current_user=current_user
+                current_user=current_user,
+                traversal_resolver=traversal_resolver,
+                fused_resolver=fused_resolver
             )
 
         # add the query result to the final result
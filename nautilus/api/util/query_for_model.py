@@ -1,6 +1,31 @@
 from .arg_string_from_dict import arg_string_from_dict
 
 def query_for_model(fields, **filters):
+    # the query for the requested data
+    return _query_for_root('all_models', fields, filters)
+
+
+def aggregate_query_for_model(fields, **filters):
+    # the query for the requested aggregates
+    return _query_for_root('aggregate_models', fields, filters)
+
+
+def structured_query_for_model(fields, **filters):
+    """
+        This function returns the payload of a structured read action, which
+        model services can resolve without parsing a graphql query.
+    """
+    return {
+        'fields': fields,
+        # ignore the filters that weren't given a value
+        'filters': {key: value for key, value in filters.items() if value is not None},
+    }
+
+
+def _query_for_root(root, fields, filters):
+    # ignore the filters that weren't given a value
+    filters = {key: value for key, value in filters.items() if value is not None}
+
     # if there are filters
     if filters:
         # the string for the filters
@@ -9,4 +34,4 @@ def query_for_model(fields, **filters):
         filter_string = ''
 
     # the query for the requested data
-    return "query { all_models%s { %s } }" % (filter_string, ', '.join(fields))
+    return "query { %s%s { %s } }" % (root, filter_string, ', '.join(fields))
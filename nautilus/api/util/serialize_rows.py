@@ -0,0 +1,74 @@
+# external imports
+import json
+import peewee
+from graphene.core.types.scalars import Boolean, Float, Int
+# local imports
+from nautilus.contrib.graphene_peewee import convert_peewee_field
+from nautilus.models.serializers.recordSerializer import serialize_temporal
+
+def serialize_rows(model, rows, fields):
+    """
+        This function serializes the rows produced by
+        `nautilus.api.filter.project_model` into a json list. Each value is
+        converted the same way the graphql schema of the model would, without
+        going through graphene. Rows are encoded one at a time so the full
+        result is never held as python objects.
+
+        Args:
+            model (nautilus.BaseModel): The model the rows belong to.
+            rows (iterable of dict): The projected rows.
+            fields (list of str): The fields included in each row.
+
+        Returns:
+            (str): The json encoding of the list of rows.
+    """
+    # the function to apply to each value of a row
+    converters = {field: _converter_for_field(model, field) for field in fields}
+
+    # encode each row as it is produced
+    encoded = (
+        json.dumps({field: _convert(converters[field], row.get(field)) for field in fields}) \
+            for row in rows
+    )
+
+    # join the rows into a single list
+    return '[%s]' % ', '.join(encoded)
+
+
+def _convert(converter, value):
+    # empty values are left alone
+    return None if value is None else converter(value)
+
+
+def _converter_for_field(model, name):
+    # the primary key is exposed as an id
+    if name == 'pk':
+        return str
+
+    # find the field of the model with the name
+    field = model._meta.fields.get(name)
+    # if there is no such field (ie, the pagination cursor)
+    if field is None:
+        # use the value as it is
+        return lambda value: value
+
+    # if the field holds a date or a time
+    if isinstance(field, (peewee.DateField, peewee.DateTimeField, peewee.TimeField)):
+        # use the same string as the events carrying the record
+        return serialize_temporal
+
+    # the graphql type of the field
+    field_type = convert_peewee_field(field)
+
+    # if the field holds a boolean
+    if isinstance(field_type, Boolean):
+        return bool
+    # if the field holds an integer
+    if isinstance(field_type, Int):
+        return int
+    # if the field holds a floating point number
+    if isinstance(field_type, Float):
+        return float
+
+    # everything else (ids, strings) is exposed as a string
+    return str
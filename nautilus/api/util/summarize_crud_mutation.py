@@ -5,9 +5,11 @@ from .summarize_mutation import summarize_mutation
 from nautilus.conventions.api import (
     create_mutation_inputs,
     update_mutation_inputs,
+    upsert_mutation_inputs,
     delete_mutation_inputs,
     create_mutation_outputs,
     update_mutation_outputs,
+    upsert_mutation_outputs,
     delete_mutation_outputs,
     crud_mutation_name,
 )
@@ -25,12 +27,14 @@ def summarize_crud_mutation(method, model, isAsync=False):
     input_map = {
         'create': create_mutation_inputs,
         'update': update_mutation_inputs,
+        'upsert': upsert_mutation_inputs,
         'delete': delete_mutation_inputs,
     }
     # a mappting of methods to output factories
     output_map = {
         'create': create_mutation_outputs,
         'update': update_mutation_outputs,
+        'upsert': upsert_mutation_outputs,
         'delete': delete_mutation_outputs,
     }
     # the inputs for the mutation
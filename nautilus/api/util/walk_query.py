@@ -1,7 +1,41 @@
-async def walk_query(obj, object_resolver, connection_resolver, errors, current_user=None, __naut_name=None, obey_auth=True, **filters):
+# external imports
+from graphql.language import ast
+
+def build_arg_tree(arg):
+    """
+        This function recursively builds the arguments for lists and single values
+    """
+    # TODO: what about object arguments??
+
+    # if the value is an integer
+    if isinstance(arg, ast.IntValue):
+        # make sure it stays one when passed along
+        return int(arg.value)
+    # if the value is a float
+    elif isinstance(arg, ast.FloatValue):
+        # make sure it stays one when passed along
+        return float(arg.value)
+    # if there is a single value
+    elif hasattr(arg, 'value'):
+        # assign the value to the filter
+        return arg.value
+    # otherwise if there are multiple values for the argument
+    elif hasattr(arg, 'values'):
+        return [build_arg_tree(node) for node in arg.values]
+
+
+async def walk_query(obj, object_resolver, connection_resolver, errors, current_user=None, __naut_name=None, obey_auth=True, traversal_resolver=None, fused_resolver=None, __naut_through=None, **filters):
     """
         This function traverses a query and collects the corresponding
         information in a dictionary.
+
+        If a traversal resolver is given, connections without arguments are
+        walked for every matching record at once. Chains of connections whose
+        intermediate nodes only ask for their id are walked with a single call
+        and only the records at the end of the chain are resolved.
+
+        If a fused resolver is given, the remaining connections are resolved
+        along with the records they point to in a single call.
     """
     # if the object has no selection set
     if not hasattr(obj, 'selection_set'):
@@ -14,24 +48,10 @@ async def walk_query(obj, object_resolver, connection_resolver, errors, current_
     # the selected fields
     selection_set = obj.selection_set.selections
 
-    def _build_arg_tree(arg):
-        """
-            This function recursively builds the arguments for lists and single values
-        """
-        # TODO: what about object arguments??
-
-        # if there is a single value
-        if hasattr(arg, 'value'):
-            # assign the value to the filter
-            return arg.value
-        # otherwise if there are multiple values for the argument
-        elif hasattr(arg, 'values'):
-            return [_build_arg_tree(node) for node in arg.values]
-
     # for each argument on this node
     for arg in obj.arguments:
         # add it to the query filters
-        filters[arg.name.value] = _build_arg_tree(arg.value)
+        filters[arg.name.value] = build_arg_tree(arg.value)
 
     # the fields we have to ask for
     fields = [field for field in selection_set if not field.selection_set]
@@ -39,8 +59,14 @@ async def walk_query(obj, object_resolver, connection_resolver, errors, current_
     connections = [field for field in selection_set if field.selection_set]
 
     try:
-        # resolve the model with the given fields
-        models = await object_resolver(node_name, [field.name.value for field in fields], current_user=current_user, obey_auth=obey_auth, **filters)
+        # if we are walking a connection from a record
+        if __naut_through:
+            # resolve the connected models with the given fields (along with the name of their model)
+            models, node_name = await fused_resolver(node_name, __naut_through, [field.name.value for field in fields], current_user=current_user, obey_auth=obey_auth, **filters)
+        # otherwise we are looking for models directly
+        else:
+            # resolve the model with the given fields
+            models = await object_resolver(node_name, [field.name.value for field in fields], current_user=current_user, obey_auth=obey_auth, **filters)
     # if something went wrong resolving the object
     except Exception as e:
         # add the error as a string
@@ -48,12 +74,35 @@ async def walk_query(obj, object_resolver, connection_resolver, errors, current_
         # stop here
         return None
 
+    # the connections that can be walked for every model at once
+    batched = [connection for connection in connections if not connection.arguments] \
+                    if traversal_resolver else []
+    # for each of them
+    for connection in batched:
+        # walk the connection (and any chain that follows it)
+        await _walk_chain(
+            models,
+            node_name,
+            connection,
+            object_resolver,
+            connection_resolver,
+            traversal_resolver,
+            errors,
+            current_user=current_user,
+            obey_auth=obey_auth,
+            fused_resolver=fused_resolver
+        )
+
     # add connections to each matching model
     for model in models:
         # if is an id for the model
         if 'pk' in model:
             # for each connection
             for connection in connections:
+                # if the connection was already walked
+                if connection in batched:
+                    # move along
+                    continue
                 # the name of the connection
                 connection_name = connection.name.value
                 # the target of the connection
@@ -62,6 +111,24 @@ async def walk_query(obj, object_resolver, connection_resolver, errors, current_
                     'pk': model['pk']
                 }
 
+                # if the connection can be walked along with the records it points to
+                if fused_resolver:
+                    # walk the connection and resolve the records in one go
+                    model[connection_name] = await walk_query(
+                        connection,
+                        object_resolver,
+                        connection_resolver,
+                        errors,
+                        current_user=current_user,
+                        obey_auth=obey_auth,
+                        __naut_name=connection_name,
+                        traversal_resolver=traversal_resolver,
+                        fused_resolver=fused_resolver,
+                        __naut_through=node
+                    )
+                    # move on to the next connection
+                    continue
+
                 try:
                     # go through the connection
                     connected_ids, next_target = await connection_resolver(
@@ -71,10 +138,8 @@ async def walk_query(obj, object_resolver, connection_resolver, errors, current_
 
                     # if there are connections
                     if connected_ids:
-                        # add the id filter to the list
-                        filters['pk_in'] = connected_ids
-
-                        # add the connection field
+                        # add the connection field (the connection's own arguments,
+                        # like pagination cursors, are added when it is walked)
                         value = await walk_query(
                             connection,
                             object_resolver,
@@ -83,7 +148,9 @@ async def walk_query(obj, object_resolver, connection_resolver, errors, current_
                             current_user=current_user,
                             obey_auth=obey_auth,
                             __naut_name=next_target,
-                            **filters
+                            traversal_resolver=traversal_resolver,
+                            fused_resolver=fused_resolver,
+                            pk_in=connected_ids
                         )
                     # there were no connections
                     else:
@@ -101,3 +168,102 @@ async def walk_query(obj, object_resolver, connection_resolver, errors, current_
     # return the list of matching models
     return models
 
+
+async def _walk_chain(models, node_name, connection, object_resolver, connection_resolver, traversal_resolver, errors, current_user=None, obey_auth=True, fused_resolver=None):
+    """
+        This function walks a connection (along with the chain of connections
+        that follows it) for every one of the given models at once.
+    """
+    # the connections in the chain
+    chain = [connection]
+    # while the last node only passes through to the next connection
+    while _passes_through(chain[-1]):
+        # add the next connection to the chain
+        chain.append([field for field in chain[-1].selection_set.selections if field.selection_set][0])
+
+    # the models we can connect
+    models = [model for model in models if 'pk' in model]
+    # if there aren't any
+    if not models:
+        # there's nothing to do
+        return
+
+    try:
+        # the ids along each path through the chain and the name of the node at each step
+        paths, targets = await traversal_resolver(
+            [link.name.value for link in chain],
+            node_name,
+            [model['pk'] for model in models],
+            current_user=current_user,
+            obey_auth=obey_auth
+        )
+        # the ids at the end of the chain
+        final_ids = _unique([path[-1] for path in paths])
+
+        # resolve the records at the end of the chain (if there are any)
+        records = await walk_query(
+            chain[-1],
+            object_resolver,
+            connection_resolver,
+            errors,
+            current_user=current_user,
+            obey_auth=obey_auth,
+            __naut_name=targets[-1],
+            traversal_resolver=traversal_resolver,
+            fused_resolver=fused_resolver,
+            pk_in=final_ids
+        ) if final_ids else []
+    # if something went wrong
+    except Exception as e:
+        # add the error as a string
+        errors.append(e.__str__())
+        # stop here
+        records = None
+
+    # the records at the end of the chain by id
+    by_pk = {str(record['pk']): record for record in records or []}
+
+    # for each model
+    for model in models:
+        # set the connection to the appropriate value
+        model[connection.name.value] = None if records is None else _nest(
+            chain,
+            [path[1:] for path in paths if str(path[0]) == str(model['pk'])],
+            by_pk
+        )
+
+
+def _passes_through(node):
+    # the fields selected on the node
+    selections = node.selection_set.selections
+    # the connections of the node
+    connections = [field for field in selections if field.selection_set]
+    # a node passes through if it only asks for its id and a single connection without arguments
+    return len(connections) == 1 and not connections[0].arguments and \
+            {field.name.value for field in selections if not field.selection_set} <= {'pk', 'id'}
+
+
+def _nest(chain, tails, records):
+    # the ids connected at this step of the chain
+    ids = _unique([tail[0] for tail in tails])
+
+    # if we reached the end of the chain
+    if len(chain) == 1:
+        # return the matching records
+        return [records[str(pk)] for pk in ids if str(pk) in records]
+
+    # the fields selected on the intermediate nodes
+    fields = {field.name.value for field in chain[0].selection_set.selections if not field.selection_set}
+    # build each intermediate node along with the rest of the chain
+    return [
+        dict(
+            {field: pk for field in fields | {'pk'}},
+            **{chain[1].name.value: _nest(chain[1:], [tail[1:] for tail in tails if tail[0] == pk], records)}
+        ) for pk in ids
+    ]
+
+
+def _unique(items):
+    # the items without duplicates (in order)
+    seen = set()
+    return [item for item in items if not (item in seen or seen.add(item))]
@@ -11,6 +11,59 @@ def get_crud_action(method, model, status='pending', **kwds):
     return "%s.%s.%s" % (method, get_model_string(model), status)
 
 
+def bulk_method(method):
+    """
+        This function returns the crud method that applies the given method
+        to many records at once (ie, `create_many`).
+    """
+    return "%s_many" % method
+
+
+def single_method(method):
+    """
+        This function returns the crud method that a (possibly bulk) method
+        applies to each record.
+    """
+    return method[:-len(bulk_method(''))] if method.endswith(bulk_method('')) else method
+
+
+def action_records(method, payload):
+    """
+        This function returns the list of records carried by the payload of a
+        successful (possibly bulk) crud action.
+    """
+    # if the action applied to many records
+    if method != single_method(method):
+        # bulk deletes only carry the list of keys
+        if isinstance(payload, dict):
+            return [{'pk': pk} for pk in payload.get('pk', [])]
+        # the other bulk actions carry the list of records
+        return list(payload)
+
+    # single actions carry a single record
+    return [payload]
+
+
+# the key marking the payloads that only carry the fields that changed
+delta_marker = '__delta__'
+
+def is_delta(record):
+    """
+        This function returns wether the given record (carried by a successful
+        crud action) only holds the fields that changed along with the primary
+        key (and version).
+    """
+    return isinstance(record, dict) and bool(record.get(delta_marker))
+
+
+def apply_delta(record, change):
+    """
+        This function returns the given record with the values carried by a
+        change (a full record or a delta) applied on top of it.
+    """
+    return {**(record or {}), **{key: value for key, value in change.items() if key != delta_marker}}
+
+
 def change_action_status(action_type, new_status):
     """
         This function changes the status of an action type.
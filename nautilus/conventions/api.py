@@ -12,6 +12,17 @@ def root_query(*service):
     ''' This function returns the name of the root query for a model service. '''
     return 'all_models'
 
+def root_aggregate_query(*service):
+    ''' This function returns the name of the root aggregate query for a model service. '''
+    return 'aggregate_models'
+
+def aggregate_query_name(model):
+    """
+        This function returns the name used by the api gateway to designate
+        aggregates over the records of the given model.
+    """
+    return "{}_aggregate".format(get_model_string(model))
+
 def crud_mutation_name(action, model):
     """
         This function returns the name of a mutation that performs the specified
@@ -93,6 +104,38 @@ def update_mutation_outputs(service):
 
 
 
+def upsert_mutation_inputs(service):
+    """
+        Args:
+            service : The service being upserted by the mutation
+        Returns:
+            (list) : a list of all of the fields availible for the service. None
+                of them are required since the record is identified by either
+                its pk or a unique field.
+    """
+    # grab the default list of field summaries
+    inputs = _service_mutation_summaries(service)
+
+    # visit each field
+    for field in inputs:
+        # no field is required on its own
+        field['required'] = False
+
+    # return the final list
+    return inputs
+
+
+def upsert_mutation_outputs(service):
+    """
+        Args:
+            service : The service being upserted by the mutation
+        Returns:
+            (list of single dict): A single output representing the object type
+                for the service record that was created or updated.
+    """
+    return [_summarize_o_mutation_type(service.model)]
+
+
 def delete_mutation_inputs(service):
     """
         Args:
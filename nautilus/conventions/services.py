@@ -26,3 +26,8 @@ def connection_service_name(service, *args):
         return service
 
     return normalize_string(type(service).__name__)
+
+
+def reverse_connection_name(service):
+    ''' the name of the field that walks a connection from its target back to its source '''
+    return '%s_reverse' % connection_service_name(service)
@@ -0,0 +1,193 @@
+# external imports
+from peewee import Proxy
+# local imports
+from .executor import DatabaseExecutor
+from .batcher import WriteBatcher
+from .replicas import ReplicaRouter
+from .shards import ShardRouter, ShardKeyCounter, model_shards
+from .indexes import (
+    FilterUsage,
+    filter_usage,
+    recommend_indexes,
+    create_indexes,
+    ensure_indexes
+)
+from .pool import PoolMetricsMixin, PoolTimeout, metered_pool
+from .sqlite import performance_pragmas, is_file_database
+
+# create a placeholder database
+db = Proxy()
+# the router that picks the database used for reads
+router = ReplicaRouter()
+
+# the executor used to run queries off of the event loop
+executor = DatabaseExecutor()
+
+def init_db(database_url, executor_threads=None, max_connections=None,
+            stale_timeout=None, pool_timeout=None, tune_sqlite=True,
+            replica_urls=None, max_staleness=None):
+    """
+        This function initializes the global database with the given url.
+        Urls with a pooled scheme (ie, `postgresql+pool://...`) share a pool of
+        connections between the executor threads, each task checking out a
+        connection for as long as it runs.
+
+        Args:
+            database_url (str): The url of the database to connect to.
+            executor_threads (int): The number of threads used to run queries.
+                In-memory sqlite databases are always queried on the calling
+                thread since every connection would see a different database.
+            max_connections (int): The maximum number of connections in the
+                pool (defaults to the number of executor threads).
+            stale_timeout (int): The number of seconds after which an idle
+                pooled connection is recycled.
+            pool_timeout (float): The number of seconds to wait for a pooled
+                connection before giving up.
+            tune_sqlite (bool): Wether to apply `performance_pragmas` to the
+                connections of sqlite files.
+            replica_urls (list of str): The urls of the replicas of the database
+                used to serve reads (see `read_query`).
+            max_staleness (float): The number of seconds after a write during
+                which reads go to the primary database instead of the replicas
+                (see `ReplicaRouter`).
+    """
+    # utility functions to parse database urls
+    from playhouse.db_url import connect, parse, schemes
+    from playhouse.pool import PooledDatabase
+
+    # if the database only lives in the memory of the current connection
+    if database_url.startswith('sqlite') and ':memory:' in database_url:
+        # don't run queries on other threads
+        executor_threads = 0
+    # otherwise if we weren't given a size for the executor
+    elif executor_threads is None:
+        # use the default
+        executor_threads = DatabaseExecutor.default_max_workers
+
+    # the class of database the url refers to
+    database_class = schemes.get(database_url.split(':', 1)[0])
+
+    # if we don't support the url
+    if database_class is None:
+        # let peewee explain what's wrong
+        connect(database_url)
+
+    # the arguments of the connection
+    connect_kwds = parse(database_url)
+    # wether the database is a sqlite file
+    sqlite_file = is_file_database(database_class, connect_kwds)
+
+    # if the url asks for a pool of connections
+    if issubclass(database_class, PooledDatabase):
+        # add the pool configuration (preferring the values in the url)
+        connect_kwds.setdefault('max_connections', max_connections or max(executor_threads, 1))
+        connect_kwds.setdefault('stale_timeout', stale_timeout)
+        connect_kwds.setdefault('pool_timeout', pool_timeout)
+        # pooled sqlite connections are handed to different threads over time
+        if sqlite_file:
+            connect_kwds.setdefault('check_same_thread', False)
+        # use the pool that waits for connections and keeps track of its usage
+        database_class = metered_pool(database_class)
+
+    # if we are dealing with a sqlite file that should be tuned
+    if sqlite_file and tune_sqlite:
+        # apply the pragmas to every connection
+        connect_kwds.setdefault('pragmas', list(performance_pragmas))
+
+    # create the database
+    database = database_class(**connect_kwds)
+
+    # initialize the peewee database with the appropriate engine
+    db.initialize(database)
+
+    # the databases that serve reads
+    replicas = [connect(url) for url in replica_urls or []]
+    # start routing reads
+    router.configure(replicas, max_staleness=max_staleness)
+
+    # configure the executor for the database (returning the connection to
+    # the pool after each task so that idle threads don't hold onto one)
+    executor.configure(
+        executor_threads,
+        release=_release_connection if isinstance(database, PooledDatabase) else None
+    )
+
+
+def database_options(config):
+    """
+        This function returns the keyword arguments for `init_db` found in the
+        given service configuration.
+    """
+    return {
+        'executor_threads': config.get('database_executor_threads'),
+        'max_connections': config.get('database_max_connections'),
+        'stale_timeout': config.get('database_stale_timeout'),
+        'pool_timeout': config.get('database_pool_timeout'),
+        'tune_sqlite': config.get('database_tune_sqlite', True),
+        'replica_urls': config.get('database_replica_urls'),
+        'max_staleness': config.get('database_replica_staleness'),
+    }
+
+
+def read_query(query):
+    """
+        This function points the given select query at the database that
+        should serve it according to the `router`. Queries against databases
+        other than the global one are left alone.
+
+        Returns:
+            (peewee.SelectQuery): The query.
+    """
+    # if the query targets the global database
+    if query.database is db:
+        # the database that should serve the read
+        database = router.read_database()
+        # if the read shouldn't go to the primary
+        if database is not None:
+            # send the query to the replica
+            query.database = database
+    # return the query
+    return query
+
+
+async def write(function, *args, batcher=None, **kwds):
+    """
+        This function performs the given blocking write as part of a batch if
+        a `WriteBatcher` is provided, or on its own on the executor otherwise.
+        Writes should go through this function so that the `router` knows
+        when the replicas might be behind.
+
+        Returns:
+            The return value of the function.
+    """
+    try:
+        # if the writes are batched
+        if batcher:
+            # add the write to the current batch
+            return await batcher.submit(function, *args, **kwds)
+        # otherwise perform the write on its own
+        return await executor.run(function, *args, **kwds)
+    # regardless of how the write went
+    finally:
+        # make sure the following reads don't miss it
+        router.note_write()
+
+
+def pool_metrics():
+    """
+        This function returns the usage metrics of the connection pool or None
+        if the database does not pool its connections.
+    """
+    # the current database
+    database = db.obj
+    # if the database keeps track of its pool
+    if isinstance(database, PoolMetricsMixin):
+        # return the summary
+        return database.metrics()
+
+
+def _release_connection():
+    # if the current thread has a connection that's not part of a transaction
+    if not db.is_closed() and not db.transaction_depth():
+        # return it to the pool
+        db.close()
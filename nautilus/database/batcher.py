@@ -0,0 +1,178 @@
+"""
+    This module defines the batcher used to commit many independent writes
+    with a single transaction.
+"""
+# external imports
+import asyncio
+import functools
+
+
+class WriteBatcher:
+    """
+        This class collects the writes submitted within a short window (or up
+        to a maximum number of them) and applies them in a single transaction
+        so that the cost of a commit is shared by the whole batch. Each write
+        runs in its own savepoint so a failing write does not affect the
+        others and every caller still receives its own result or error.
+        Batches are committed one after the other in the order they were
+        closed so that a write never lands before an earlier one.
+
+        Args:
+            max_batch_size (int): The number of writes that triggers a commit.
+            window (float): The number of seconds to wait for more writes
+                after the first one of a batch is submitted.
+            database (peewee.Database): The database to commit to (defaults to
+                the global nautilus database).
+            executor (nautilus.database.DatabaseExecutor): The executor used to
+                apply the batches (defaults to the global one).
+    """
+
+    def __init__(self, max_batch_size=100, window=0.005, database=None, executor=None, loop=None):
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self.database = database
+        self.executor = executor
+        self.loop = loop
+        # the (function, future) pairs waiting to be committed
+        self._pending = []
+        # the timer that commits the current batch
+        self._timer = None
+        # the batches being committed
+        self._commits = set()
+        # the commit of the most recent batch (which the next one waits for)
+        self._last_commit = None
+
+
+    async def submit(self, function, *args, **kwds):
+        """
+            This method adds the given function to the current batch and waits
+            for the batch to be committed.
+
+            Args:
+                function (callable): The blocking function that performs the write.
+
+            Returns:
+                The return value of the function.
+
+            Raises:
+                Exception: Whatever the function raised or the error that
+                    prevented the batch from being committed.
+        """
+        # the loop to wait on
+        loop = self.loop or asyncio.get_event_loop()
+        # the future that resolves with the result of the write
+        future = loop.create_future()
+        # add the write to the batch
+        self._pending.append((functools.partial(function, *args, **kwds), future))
+
+        # if the batch is full
+        if len(self._pending) >= self.max_batch_size:
+            # commit it right away
+            self._commit_pending()
+        # otherwise if this is the first write of the batch
+        elif self._timer is None:
+            # commit the batch once the window closes
+            self._timer = loop.call_later(self.window, self._commit_pending)
+
+        # wait for the result of the write
+        return await future
+
+
+    async def flush(self):
+        """
+            This method commits any pending writes and waits for every batch
+            in progress to finish.
+        """
+        # commit what we have
+        self._commit_pending()
+        # if there are batches being committed
+        if self._commits:
+            # wait for them (errors are reported to the individual writers)
+            await asyncio.wait(list(self._commits))
+
+
+    def _commit_pending(self):
+        # if there is a timer waiting
+        if self._timer is not None:
+            # we're taking care of it
+            self._timer.cancel()
+            self._timer = None
+
+        # if there is nothing to commit
+        if not self._pending:
+            # we're done
+            return
+
+        # grab the batch and start a new one
+        batch, self._pending = self._pending, []
+        # commit the batch in the background once the previous one is done
+        task = (self.loop or asyncio.get_event_loop()).create_task(
+            self._commit(batch, previous=self._last_commit)
+        )
+        # the next batch has to wait for this one
+        self._last_commit = task
+        # keep track of it until it finishes
+        self._commits.add(task)
+        task.add_done_callback(self._commits.discard)
+
+
+    async def _commit(self, batch, previous=None):
+        # avoid circular imports
+        from nautilus.database import executor
+
+        # if an earlier batch is still being committed
+        if previous is not None and not previous.done():
+            # wait for it (its errors were reported to its own writers)
+            await asyncio.wait([previous])
+
+        try:
+            # apply the batch without blocking the loop
+            results = await (self.executor or executor).run(
+                self._apply, [function for function, _ in batch]
+            )
+        # if the batch could not be committed
+        except Exception as err:
+            # every write in the batch failed
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+            # we're done here
+            return
+
+        # for each write and its outcome
+        for (_, future), (error, result) in zip(batch, results):
+            # if the caller stopped waiting
+            if future.done():
+                continue
+            # if the write failed
+            if error is not None:
+                # pass the error on
+                future.set_exception(error)
+            # otherwise the write succeeded
+            else:
+                future.set_result(result)
+
+
+    def _apply(self, functions):
+        # avoid circular imports
+        from nautilus.database import db
+        # the database to commit to
+        database = self.database or db
+
+        # the (error, result) pair of each write
+        results = []
+        # open the transaction shared by the batch
+        with database.atomic():
+            # for each write
+            for function in functions:
+                try:
+                    # perform the write in its own savepoint
+                    with database.atomic():
+                        results.append((None, function()))
+                # if the write failed
+                except Exception as err:
+                    # its changes were rolled back so we can move on
+                    results.append((err, None))
+
+        # return the outcome of each write
+        return results
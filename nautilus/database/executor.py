@@ -0,0 +1,103 @@
+"""
+    This module defines the executor used to run blocking database work
+    outside of the event loop.
+"""
+# external imports
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DatabaseExecutor:
+    """
+        This class runs blocking database work on a bounded pool of threads so
+        that slow queries don't freeze the event loop (and with it the kafka
+        consumer and http server). peewee keeps a separate connection for each
+        thread so every worker uses its own connection.
+
+        Args:
+            max_workers (int): The maximum number of queries to run at once.
+                If zero, the work is performed directly on the calling thread
+                (ie, for in-memory sqlite databases which can't be shared
+                between connections).
+            release (callable): Called on the worker thread after each piece
+                of work (ie, to return a pooled connection).
+    """
+
+    # the number of workers used when none is specified
+    default_max_workers = 4
+
+
+    def __init__(self, max_workers=default_max_workers, release=None):
+        self.max_workers = max_workers
+        self.release = release
+        self._pool = None
+
+
+    def configure(self, max_workers, release=None):
+        """
+            This method changes the number of workers used by the executor.
+        """
+        # stop the current workers (any pending work is allowed to finish)
+        self.shutdown(wait=False)
+        # save the new size
+        self.max_workers = max_workers
+        # and the cleanup to perform after each piece of work
+        self.release = release
+
+
+    async def run(self, function, *args, **kwds):
+        """
+            This method calls the given function with the given arguments on
+            one of the worker threads and waits for the result.
+
+            Args:
+                function (callable): The blocking function to call.
+
+            Returns:
+                The return value of the function.
+        """
+        # if we aren't supposed to use separate threads
+        if not self.max_workers:
+            # call the function directly
+            return function(*args, **kwds)
+
+        # the loop to wait on
+        loop = asyncio.get_event_loop()
+        # run the function on the pool
+        return await loop.run_in_executor(
+            self._get_pool(),
+            functools.partial(self._call, function, *args, **kwds)
+        )
+
+
+    def shutdown(self, wait=True):
+        """
+            This method stops the worker threads.
+        """
+        # if there is a pool
+        if self._pool:
+            # stop it
+            self._pool.shutdown(wait=wait)
+            # forget about it
+            self._pool = None
+
+
+    def _call(self, function, *args, **kwds):
+        try:
+            # call the function
+            return function(*args, **kwds)
+        # regardless of what happened
+        finally:
+            # if there is something to clean up
+            if self.release:
+                self.release()
+
+
+    def _get_pool(self):
+        # if we haven't created the pool yet
+        if self._pool is None:
+            # create it
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        # return the pool
+        return self._pool
@@ -0,0 +1,229 @@
+"""
+    This module defines the utilities used to keep track of the filters
+    applied to each model and to make sure they are backed by indexes.
+"""
+# external imports
+import json
+import threading
+
+
+class FilterUsage:
+    """
+        This class counts how often each combination of columns of a table is
+        used to filter its records. The counts can be saved to a file so that
+        the indexes can be reviewed outside of the running service.
+
+        Args:
+            enabled (bool): Wether the filters should be counted. The usage of
+                the process (`filter_usage`) is only enabled by services that
+                save it (see `filter_usage_path`).
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        # a map of table names to the number of times each set of columns was filtered
+        self.counts = {}
+        # filters can be applied from any of the executor threads
+        self._lock = threading.Lock()
+
+
+    def record(self, Model, columns):
+        """
+            This method records that the records of the model were filtered by
+            the given columns.
+        """
+        # if we aren't keeping track of the filters
+        if not self.enabled:
+            # don't bother
+            return
+
+        # the key for the combination of columns
+        key = tuple(sorted(set(columns)))
+        # if there is nothing to record
+        if not key:
+            return
+
+        # update the count
+        with self._lock:
+            table_counts = self.counts.setdefault(Model._meta.db_table, {})
+            table_counts[key] = table_counts.get(key, 0) + 1
+
+
+    def counts_for(self, Model):
+        """
+            This method returns the number of times each set of columns of the
+            given model was used to filter its records.
+        """
+        with self._lock:
+            return dict(self.counts.get(Model._meta.db_table, {}))
+
+
+    def save(self, path):
+        """
+            This method writes the counts to the file at the given path (adding
+            them to the counts already in the file).
+        """
+        # the counts already in the file
+        saved = FilterUsage.load(path)
+        # add the counts we know about
+        with self._lock:
+            for table, table_counts in self.counts.items():
+                for columns, count in table_counts.items():
+                    saved_counts = saved.counts.setdefault(table, {})
+                    saved_counts[columns] = saved_counts.get(columns, 0) + count
+
+        # write the combined counts
+        with open(path, 'w') as usage_file:
+            json.dump({
+                table: [[list(columns), count] for columns, count in table_counts.items()]
+                    for table, table_counts in saved.counts.items()
+            }, usage_file)
+
+
+    @classmethod
+    def load(cls, path):
+        """
+            This method reads the counts saved at the given path (an empty
+            usage is returned if the file doesn't exist).
+        """
+        # create the usage
+        usage = cls()
+
+        try:
+            # read the file
+            with open(path) as usage_file:
+                saved = json.load(usage_file)
+        # if there is no file
+        except FileNotFoundError:
+            # there's nothing to load
+            return usage
+
+        # for each table and its counts
+        for table, table_counts in saved.items():
+            # add the counts to the usage
+            usage.counts[table] = {tuple(columns): count for columns, count in table_counts}
+
+        # return the usage
+        return usage
+
+
+# the usage of the filters applied in this process (enabled by the services that save it)
+filter_usage = FilterUsage(enabled=False)
+
+
+def index_columns(Model, database=None):
+    """
+        This function returns the columns of each index of the model's table
+        (including the primary key).
+    """
+    # the database to inspect
+    database = database or Model._meta.database
+    # the columns of the indexes of the table
+    indexes = [list(index.columns) for index in database.get_indexes(Model._meta.db_table)]
+    # the primary key is always indexed
+    return [[Model.primary_key().db_column]] + indexes
+
+
+def declared_indexes(Model):
+    """
+        This function returns the columns of each index declared by the model,
+        either with `index=True` on a field or in the `indexes` of its Meta.
+    """
+    # the columns of each index
+    indexes = []
+    # for each list of fields to index
+    for fields, _ in Model._index_data():
+        # add the corresponding columns
+        indexes.append([
+            (Model._meta.fields[field] if isinstance(field, str) else field).db_column \
+                for field in fields
+        ])
+    # return the list
+    return indexes
+
+
+def recommend_indexes(Model, usage=None, min_count=100, database=None):
+    """
+        This function returns the sets of columns that were used to filter
+        the model at least `min_count` times without an index to support them.
+
+        Returns:
+            (list of tuples): The columns of each recommended index, the most
+                used first.
+    """
+    # the usage to look at
+    usage = usage or filter_usage
+    # the columns of the existing indexes
+    existing = index_columns(Model, database=database)
+
+    # the recommended indexes along with their usage
+    recommendations = []
+    # for each set of columns used to filter the model
+    for columns, count in usage.counts_for(Model).items():
+        # if the filter isn't hot enough or there is already an index for it
+        if count < min_count or _is_covered(columns, existing):
+            # move along
+            continue
+        # recommend an index for the columns
+        recommendations.append((count, columns))
+
+    # return the columns, the most used first
+    return [columns for _, columns in sorted(recommendations, reverse=True)]
+
+
+def create_indexes(Model, indexes, database=None):
+    """
+        This function creates the given indexes on the table of the model
+        (in every shard if the model is sharded) unless they already exist.
+
+        Args:
+            indexes (list of list of str): The columns of each index.
+
+        Returns:
+            (list): The indexes that were created.
+    """
+    # avoid circular imports
+    from .shards import model_shards
+    # the shards of the model
+    shards = model_shards(Model)
+    # the databases to create the indexes in
+    databases = [database] if database else shards.databases if shards else [Model._meta.database]
+    # the fields of the model by column
+    fields = {field.db_column: field for field in Model._meta.fields.values()}
+
+    # the indexes that were created
+    created = []
+    # for each database
+    for target in databases:
+        # the indexes that already exist
+        existing = index_columns(Model, database=target)
+        # for each index to create
+        for columns in indexes:
+            # if there is already an index for the columns
+            if _is_covered(columns, existing):
+                # move along
+                continue
+            # create the index
+            target.create_index(Model, [fields[column] for column in columns])
+            # keep track of it
+            existing.append(list(columns))
+            created.append(list(columns))
+
+    # return the indexes that were created
+    return created
+
+
+def ensure_indexes(Model, database=None):
+    """
+        This function creates the indexes declared by the model that don't
+        exist yet (ie, for tables created before the index was declared).
+
+        Returns:
+            (list): The indexes that were created.
+    """
+    return create_indexes(Model, declared_indexes(Model), database=database)
+
+
+def _is_covered(columns, indexes):
+    # an index supports the filter if it starts with the filtered columns (in any order)
+    return any(set(index[:len(columns)]) == set(columns) for index in indexes)
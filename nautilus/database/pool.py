@@ -0,0 +1,144 @@
+"""
+    This module defines the connection pool used when the database url asks
+    for one (ie, `postgresql+pool://...`).
+"""
+# external imports
+import threading
+import time
+from playhouse.pool import PooledDatabase
+
+
+class PoolTimeout(ValueError):
+    """
+        This exception is raised when no connection was returned to the pool
+        in time. It subclasses ValueError to match the error raised by peewee
+        when the pool is exhausted.
+    """
+
+
+class PoolMetricsMixin:
+    """
+        This mixin adds two things to the pools provided by peewee: instead of
+        failing as soon as every connection is checked out, callers wait (for
+        at most `pool_timeout` seconds) for one to be returned, and the pool
+        keeps track of how it is being used.
+
+        Args:
+            pool_timeout (float): The number of seconds to wait for a free
+                connection. If None, callers wait forever.
+    """
+
+    def __init__(self, database, pool_timeout=None, **kwds):
+        self.pool_timeout = pool_timeout
+        # the number of connections handed out by the pool
+        self.checkouts = 0
+        # the number of checkouts that had to wait for a free connection
+        self.waits = 0
+        # the total number of seconds spent waiting for a free connection
+        self.wait_time = 0.0
+        # signaled whenever a connection is returned to the pool
+        self._returned = threading.Condition()
+        # initialize the pool
+        super().__init__(database, **kwds)
+
+
+    def connect(self):
+        # peewee opens connections while holding its own lock (which is also
+        # needed to return them) so we have to wait for room before
+        with self._returned:
+            # wait for a connection to be available
+            self._wait_for_connection()
+            # check out a connection
+            super().connect()
+            # keep track of the checkout
+            self.checkouts += 1
+
+
+    def close(self):
+        # return the connection to the pool
+        super().close()
+        # let the next waiting caller know
+        with self._returned:
+            self._returned.notify()
+
+
+    def metrics(self):
+        """
+            This method returns a summary of the current state of the pool.
+
+            Returns:
+                (dict): The number of connections in use and idle in the pool
+                    along with the number of checkouts, how many of them had
+                    to wait and the total time spent waiting (in seconds).
+        """
+        return {
+            'max_connections': self.max_connections,
+            'in_use': len(self._in_use),
+            'idle': len(self._connections),
+            'checkouts': self.checkouts,
+            'waits': self.waits,
+            'wait_time': self.wait_time,
+        }
+
+
+    def _is_exhausted(self):
+        # the pool is exhausted if every connection it can make is checked out
+        return bool(self.max_connections) and len(self._in_use) >= self.max_connections
+
+
+    def _wait_for_connection(self):
+        # if there is room in the pool
+        if not self._is_exhausted():
+            # there's no need to wait
+            return
+
+        # keep track of how long we wait
+        start = time.time()
+        self.waits += 1
+
+        try:
+            # while there is no room in the pool
+            while self._is_exhausted():
+                # the amount of time we have left
+                remaining = None if self.pool_timeout is None \
+                                    else self.pool_timeout - (time.time() - start)
+                # if we ran out of time
+                if remaining is not None and remaining <= 0:
+                    # yell loudly
+                    raise PoolTimeout('Exceeded maximum connections.')
+                # wait for a connection to be returned
+                self._returned.wait(remaining)
+
+        # regardless of how the wait ended
+        finally:
+            # add it to the total
+            self.wait_time += time.time() - start
+
+
+# the pooled database classes we have already extended
+_metered_classes = {}
+
+def metered_pool(database_class):
+    """
+        This function returns a subclass of the given peewee pool that waits
+        for free connections and records its usage.
+
+        Args:
+            database_class (type): A subclass of `playhouse.pool.PooledDatabase`.
+    """
+    # if we were given a class that doesn't pool connections
+    if not issubclass(database_class, PooledDatabase):
+        # yell loudly
+        raise ValueError("%s does not pool its connections." % database_class.__name__)
+
+    # if we haven't extended the class yet
+    if database_class not in _metered_classes:
+        # create the subclass
+        _metered_classes[database_class] = type(
+            'Metered' + database_class.__name__,
+            (PoolMetricsMixin, database_class),
+            {}
+        )
+
+    # return the subclass
+    return _metered_classes[database_class]
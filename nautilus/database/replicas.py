@@ -0,0 +1,89 @@
+"""
+    This module defines the router that sends reads to replicas of the
+    primary database.
+"""
+# external imports
+import time
+
+
+class ReplicaRouter:
+    """
+        This class picks the database that should serve each read. Reads are
+        spread over the replicas in turn while writes always go to the primary.
+        Since replicas trail the primary, reads go back to the primary for
+        `max_staleness` seconds after each write so that a client reading what
+        it just wrote never sees an older version.
+
+        The last write is tracked for the whole process rather than for each
+        model: a write to any table of the primary sends every read to the
+        primary until the window closes.
+
+        Args:
+            replicas (list of peewee.Database): The databases that can serve reads.
+            max_staleness (float): The number of seconds replicas are allowed
+                to lag behind the primary (defaults to `default_max_staleness`).
+                If zero, reads always go to a replica, even right after a write.
+    """
+
+    # the number of seconds reads stay on the primary after a write by default
+    default_max_staleness = 1
+
+
+    def __init__(self, replicas=None, max_staleness=None):
+        self.configure(replicas, max_staleness)
+
+
+    def configure(self, replicas=None, max_staleness=None):
+        """
+            This method replaces the replicas used by the router.
+        """
+        self.replicas = list(replicas or [])
+        self.max_staleness = self.default_max_staleness if max_staleness is None else max_staleness
+        # the time of the last write to the primary (from any model of the process)
+        self.last_write = None
+        # the index of the next replica to use
+        self._next = 0
+
+
+    def note_write(self):
+        """
+            This method records that the primary was just written to.
+        """
+        self.last_write = time.time()
+
+
+    def read_database(self):
+        """
+            This method returns the database that should serve the next read or
+            None if it should be served by the primary.
+        """
+        # if there are no replicas
+        if not self.replicas:
+            # use the primary
+            return None
+
+        # if the replicas might not have caught up with the last write
+        if self.max_staleness and self.last_write is not None \
+                and time.time() - self.last_write < self.max_staleness:
+            # use the primary
+            return None
+
+        # the replica to use
+        replica = self.replicas[self._next % len(self.replicas)]
+        # move on to the next one for the following read
+        self._next += 1
+        # return the replica
+        return replica
+
+
+    def close(self):
+        """
+            This method closes the connection the current thread has to each
+            replica.
+        """
+        # for each replica
+        for replica in self.replicas:
+            # if the current thread has a connection
+            if not replica.is_closed():
+                # close it
+                replica.close()
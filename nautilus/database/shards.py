@@ -0,0 +1,456 @@
+"""
+    This module defines the router used to spread the records of a single
+    model over several databases.
+"""
+# external imports
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from peewee import fn, Model, CharField, BigIntegerField, IntegrityError, SqliteDatabase
+from playhouse.pool import PooledDatabase
+
+
+class ShardKeyCounter(Model):
+    """
+        This model holds the last primary key allocated for the records of
+        each sharded model. Every shard has its own copy of the table so the
+        counter is bumped in the transaction that inserts the record (see
+        `ShardRouter.create`).
+    """
+    # the table of the sharded model
+    model = CharField(primary_key=True)
+    # the last key allocated in the shard
+    key = BigIntegerField()
+
+
+class ShardRouter:
+    """
+        This class decides which of several databases (shards) holds each
+        record of a model. Records are assigned to a shard by hashing their
+        primary key or by the range their primary key falls in. When a record
+        is created without a primary key, the router allocates one that routes
+        back to the shard the record is stored in. Keys are allocated from a
+        counter kept in the shard (see `ShardKeyCounter`) which stays locked
+        until the record is inserted, so several processes can safely write
+        to the same shards.
+
+        Args:
+            databases (list of peewee.Database): The shards.
+            strategy (str): Either 'hash' or 'range'.
+            ranges (list of (int, int) tuples): The (inclusive) start and
+                (exclusive) end of the keys held by each shard when routing by
+                range. The end of the last range can be None.
+            partitioned (bool): Wether the actions concerning the records of
+                a shard should be sent to the matching kafka partition.
+    """
+
+    # the supported strategies
+    strategies = ('hash', 'range')
+
+
+    def __init__(self, databases, strategy='hash', ranges=None, partitioned=False):
+        # if there are no shards
+        if not databases:
+            # yell loudly
+            raise ValueError("Please provide at least one shard.")
+        # if we don't know how to route the records
+        if strategy not in self.strategies:
+            # yell loudly
+            raise ValueError("Unknown sharding strategy: %s" % strategy)
+        # if the ranges don't match the shards
+        if strategy == 'range' and len(ranges or []) != len(databases):
+            # yell loudly
+            raise ValueError("Please provide a range of keys for each shard.")
+
+        self.databases = list(databases)
+        self.strategy = strategy
+        self.ranges = [tuple(key_range) for key_range in ranges] if ranges else None
+        self.partitioned = partitioned
+        # the shard that receives the next record created by hash
+        self._next = 0
+        # key allocations of this process have to happen one at a time
+        self._lock = threading.Lock()
+        # the threads that query the shards concurrently
+        self._pool = None
+
+
+    @classmethod
+    def from_urls(cls, urls, first=None, **kwds):
+        """
+            This method creates a router for the databases at the given urls.
+
+            Args:
+                urls (list of str): The url of each shard.
+                first (peewee.Database): The database already connected to the
+                    first url (so that the first shard shares its connections).
+        """
+        # utility function to parse database urls
+        from playhouse.db_url import connect
+        # connect to each shard
+        databases = [connect(url) for url in urls[1 if first else 0:]]
+        # create the router
+        return cls([first] + databases if first else databases, **kwds)
+
+
+    def shard_for(self, pk):
+        """
+            This method returns the index of the shard that holds the record
+            with the given primary key.
+        """
+        # if we are routing by range
+        if self.strategy == 'range':
+            # the key as a number
+            key = int(pk)
+            # for each shard and its range
+            for index, (start, end) in enumerate(self.ranges):
+                # if the key is part of the range
+                if start <= key and (end is None or key < end):
+                    return index
+            # no shard holds the key
+            raise ValueError("No shard holds the key %s" % pk)
+
+        try:
+            # integer keys are spread evenly by their value
+            key = int(pk)
+        # if the key is not a number
+        except (TypeError, ValueError):
+            # use a hash that doesn't change between processes
+            key = zlib.crc32(str(pk).encode())
+
+        # return the shard
+        return key % len(self.databases)
+
+
+    def database_for(self, pk):
+        """
+            This method returns the shard that holds the record with the given
+            primary key.
+        """
+        return self.databases[self.shard_for(pk)]
+
+
+    def get(self, Model, pk):
+        """
+            This method loads the record with the given primary key from its shard.
+        """
+        # the query for the record
+        query = Model.select().where(Model.primary_key() == pk)
+        # point the query to the shard
+        query.database = self.database_for(pk)
+        # return the record
+        return query.get()
+
+
+    def create(self, Model, values):
+        """
+            This method stores a new record in the appropriate shard, allocating
+            its primary key if it wasn't provided.
+
+            Returns:
+                (nautilus.BaseModel): The new record.
+        """
+        # the name of the primary key
+        pk_name = Model.primary_key().name
+        # use the actual name of the primary key
+        values = {pk_name if key == 'pk' else key: value for key, value in values.items()}
+        # if we are keeping track of the changes to the model
+        if hasattr(Model, 'stamped'):
+            # give the record its version
+            values = Model.stamped(values)
+
+        # make sure no other thread allocates the same key
+        with self._lock:
+            # if the record specifies its key
+            if values.get(pk_name) is not None:
+                # the shard is determined by the key
+                database = self.database_for(values[pk_name])
+                # insert the record
+                with database.atomic():
+                    self._insert(Model, values, database)
+            # otherwise we have to pick a key
+            else:
+                # add the record to the first shard with room for it
+                for index in self._allocation_order():
+                    # the shard to store the record in
+                    database = self.databases[index]
+                    # allocate the key in the transaction of the insert
+                    with database.atomic():
+                        # the next key of the shard
+                        pk = self._allocate(Model, index)
+                        # if the shard is full
+                        if pk is None:
+                            # try the next one
+                            continue
+                        # insert the record with its key
+                        values[pk_name] = pk
+                        self._insert(Model, values, database)
+                        # we're done
+                        break
+                # if every shard is full
+                else:
+                    # yell loudly
+                    raise ValueError("Every shard of %s is full." % Model.__name__)
+
+        # return the new record
+        return self.get(Model, values[pk_name])
+
+
+    def update(self, Model, values):
+        """
+            This method applies the given values (which include the primary
+            key) to the matching record in its shard.
+
+            Returns:
+                (nautilus.BaseModel): The updated record.
+        """
+        # the primary key of the model
+        pk_field = Model.primary_key()
+        # use the actual name of the primary key
+        values = {pk_field.name if key == 'pk' else key: value for key, value in values.items()}
+        # pull out the key of the record
+        pk = values.pop(pk_field.name)
+
+        # make sure the record exists
+        self.get(Model, pk)
+        # if we are keeping track of the changes to the model
+        if hasattr(Model, 'stamped'):
+            # give the record a new version
+            values = Model.stamped(values)
+        # if there is something to change
+        if values:
+            # the query to update the record
+            query = Model.update(**values).where(pk_field == pk)
+            # point the query to the shard
+            query.database = self.database_for(pk)
+            # apply the update
+            query.execute()
+
+        # return the updated record
+        return self.get(Model, pk)
+
+
+    def delete(self, Model, pks):
+        """
+            This method removes the records with the given primary keys from
+            their shards.
+
+            Returns:
+                (int): The number of records that were removed.
+        """
+        # the primary key of the model
+        pk_field = Model.primary_key()
+        # the number of records that were removed
+        removed = 0
+        # if we are keeping track of the changes to the model
+        if hasattr(Model, 'bury'):
+            # leave a tombstone for each record
+            Model.bury(list(pks))
+        # for each shard and the keys it holds
+        for index, shard_pks in self.group_by_shard(pks).items():
+            # the query to remove the records
+            query = Model.delete().where(pk_field.in_(shard_pks))
+            # point the query to the shard
+            query.database = self.databases[index]
+            # remove the records
+            removed += query.execute()
+
+        # return the number of records that were removed
+        return removed
+
+
+    def delete_instance(self, Model, pk):
+        """
+            This method removes the record with the given primary key from its
+            shard.
+
+            Raises:
+                Model.DoesNotExist: If there is no such record.
+        """
+        # make sure the record exists
+        self.get(Model, pk)
+        # remove it
+        self.delete(Model, [pk])
+
+
+    def group_by_shard(self, pks):
+        """
+            This method groups the given primary keys by the index of the shard
+            that holds them.
+        """
+        # the keys of each shard
+        groups = {}
+        # for each key
+        for pk in pks:
+            # add it to the group of its shard
+            groups.setdefault(self.shard_for(pk), []).append(pk)
+        # return the groups
+        return groups
+
+
+    def map(self, function):
+        """
+            This method calls the given function with each shard (on separate
+            threads when the shards can be shared between them) and returns
+            the results in the order of the shards.
+        """
+        # if there is nothing to overlap (or the shards only exist on this thread)
+        if len(self.databases) == 1 or any(_in_memory(database) for database in self.databases):
+            # query the shards one after the other
+            return [function(database) for database in self.databases]
+
+        # if we haven't created the threads yet
+        if self._pool is None:
+            # create one for each shard
+            self._pool = ThreadPoolExecutor(max_workers=len(self.databases))
+        # query every shard at once
+        futures = [self._pool.submit(self._call, function, database) for database in self.databases]
+        # return their results
+        return [future.result() for future in futures]
+
+
+    def create_table(self, Model):
+        """
+            This method creates the table of the model (and its indexes) in
+            every shard.
+        """
+        # avoid circular imports
+        from .indexes import ensure_indexes
+        # for each shard
+        for database in self.databases:
+            # create the table if it doesn't exist
+            database.create_table(Model, safe=True)
+            # along with its indexes
+            ensure_indexes(Model, database=database)
+            # and the counter of its keys
+            database.create_table(ShardKeyCounter, safe=True)
+
+
+    def drop_table(self, Model):
+        """
+            This method drops the table of the model in every shard.
+        """
+        # for each shard
+        for database in self.databases:
+            # drop the table if it exists
+            database.drop_table(Model, fail_silently=True)
+            # if the shard keeps track of the keys of its models
+            if ShardKeyCounter._meta.db_table in database.get_tables():
+                # start the keys of the model over
+                query = ShardKeyCounter.delete().where(ShardKeyCounter.model == Model._meta.db_table)
+                query.database = database
+                query.execute()
+
+
+    def _allocation_order(self):
+        # if we are routing by range
+        if self.strategy == 'range':
+            # fill the shards one after the other
+            return range(len(self.databases))
+        # otherwise spread the new records over the shards in turn
+        index = self._next % len(self.databases)
+        self._next += 1
+        return [index]
+
+
+    def _allocate(self, Model, index):
+        # the table of the model
+        table = Model._meta.db_table
+
+        # lock the counter of the shard until the record is inserted
+        if not self._bump_counter(table, index):
+            try:
+                # if the model doesn't have a counter yet, create it
+                with self.databases[index].atomic():
+                    self._counter_query(ShardKeyCounter.insert(model=table, key=1), index).execute()
+            # if another writer created the counter in the meantime
+            except IntegrityError:
+                # bump theirs
+                self._bump_counter(table, index)
+
+        # the key after the last one allocated
+        pk = self._counter_query(
+            ShardKeyCounter.select(ShardKeyCounter.key).where(ShardKeyCounter.model == table),
+            index
+        ).scalar()
+        # make sure we don't collide with the keys that were given explicitly
+        pk = max(pk, (self._largest_key(Model, index) or 0) + 1)
+
+        # if we are routing by range
+        if self.strategy == 'range':
+            # the range of the shard
+            start, end = self.ranges[index]
+            # the next available key in the range
+            pk = max(pk, start)
+            # if the range has been used up
+            if end is not None and pk >= end:
+                return None
+        # otherwise we are routing by hash
+        else:
+            # move up to the next key that hashes to the shard
+            pk += (index - pk) % len(self.databases)
+
+        # save the key for the next record
+        self._counter_query(
+            ShardKeyCounter.update(key=pk).where(ShardKeyCounter.model == table),
+            index
+        ).execute()
+        # return the key
+        return pk
+
+
+    def _bump_counter(self, table, index):
+        # move the counter of the table past the last key (returns false if there isn't one)
+        return self._counter_query(
+            ShardKeyCounter.update(key=ShardKeyCounter.key + 1).where(ShardKeyCounter.model == table),
+            index
+        ).execute()
+
+
+    def _counter_query(self, query, index):
+        # point the query to the shard
+        query.database = self.databases[index]
+        # return the query
+        return query
+
+
+    def _insert(self, Model, values, database):
+        # the query to insert the record
+        query = Model.insert(**values)
+        # point the query to the shard
+        query.database = database
+        # insert the record
+        query.execute()
+
+
+    def _call(self, function, database):
+        try:
+            # call the function
+            return function(database)
+        # regardless of what happened
+        finally:
+            # return pooled connections that aren't part of a transaction
+            if isinstance(database, PooledDatabase) and not database.is_closed() \
+                    and not database.transaction_depth():
+                database.close()
+
+
+    def _largest_key(self, Model, index):
+        # the query for the largest key in the shard
+        query = Model.select(fn.Max(Model.primary_key()))
+        # point the query to the shard
+        query.database = self.databases[index]
+        # return the value
+        return query.scalar()
+
+
+def _in_memory(database):
+    # wether the database is a sqlite database that only lives in its connection
+    return isinstance(database, SqliteDatabase) and ':memory:' in (database.database or ':memory:')
+
+
+def model_shards(Model):
+    """
+        This function returns the router of the given model if it is sharded
+        or None otherwise.
+    """
+    return getattr(Model._meta, 'shards', None)
@@ -0,0 +1,32 @@
+"""
+    This module defines the settings used to get reasonable performance out
+    of file-backed sqlite databases.
+"""
+
+# the pragmas applied to every connection of a tuned sqlite database
+performance_pragmas = (
+    # readers don't block the writer (and vice versa) and commits only append to the log
+    ('journal_mode', 'wal'),
+    # only sync the log at checkpoints (safe from corruption in wal mode)
+    ('synchronous', 'normal'),
+    # read the database through 256MB of memory mapped io
+    ('mmap_size', 256 * 1024 * 1024),
+    # keep up to 64MB of pages in memory (negative values are in KiB)
+    ('cache_size', -64 * 1024),
+    # wait for up to 5 seconds for a lock instead of failing right away
+    ('busy_timeout', 5000),
+)
+
+def is_file_database(database_class, connect_kwds):
+    """
+        Returns true if the given connection arguments refer to a sqlite
+        database stored in a file.
+    """
+    # avoid a circular import
+    from peewee import SqliteDatabase
+    # the name of the database
+    name = connect_kwds.get('database') or ':memory:'
+    # check if we are dealing with a sqlite file
+    return issubclass(database_class, SqliteDatabase) and \
+                ':memory:' not in name and not name.startswith('file::memory:')
+
@@ -5,3 +5,4 @@ from .base import BaseModel
 from .util import *
 from .serializers import *
 from .fields import *
+from .versioned import Versioned, Tombstone, VersionCounter
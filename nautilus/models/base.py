@@ -2,6 +2,8 @@
 import peewee
 # local imports
 from ..database import db
+from .serializers.recordSerializer import RecordSerializer
+from .validation import PayloadValidator
 
 class _Meta(type):
     """
@@ -20,6 +22,10 @@ class _Meta(type):
 
         # save the name in the class
         self.model_name = name
+        # build the serializer for the records of the model (once its fields are known)
+        self._serializer = RecordSerializer(self)
+        # along with the validator for the values written to them
+        self._validator = PayloadValidator(self)
 
 
 class _MixedMeta(_Meta, peewee.BaseModel):
@@ -35,10 +41,7 @@ class BaseModel(peewee.Model, metaclass=_MixedMeta):
 
     def _json(self):
         # build a dictionary out of just the columns in the table
-        return {
-            field.name: getattr(self, field.name) \
-                for field in type(self).fields()
-        }
+        return type(self)._serializer.values(self)
 
 
     @classmethod
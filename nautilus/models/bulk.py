@@ -0,0 +1,770 @@
+"""
+    This module defines the utilities used to modify many records of a model
+    with as few statements as possible.
+"""
+# external imports
+import json
+import sqlite3
+from peewee import MySQLDatabase, Proxy, SqliteDatabase
+from playhouse.shortcuts import case
+# local imports
+from nautilus.database import model_shards
+from .versioned import is_versioned
+
+# the maximum number of parameters in a single statement (sqlite's limit is the lowest)
+max_query_parameters = 999
+
+# the first version of sqlite that understands `ON CONFLICT ... DO UPDATE`
+sqlite_upsert_version = (3, 24, 0)
+
+
+def chunks(items, size):
+    """
+        This function splits the given list into consecutive lists of at most
+        the given size.
+    """
+    # for each starting point
+    for start in range(0, len(items), size):
+        # yield the corresponding slice
+        yield items[start:start + size]
+
+
+def in_transaction(Model, function, *args, **kwds):
+    """
+        This function calls the given function inside of a transaction on the
+        database of the model.
+    """
+    # if the records of the model are spread over several databases
+    if model_shards(Model):
+        # there is no transaction that covers every shard
+        return function(*args, **kwds)
+
+    # open a transaction
+    with Model._meta.database.atomic():
+        # call the function
+        return function(*args, **kwds)
+
+
+def validate_records(Model, records, require_pk=False, check_required=True):
+    """
+        This function checks every record of a batch before any of them are
+        written so that a bad batch fails as a whole (see
+        `nautilus.models.validation.PayloadValidator`).
+
+        Args:
+            Model (nautilus.BaseModel): The model the records belong to.
+            records (list of dict): The records to check.
+            require_pk (bool): Wether each record has to specify its primary key.
+            check_required (bool): Wether the records have to specify a value
+                for every required field.
+
+        Returns:
+            (list of dict): The records with their values coerced to the types
+                of their fields.
+
+        Raises:
+            ValueError: If any record is invalid (listing every problem).
+    """
+    # the coerced records
+    validated = []
+    # the problems we found
+    errors = []
+    # for each record in the batch
+    for index, record in enumerate(records):
+        # check the record
+        values, record_errors = Model._validator.check(
+            record,
+            partial=not check_required,
+            require_pk=require_pk
+        )
+        # keep track of the results
+        validated.append(values)
+        errors.extend("Record %s %s" % (index, error) for error in record_errors)
+
+    # if something was wrong
+    if errors:
+        # yell loudly
+        raise ValueError('; '.join(errors))
+
+    # return the coerced records
+    return validated
+
+
+def insert_records(Model, records, chunk_size=100):
+    """
+        This function inserts the given records with multi-row inserts and
+        returns their primary keys. It should be called inside of a transaction.
+
+        Args:
+            Model (nautilus.BaseModel): The model to create.
+            records (list of dict): The values of each new record.
+            chunk_size (int): The maximum number of rows to insert at once.
+
+        Returns:
+            (list): The primary key of each record, in order.
+    """
+    # the shards of the model
+    shards = model_shards(Model)
+    # if the model is sharded
+    if shards:
+        # store each record in the appropriate shard
+        return [getattr(shards.create(Model, record), Model.primary_key().name) \
+                    for record in records]
+
+    # if we are keeping track of the changes to the model
+    if is_versioned(Model):
+        # give each record its version
+        records = Model.stamped_many(records)
+
+    # the database of the model
+    database = _database_for(Model)
+    # the primary key of the model
+    pk_field = Model.primary_key()
+
+    # the rows to insert (with the primary key under its real name)
+    rows = [_resolve_pk(Model, record) for record in records]
+    # the primary keys of the records
+    pks = [None] * len(rows)
+
+    # if the database cannot tell us which keys a multi-row insert produced
+    if not database.returning_clause and not isinstance(database, SqliteDatabase):
+        # insert each row on its own (still within the caller's transaction)
+        for index, row in enumerate(rows):
+            pks[index] = Model.insert(**row).execute()
+        # we're done
+        return pks
+
+    # for each group of rows that share the same columns
+    for columns, group in _group_by_columns(rows):
+        # for each chunk of rows that fits in a statement
+        for chunk in chunks(group, _rows_per_statement(columns, chunk_size)):
+            # the query to insert the chunk
+            query = Model.insert_many([row for _, row in chunk])
+
+            # if the database can return the inserted keys
+            if database.returning_clause:
+                # execute the query and read the keys back
+                cursor = database.execute_sql(*query.returning(pk_field).sql())
+                # the keys of the chunk
+                chunk_pks = [pk_field.python_value(row[0]) for row in cursor.fetchall()]
+
+            # otherwise if the rows specify their own keys
+            elif pk_field.name in columns:
+                # insert the chunk
+                query.execute()
+                # we already know the keys
+                chunk_pks = [row[pk_field.name] for _, row in chunk]
+
+            # otherwise we're dealing with sqlite which assigns consecutive rowids
+            else:
+                # insert the chunk
+                cursor = database.execute_sql(*query.sql())
+                # the key of the last row in the chunk
+                last_id = cursor.lastrowid
+                # the keys of the chunk
+                chunk_pks = list(range(last_id - len(chunk) + 1, last_id + 1))
+
+            # for each row of the chunk and its key
+            for (index, _), pk in zip(chunk, chunk_pks):
+                # save the key in the right spot
+                pks[index] = pk
+
+    # return the keys of the records
+    return pks
+
+
+def update_records(Model, changes, chunk_size=100):
+    """
+        This function applies the given changes with as few statements as
+        possible: records receiving the same values are updated together with
+        `UPDATE ... WHERE pk IN (...)`. It should be called inside of a transaction.
+
+        Args:
+            Model (nautilus.BaseModel): The model to update.
+            changes (list of dict): The new values of each record along with
+                its primary key.
+            chunk_size (int): The maximum number of keys in a single statement.
+
+        Returns:
+            (list): The primary keys of the updated records.
+    """
+    # the primary key of the model
+    pk_field = Model.primary_key()
+
+    # the shards of the model
+    shards = model_shards(Model)
+    # if the model is sharded
+    if shards:
+        # update each record in its shard
+        return [getattr(shards.update(Model, change), pk_field.name) for change in changes]
+
+    # group the records receiving the same values
+    groups = {}
+    # for each change to apply
+    for change in changes:
+        # use the actual name of the primary key
+        values = _resolve_pk(Model, change)
+        # pull out the key of the record
+        pk = values.pop(pk_field.name)
+        # add the key to the group of records with the same values
+        groups.setdefault(json.dumps(values, sort_keys=True, default=str), (values, []))[1].append(pk)
+
+    # the keys of the updated records
+    pks = []
+    # for each group of changes
+    for values, group_pks in groups.values():
+        # for each chunk of keys
+        for chunk in chunks(group_pks, chunk_size):
+            # the values to write
+            chunk_values = values
+            # if we are keeping track of the changes to the model
+            if is_versioned(Model):
+                # each record gets its own version (so the changes can be paged through by version)
+                stamps = Model.stamped_many([{} for _ in chunk])
+                chunk_values = dict(
+                    values,
+                    updated_at=stamps[0]['updated_at'],
+                    version=case(pk_field, [
+                        (pk_field.db_value(pk), stamp['version']) for pk, stamp in zip(chunk, stamps)
+                    ])
+                )
+            # if there is something to change
+            if chunk_values:
+                # update the chunk of records at once
+                Model.update(**chunk_values).where(pk_field.in_(chunk)).execute()
+            # add the keys to the list
+            pks.extend(chunk)
+
+    # return the keys of the updated records
+    return pks
+
+
+def upsert_records(Model, records, chunk_size=100):
+    """
+        This function creates the given records or updates the ones that
+        already exist with a single `INSERT ... ON CONFLICT DO UPDATE` per
+        chunk (`ON DUPLICATE KEY UPDATE` for mysql). Each record is identified
+        by its primary key or, failing that, by the first unique field it
+        specifies. It should be called inside of a transaction.
+
+        Sqlite databases have to be at least version 3.24. Since mysql updates
+        the record matching any of the unique keys of the table, models with
+        more than one unique key can't be upserted on mysql.
+
+        Args:
+            Model (nautilus.BaseModel): The model to upsert.
+            records (list of dict): The values of each record.
+            chunk_size (int): The maximum number of rows written per statement.
+
+        Returns:
+            (list): The primary key of each record, in order.
+
+        Raises:
+            ValueError: If a record specifies neither its primary key nor a
+                unique field or the database can't upsert the records.
+    """
+    # if we are keeping track of the changes to the model
+    if is_versioned(Model):
+        # give each record its version (whether it ends up created or updated)
+        records = Model.stamped_many(records)
+
+    # the rows to write (with the primary key under its real name)
+    rows = [_resolve_pk(Model, record) for record in records]
+    # the primary keys of the records
+    pks = [None] * len(rows)
+
+    # for each group of rows that share the same columns
+    for columns, group in _group_by_columns(rows):
+        # the field that identifies the records of the group
+        target = _upsert_target(Model, columns)
+        # the databases holding the rows of the group
+        for database, database_group in _upsert_databases(Model, target, group):
+            # the last values given for each record (a statement can't change a row twice)
+            latest = {}
+            for _, row in database_group:
+                latest[_comparable(target, row[target.name])] = row
+            # the key of each record by the value that identifies it
+            keys = {}
+            # for each chunk of records that fits in a statement
+            for chunk in chunks(list(latest.values()), _rows_per_statement(columns, chunk_size)):
+                keys.update(_upsert_chunk(Model, database, target, chunk))
+            # for each row of the group
+            for index, row in database_group:
+                # save its key in the right spot
+                pks[index] = keys[_comparable(target, row[target.name])]
+
+    # return the keys of the records
+    return pks
+
+
+def delete_records(Model, pks, chunk_size=100):
+    """
+        This function removes the records with the given primary keys using
+        `DELETE ... WHERE pk IN (...)`. It should be called inside of a transaction.
+
+        Returns:
+            (int): The number of records that were removed.
+    """
+    # the shards of the model
+    shards = model_shards(Model)
+    # if the model is sharded
+    if shards:
+        # remove the records from their shards
+        return shards.delete(Model, pks)
+
+    # if we are keeping track of the changes to the model
+    if is_versioned(Model):
+        # leave a tombstone for each record
+        Model.bury(list(pks))
+
+    # the primary key of the model
+    pk_field = Model.primary_key()
+    # the number of records we removed
+    removed = 0
+
+    # for each chunk of keys
+    for chunk in chunks(list(pks), chunk_size):
+        # remove the chunk of records at once
+        removed += Model.delete().where(pk_field.in_(chunk)).execute()
+
+    # return the number of records we removed
+    return removed
+
+
+def delete_matching(Model, condition, chunk_size=1000):
+    """
+        This function removes the records of the model that satisfy the given
+        condition. Databases that support `DELETE ... RETURNING` remove every
+        record with a single statement, otherwise at most `chunk_size` records
+        are removed so callers should keep calling until nothing is returned.
+
+        Returns:
+            (list): The primary keys of the removed records.
+    """
+    # the database of the model
+    database = _database_for(Model)
+    # the primary key of the model
+    pk_field = Model.primary_key()
+
+    # if the database can tell us which records it removed
+    if database.returning_clause:
+        # remove the records and read back their keys
+        cursor = database.execute_sql(
+            *Model.delete().where(condition).returning(pk_field).sql()
+        )
+        # return the keys
+        return [pk_field.python_value(row[0]) for row in cursor.fetchall()]
+
+    # the keys of the next chunk of matching records
+    pks = [pk for pk, in Model.select(pk_field).where(condition).limit(chunk_size).tuples()]
+    # if there are any
+    if pks:
+        # remove them
+        Model.delete().where(pk_field.in_(pks)).execute()
+    # return the keys
+    return pks
+
+
+def link_records(Model, records, chunk_size=100):
+    """
+        This function creates the given connections unless they already
+        exist. It should be called inside of a transaction.
+
+        Args:
+            Model (nautilus.BaseModel): The connection model.
+            records (list of dict): The values of each connection.
+
+        Returns:
+            (list): The primary keys of the new connections.
+    """
+    # the connections that don't exist yet (ignoring duplicates in the batch)
+    missing = {}
+    # the existing connections
+    existing = set(_connection_keys(Model, records, chunk_size))
+    # for each connection
+    for record in records:
+        # the values that identify the connection
+        key = _connection_key(Model, record)
+        # if we haven't seen the connection
+        if key not in existing and key not in missing:
+            # we have to create it
+            missing[key] = record
+
+    # create the missing connections
+    return insert_records(Model, list(missing.values()), chunk_size=chunk_size)
+
+
+def unlink_records(Model, records, chunk_size=100):
+    """
+        This function removes the given connections. It should be called
+        inside of a transaction.
+
+        Returns:
+            (list): The primary keys of the removed connections.
+    """
+    # the keys of the matching connections
+    pks = list(_connection_keys(Model, records, chunk_size).values())
+    # remove them
+    delete_records(Model, pks, chunk_size=chunk_size)
+    # return the keys
+    return pks
+
+
+def select_records(Model, pks, chunk_size=100):
+    """
+        This function loads the records with the given primary keys, a chunk
+        at a time.
+
+        Returns:
+            (list of nautilus.BaseModel): The matching records.
+    """
+    # the primary key of the model
+    pk_field = Model.primary_key()
+    # the records we found
+    records = []
+
+    # the shards of the model
+    shards = model_shards(Model)
+    # the keys held by each database
+    groups = shards.group_by_shard(pks).items() if shards else [(None, list(pks))]
+
+    # for each database and the keys it holds
+    for index, group in groups:
+        # for each chunk of keys
+        for chunk in chunks(group, chunk_size):
+            # the query for the chunk of records
+            query = Model.select().where(pk_field.in_(chunk))
+            # if the records are in a shard
+            if shards:
+                # point the query to the shard
+                query.database = shards.databases[index]
+            # load the chunk of records
+            records.extend(query)
+
+    # return the records
+    return records
+
+
+def traverse_connections(hops, ids, chunk_size=100):
+    """
+        This function follows a chain of connections from the given ids and
+        returns every path through it. When the connections share a database,
+        the whole chain is resolved with a single join (per chunk of ids).
+        Otherwise each connection is looked up in turn with `IN` queries.
+
+        Args:
+            hops (list of tuples): The connection model along with the names
+                of the fields to walk from and to for each step of the chain.
+            ids (list): The ids to start from.
+            chunk_size (int): The maximum number of ids in a single statement.
+
+        Returns:
+            (list of tuples): The ids along each path (as strings, since that's
+                how connections store them) starting with one of the given ids.
+    """
+    # the ids to start from (without duplicates)
+    ids = _unique([str(pk) for pk in ids])
+    # the databases holding the connections
+    databases = {_database_for(Model) for Model, _, _ in hops}
+
+    # if the connections live side by side
+    if len(databases) == 1 and not any(model_shards(Model) for Model, _, _ in hops):
+        # resolve the chain in the database
+        return _join_connections(hops, ids, chunk_size)
+
+    # start with a path for each id
+    paths = [(pk,) for pk in ids]
+    # for each connection in the chain
+    for hop in hops:
+        # the records connected to the end of the current paths
+        edges = _connection_edges(hop, _unique([path[-1] for path in paths]), chunk_size)
+        # extend the paths through the connection
+        paths = [path + (target,) for path in paths for target in edges.get(path[-1], [])]
+
+    # return the complete paths
+    return paths
+
+
+def _database_for(Model):
+    # the database of the model
+    database = Model._meta.database
+    # unwrap the placeholder if there is one
+    return database.obj if isinstance(database, Proxy) else database
+
+
+def _connection_columns(Model):
+    # the fields that identify a connection (every field but the primary key)
+    return [field for field in Model._meta.sorted_fields if field is not Model.primary_key()]
+
+
+def _connection_key(Model, record):
+    # the values of the connection as strings (the columns hold strings)
+    return tuple(str(record[field.name]) for field in _connection_columns(Model))
+
+
+def _connection_keys(Model, records, chunk_size):
+    """
+        This function finds the existing connections matching the given
+        records.
+
+        Returns:
+            (dict): The primary key of each existing connection keyed by the
+                values that identify it.
+    """
+    # the fields that identify a connection
+    columns = _connection_columns(Model)
+    # the primary key of the model
+    pk_field = Model.primary_key()
+    # the connections we found
+    found = {}
+
+    # for each chunk of records
+    for chunk in chunks(records, chunk_size):
+        # the connections with any of the values on the first side
+        query = Model.select(pk_field, *columns).where(
+            columns[0].in_([record[columns[0].name] for record in chunk])
+        )
+        # the connections we are looking for
+        keys = {_connection_key(Model, record) for record in chunk}
+        # for each candidate
+        for row in query.tuples():
+            # the values that identify the candidate
+            key = tuple(str(value) for value in row[1:])
+            # if it's one of the connections we want
+            if key in keys:
+                # keep track of it
+                found[key] = row[0]
+
+    # return the connections we found
+    return found
+
+
+def _resolve_pk(Model, record):
+    # the name of the primary key
+    pk_name = Model.primary_key().name
+    # copy the record with the pk alias replaced by the actual name
+    return {pk_name if key == 'pk' else key: value for key, value in record.items()}
+
+
+def _upsert_target(Model, columns):
+    """
+        This function returns the field that identifies the records being
+        upserted with the given columns.
+    """
+    # the primary key of the model
+    pk_field = Model.primary_key()
+    # if the records specify their key
+    if pk_field.name in columns:
+        return pk_field
+
+    # the fields with a unique index of their own
+    unique = {fields[0] for fields, is_unique in Model._meta.indexes \
+                if is_unique and len(fields) == 1}
+    # for each field of the model
+    for field in Model._meta.sorted_fields:
+        # if the field is unique and specified by the records
+        if field.name in columns and (field.unique or field.name in unique):
+            return field
+
+    # we can't tell which records to update
+    raise ValueError(
+        "Upserted %s records must specify their pk or a unique field." % Model.__name__
+    )
+
+
+def _upsert_databases(Model, target, group):
+    # the shards of the model
+    shards = model_shards(Model)
+    # if the model isn't sharded
+    if not shards:
+        # every row goes to the same database
+        return [(_database_for(Model), group)]
+    # only the primary key tells us which shard holds a record
+    if not target.primary_key:
+        raise ValueError(
+            "Upserted %s records must specify their pk (the model is sharded)." % Model.__name__
+        )
+    # the rows held by each shard
+    groups = {}
+    for index, row in group:
+        groups.setdefault(shards.shard_for(row[target.name]), []).append((index, row))
+    # return the rows along with their shard
+    return [(shards.databases[shard], shard_rows) for shard, shard_rows in groups.items()]
+
+
+def _upsert_chunk(Model, database, target, rows):
+    """
+        This function writes the given rows with a single statement.
+
+        Returns:
+            (dict): The primary key of each row keyed by the value that
+                identifies it.
+    """
+    # make sure the database will update the records we mean
+    _check_upsert_support(Model, database, target)
+
+    # the primary key of the model
+    pk_field = Model.primary_key()
+    # the query to insert the rows
+    query = Model.insert_many(rows)
+    # point it to the right database
+    query.database = database
+    # the statement to insert the rows
+    sql, params = query.sql()
+
+    # the function that quotes a column
+    quote = database.compiler().quote
+    # the columns to overwrite when the record exists (at least one so the row is reported)
+    updated = [Model._meta.fields[name].db_column for name in sorted(rows[0].keys()) \
+                    if name != target.name] or [target.db_column]
+
+    # if we are dealing with mysql
+    if isinstance(database, MySQLDatabase):
+        # update the existing records with the given values
+        sql += ' ON DUPLICATE KEY UPDATE %s' % ', '.join(
+            '%s = VALUES(%s)' % (quote(column), quote(column)) for column in updated
+        )
+    # otherwise the database understands ON CONFLICT (postgres and sqlite 3.24+)
+    else:
+        sql += ' ON CONFLICT (%s) DO UPDATE SET %s' % (
+            quote(target.db_column),
+            ', '.join('%s = excluded.%s' % (quote(column), quote(column)) for column in updated)
+        )
+
+    # if the database can tell us which records it wrote
+    if database.returning_clause:
+        # write the records and read back their keys
+        sql += ' RETURNING %s, %s' % (quote(pk_field.db_column), quote(target.db_column))
+        found = database.execute_sql(sql, params).fetchall()
+    # otherwise
+    else:
+        # write the records
+        database.execute_sql(sql, params)
+        # and look up their keys
+        lookup = Model.select(pk_field, target).where(
+            target.in_([row[target.name] for row in rows])
+        ).tuples()
+        lookup.database = database
+        found = list(lookup)
+
+    # return the key of each record
+    return {
+        _comparable(target, target.python_value(value)): pk_field.python_value(pk) \
+            for pk, value in found
+    }
+
+
+def _check_upsert_support(Model, database, target):
+    """
+        This function makes sure the given database can upsert the records of
+        the model identified by the target field.
+
+        Raises:
+            ValueError: If it can't.
+    """
+    # if we are dealing with a version of sqlite that doesn't know about upserts
+    if isinstance(database, SqliteDatabase) and sqlite3.sqlite_version_info < sqlite_upsert_version:
+        # yell loudly
+        raise ValueError("Upserts require sqlite %s or later (found %s)." % (
+            '.'.join(str(part) for part in sqlite_upsert_version),
+            sqlite3.sqlite_version
+        ))
+
+    # if we are dealing with mysql
+    if isinstance(database, MySQLDatabase):
+        # the unique keys of the table besides the target (and the generated primary key)
+        others = {(field.name,) for field in Model._meta.sorted_fields if field.unique} | \
+                    {tuple(fields) for fields, is_unique in Model._meta.indexes if is_unique}
+        others -= {(target.name,), (Model.primary_key().name,)}
+        # if a conflict on one of them would update a record too
+        if others:
+            # yell loudly
+            raise ValueError(
+                "Upserted %s records can't be matched by %s on mysql since conflicts on %s would update records too." % (
+                    Model.__name__,
+                    target.name,
+                    ', '.join('/'.join(fields) for fields in sorted(others))
+                )
+            )
+
+
+def _comparable(field, value):
+    # the value as it comes back from the database (so given and stored values match)
+    return field.python_value(field.db_value(value))
+
+
+def _group_by_columns(rows):
+    # the (index, row) pairs for each set of columns (multi-row inserts need the same columns)
+    groups = {}
+    # for each row
+    for index, row in enumerate(rows):
+        # add the row to the group for its columns
+        groups.setdefault(tuple(sorted(row.keys())), []).append((index, row))
+    # return the groups
+    return groups.items()
+
+
+def _rows_per_statement(columns, chunk_size):
+    # make sure the statement stays under the parameter limit
+    return max(1, min(chunk_size, max_query_parameters // max(1, len(columns))))
+
+
+def _unique(items):
+    # the items without duplicates (in order)
+    seen = set()
+    return [item for item in items if not (item in seen or seen.add(item))]
+
+
+def _join_connections(hops, ids, chunk_size):
+    # a separate reference to each connection (the same one could appear twice)
+    aliases = [Model.alias() for Model, _, _ in hops]
+    # the ids along each path
+    columns = [getattr(aliases[0], hops[0][1])] + \
+                [getattr(alias, target) for alias, (_, _, target) in zip(aliases, hops)]
+
+    # the paths we found
+    paths = []
+    # for each chunk of ids
+    for chunk in chunks(ids, chunk_size):
+        # start with the first connection
+        query = aliases[0].select(*columns).where(columns[0].in_(chunk))
+        # for each connection after the first
+        for index in range(1, len(hops)):
+            # join it to the end of the previous connection
+            query = query.join(
+                aliases[index],
+                on=(getattr(aliases[index], hops[index][1]) == getattr(aliases[index - 1], hops[index - 1][2]))
+            )
+        # add the paths of the chunk
+        paths.extend(tuple(str(value) for value in row) for row in query.distinct().tuples())
+
+    # return the paths
+    return paths
+
+
+def _connection_edges(hop, ids, chunk_size):
+    # the connection along with the fields to walk from and to
+    Model, source, target = hop
+    # the shards of the connection
+    shards = model_shards(Model)
+    # the records connected to each id
+    edges = {}
+
+    # for each database holding connections
+    for database in (shards.databases if shards else [None]):
+        # for each chunk of ids
+        for chunk in chunks(ids, chunk_size):
+            # the query for the connections of the chunk
+            query = Model.select(getattr(Model, source), getattr(Model, target)) \
+                         .where(getattr(Model, source).in_(chunk)).distinct()
+            # if the connections are in a shard
+            if database:
+                # point the query to the shard
+                query.database = database
+            # for each connection
+            for from_id, to_id in query.tuples():
+                # add it to the list
+                edges.setdefault(str(from_id), []).append(str(to_id))
+
+    # return the connected records
+    return edges
@@ -1 +1,2 @@
 from .modelSerializer import ModelSerializer
+from .recordSerializer import RecordSerializer
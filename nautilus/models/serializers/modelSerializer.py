@@ -6,6 +6,13 @@ class ModelSerializer(JSONEncoder):
     """
 
     def default(self, obj):
+        # the serializer built for the model of the object
+        serializer = getattr(type(obj), '_serializer', None)
+        # if the object is a record of a nautilus model
+        if serializer is not None:
+            # use the model's serializer
+            return serializer.values(obj)
+
         try:
             # use the custom json handler
             return obj._json()
@@ -18,5 +25,45 @@ class ModelSerializer(JSONEncoder):
     def serialize(self, obj):
         """
             This function performs the serialization on the given object.
+            Records and lists of records of a single model are encoded
+            directly by the model's serializer.
         """
+        # the serializer for the object (if it's a record or list of records of one model)
+        serializer = _serializer_for(obj)
+        # if there is one
+        if serializer is not None:
+            # use it
+            return serializer.serialize_many(obj) if isinstance(obj, list) \
+                        else serializer.serialize(obj)
+        # otherwise encode the object normally
         return self.encode(obj)
+
+
+    def serialize_delta(self, model, fields):
+        """
+            This function serializes the given fields of the model along with
+            its primary key (and version if it has one), marking the result as
+            a delta (see `nautilus.conventions.actions.is_delta`).
+        """
+        # avoid circular imports
+        from nautilus.conventions.actions import delta_marker
+        # the model of the record
+        Model = type(model)
+        # the fields to include
+        included = set(fields) | {Model.primary_key().name, 'version'}
+        # serialize the delta
+        return self.encode(dict(
+            Model._serializer.values(model, included),
+            **{delta_marker: True}
+        ))
+
+
+def _serializer_for(obj):
+    # if we were given a list
+    if isinstance(obj, list):
+        # the types of the items
+        types = {type(item) for item in obj}
+        # only lists of records of a single model can be encoded directly
+        return getattr(types.pop(), '_serializer', None) if len(types) == 1 else None
+    # otherwise use the serializer of the object's model (if there is one)
+    return getattr(type(obj), '_serializer', None)
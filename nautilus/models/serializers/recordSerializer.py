@@ -0,0 +1,141 @@
+# external imports
+import datetime
+import decimal
+import json
+import uuid
+import peewee
+
+
+class RecordSerializer:
+    """
+        This class serializes the records of a single model. It is built once
+        per model (see `nautilus.models.BaseModel`) with the fixed list of the
+        model's fields and the function that converts the values of each one
+        to json: dates and times become strings (see `serialize_temporal`),
+        decimals become floats (like the graphql schema exposes them) and uuids
+        become strings. A
+        function that builds the values of a record without looping over its
+        fields is generated for every projection that's used. Values are read
+        straight from the record's data so foreign keys are serialized as the
+        key of the related record.
+
+        Args:
+            Model (nautilus.BaseModel): The model to serialize.
+    """
+
+    def __init__(self, Model):
+        # the (name, converter) pair of each field of the model
+        self.fields = tuple(
+            (field.name, _converter_for_field(field)) for field in Model._meta.sorted_fields
+        )
+        # the function that converts the values of a record for each projection
+        self._converters = {None: _compile(self.fields)}
+
+
+    def values(self, record, fields=None):
+        """
+            This method returns the json-ready values of the record.
+
+            Args:
+                record (nautilus.BaseModel): The record to serialize.
+                fields (iterable of str): The fields to include (all of them
+                    if not provided). Unknown fields are ignored.
+
+            Returns:
+                (dict): The values of the record.
+        """
+        return self._converter(fields)(record._data)
+
+
+    def serialize(self, record, fields=None):
+        """
+            This method returns the json encoding of the record.
+        """
+        return json.dumps(self.values(record, fields))
+
+
+    def serialize_many(self, records, fields=None):
+        """
+            This method returns the json encoding of a list of records.
+        """
+        # the function that converts the values of each record
+        convert = self._converter(fields)
+        # encode the records
+        return json.dumps([convert(record._data) for record in records])
+
+
+    def _converter(self, fields):
+        # the key of the projection
+        key = None if fields is None else frozenset(fields)
+        # if we haven't seen the projection before
+        if key not in self._converters:
+            # compile a function for the fields (in the order of the model)
+            self._converters[key] = _compile(
+                [(name, convert) for name, convert in self.fields if name in key]
+            )
+        # return the function
+        return self._converters[key]
+
+
+def _compile(fields):
+    """
+        This function generates the function that returns the converted values
+        of the given (name, converter) pairs out of the data of a record.
+    """
+    # the converters referenced by the function
+    namespace = {}
+    # the expression for each value
+    values = []
+    # for each field
+    for index, (name, convert) in enumerate(fields):
+        # the expression that reads the raw value
+        value = 'get(%r)' % name
+        # if the value needs to be converted
+        if convert is not None:
+            # pass it through the converter
+            namespace['convert_%s' % index] = convert
+            value = 'convert_%s(%s)' % (index, value)
+        # add the entry to the dictionary
+        values.append('%r: %s' % (name, value))
+
+    # define the function
+    exec(
+        'def convert(data):\n    get = data.get\n    return {%s}' % ', '.join(values),
+        namespace
+    )
+    # return it
+    return namespace['convert']
+
+
+def serialize_temporal(value):
+    """
+        This function returns the string for the given date or time used by
+        every path that exposes records (events, structured reads and the
+        graphql schema) so the same record always has the same value. Other
+        values (like None) are left alone.
+    """
+    return str(value) if isinstance(value, (datetime.date, datetime.time)) else value
+
+
+def _to_float(value):
+    # decimals are exposed as numbers
+    return float(value) if isinstance(value, decimal.Decimal) else value
+
+
+def _to_string(value):
+    # uuids are exposed as strings
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def _converter_for_field(field):
+    # if the field holds a date or a time
+    if isinstance(field, (peewee.DateField, peewee.DateTimeField, peewee.TimeField)):
+        return serialize_temporal
+    # if the field holds a decimal
+    if isinstance(field, peewee.DecimalField):
+        return _to_float
+    # if the field holds a uuid
+    if isinstance(field, peewee.UUIDField):
+        return _to_string
+    # every other value can be encoded as it is
+    return None
@@ -9,8 +9,12 @@ def create_connection_model(service):
 
     # the mixins / base for the model
     bases = (BaseModel,)
-    # the fields of the derived
-    attributes = {model_service_name(service): fields.CharField() for service in services}
+    # the names of the connected services (in order)
+    names = [model_service_name(service) for service in services]
+    # the fields of the derived (indexed since connections are looked up by either side)
+    attributes = {name: fields.CharField(index=True) for name in names}
+    # look up the connections between two specific records with a single index
+    attributes['Meta'] = type('Meta', (), {'indexes': ((tuple(names), False),)})
 
     # create an instance of base model with the right attributes
     return type(BaseModel)(connection_service_name(service), bases, attributes)
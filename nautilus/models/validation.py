@@ -0,0 +1,229 @@
+"""
+    This module defines the validator used to check the payloads of the
+    actions that write the records of a model.
+"""
+# external imports
+import datetime
+import decimal
+import uuid
+import peewee
+
+
+class PayloadValidator:
+    """
+        This class checks the values given for the records of a single model
+        before they are written. It is built once per model (see
+        `nautilus.models.BaseModel`) from the same field metadata used to
+        summarize the model's mutations (the type of each field and wether
+        it can be null). Values are coerced to the type of their field where
+        that's unambiguous (ie, "1" for an integer field) and every problem
+        with a payload is reported at once.
+
+        Args:
+            Model (nautilus.BaseModel): The model to validate.
+    """
+
+    def __init__(self, Model):
+        # the name of the primary key
+        self.pk_name = Model.primary_key().name
+        # the (coercion, nullable) pair of each field
+        self.fields = {
+            name: (_coercion_for_field(field), field.null) \
+                for name, field in Model._meta.fields.items()
+        }
+        # the fields a new record has to provide (the ones that can't be null
+        # and don't have a default value)
+        self.required = tuple(
+            field.name for field in Model._meta.sorted_fields \
+                if not field.null and field.default is None and field.name != self.pk_name
+        )
+
+
+    def check(self, payload, partial=False, require_pk=False):
+        """
+            This method checks the given values.
+
+            Args:
+                payload (dict): The values to check.
+                partial (bool): Wether the values only change some of the
+                    fields of an existing record (so required fields can be
+                    left out).
+                require_pk (bool): Wether the values have to designate the
+                    record with its primary key.
+
+            Returns:
+                (dict, list of str): The coerced values (with `pk` replaced by
+                    the name of the primary key) and the problems that were found.
+        """
+        # if the payload isn't a dictionary
+        if not isinstance(payload, dict):
+            # we can't check anything else
+            return {}, ["is not an object"]
+
+        # the coerced values
+        values = {}
+        # the problems we found
+        errors = []
+
+        # for each value
+        for key, value in payload.items():
+            # the field the value belongs to
+            name = self.pk_name if key == 'pk' else key
+            # if there is no such field
+            if name not in self.fields:
+                errors.append("has unknown field: %s" % key)
+                continue
+
+            # the way to check the value
+            coerce, nullable = self.fields[name]
+            # if the value is empty
+            if value is None:
+                # make sure that's allowed
+                if not nullable and name != self.pk_name:
+                    errors.append("cannot set %s to null" % key)
+                values[name] = None
+                continue
+
+            try:
+                # convert the value to the type of the field
+                values[name] = coerce(value)
+            # if the value doesn't fit the field
+            except (TypeError, ValueError, ArithmeticError) as err:
+                errors.append("has an invalid value for %s (%s)" % (key, err))
+
+        # if the record has to be identified and isn't
+        if require_pk and self.pk_name not in values:
+            errors.append("does not specify its pk")
+
+        # if we are creating a record
+        if not partial:
+            # for each required field that is missing
+            for name in self.required:
+                if name not in payload:
+                    errors.append("is missing required field: %s" % name)
+
+        # return the values along with the problems
+        return values, errors
+
+
+    def validate(self, payload, partial=False, require_pk=False):
+        """
+            This method checks the given values (see `check`).
+
+            Returns:
+                (dict): The coerced values.
+
+            Raises:
+                ValueError: If the payload is invalid (listing every problem).
+        """
+        # check the payload
+        values, errors = self.check(payload, partial=partial, require_pk=require_pk)
+        # if something was wrong
+        if errors:
+            # yell loudly
+            raise ValueError('; '.join("Payload %s" % error for error in errors))
+        # return the coerced values
+        return values
+
+
+def _to_int(value):
+    # booleans are technically integers but don't belong in integer fields
+    if isinstance(value, bool):
+        raise TypeError("expected an integer")
+    # integers are already fine
+    if isinstance(value, int):
+        return value
+    # floats are fine as long as they are whole
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError("expected an integer")
+        return int(value)
+    # strings have to spell out an integer
+    if isinstance(value, str):
+        return int(value)
+    # nothing else will do
+    raise TypeError("expected an integer")
+
+
+def _to_float(value):
+    # booleans don't belong in numeric fields
+    if isinstance(value, bool) or not isinstance(value, (int, float, str, decimal.Decimal)):
+        raise TypeError("expected a number")
+    return float(value)
+
+
+def _to_decimal(value):
+    # booleans don't belong in numeric fields
+    if isinstance(value, bool) or not isinstance(value, (int, float, str, decimal.Decimal)):
+        raise TypeError("expected a number")
+    # go through the string form so floats don't pick up extra digits
+    return decimal.Decimal(str(value))
+
+
+def _to_bool(value):
+    # booleans are already fine
+    if isinstance(value, bool):
+        return value
+    # so are their usual spellings
+    if isinstance(value, str) and value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    # nothing else will do
+    raise TypeError("expected a boolean")
+
+
+def _to_string(value):
+    # strings are already fine
+    if isinstance(value, str):
+        return value
+    # numbers can be written out
+    if isinstance(value, (int, float, decimal.Decimal)) and not isinstance(value, bool):
+        return str(value)
+    # nothing else will do
+    raise TypeError("expected a string")
+
+
+def _to_uuid(value):
+    # uuids are already fine
+    if isinstance(value, uuid.UUID):
+        return value
+    # strings have to spell one out
+    if isinstance(value, str):
+        return uuid.UUID(value)
+    # nothing else will do
+    raise TypeError("expected a uuid")
+
+
+def _to_temporal(value):
+    # dates and times can be given as objects or strings (parsed by the field)
+    if isinstance(value, (str, datetime.date, datetime.time)):
+        return value
+    # nothing else will do
+    raise TypeError("expected a date or time")
+
+
+def _unchanged(value):
+    # the field checks the value itself
+    return value
+
+
+def _coercion_for_field(field):
+    # the coercion of each kind of field (the more specific ones first)
+    for field_class, coercion in (
+            (peewee.PrimaryKeyField, _unchanged),
+            (peewee.ForeignKeyField, _unchanged),
+            (peewee.BooleanField, _to_bool),
+            (peewee.IntegerField, _to_int),
+            (peewee.DecimalField, _to_decimal),
+            (peewee.FloatField, _to_float),
+            (peewee.UUIDField, _to_uuid),
+            (peewee.DateTimeField, _to_temporal),
+            (peewee.DateField, _to_temporal),
+            (peewee.TimeField, _to_temporal),
+            (peewee.CharField, _to_string),
+            (peewee.TextField, _to_string),
+    ):
+        # if the field is of the kind
+        if isinstance(field, field_class):
+            return coercion
+    # leave other kinds of fields alone
+    return _unchanged
@@ -0,0 +1,254 @@
+"""
+    This module defines the mixin used to keep track of the changes made to
+    the records of a model so that they can be synced incrementally.
+"""
+# external imports
+import datetime
+from peewee import fn, IntegrityError
+# local imports
+from nautilus.database import model_shards
+from .base import BaseModel
+from .fields import BigIntegerField, CharField, DateTimeField
+
+
+class Tombstone(BaseModel):
+    """
+        This model records the removal of a record of a versioned model so
+        that the removal can be part of the changes since a version.
+    """
+    # the table of the removed record
+    model = CharField()
+    # the primary key of the removed record
+    record = CharField()
+    # the version of the removal
+    version = BigIntegerField()
+
+    class Meta:
+        # the changes of a model are looked up by version
+        indexes = ((('model', 'version'), False),)
+
+
+class VersionCounter(BaseModel):
+    """
+        This model holds the latest version allocated for the records of each
+        versioned model (see `next_versions`).
+    """
+    # the table of the versioned model
+    model = CharField(unique=True)
+    # the latest version allocated
+    version = BigIntegerField()
+
+
+class Versioned(BaseModel):
+    """
+        This mixin gives each record a version (taken from a counter shared
+        by the records of the model and the tombstones of the ones that were
+        removed) along with the time it was last changed. Every write made
+        through the crud action handlers bumps the version so the changes
+        since any version can be found with `changes`.
+
+        Versions are allocated in the transaction of the write (see
+        `next_versions`) so they become visible in the order they were handed
+        out and a reader never skips a version that commits late.
+
+        Example:
+
+            .. code-block:: python
+
+                import nautilus
+
+                class Recipe(nautilus.models.Versioned):
+                    name = nautilus.models.fields.CharField()
+    """
+    version = BigIntegerField(default=0, index=True)
+    updated_at = DateTimeField(default=datetime.datetime.utcnow)
+
+
+    def save(self, *args, **kwds):
+        # allocate the version in the same transaction as the write
+        with self._meta.database.atomic():
+            # update the version of the record
+            for key, value in type(self).stamped({}).items():
+                setattr(self, key, value)
+            # save the record
+            return super().save(*args, **kwds)
+
+
+    def delete_instance(self, *args, **kwds):
+        # remove the record and leave a tombstone in its place
+        with self._meta.database.atomic():
+            type(self).bury([self._get_pk_value()])
+            return super().delete_instance(*args, **kwds)
+
+
+    @classmethod
+    def stamped(cls, values):
+        """
+            This method returns the given values along with a new version and
+            the current time.
+        """
+        return cls.stamped_many([values])[0]
+
+
+    @classmethod
+    def stamped_many(cls, records):
+        """
+            This method returns the values of each given record along with
+            consecutive new versions and the current time.
+        """
+        # the time of the change
+        now = datetime.datetime.utcnow()
+        # add a version to each record
+        return [dict(values, version=version, updated_at=now) for values, version in \
+                    zip(records, next_versions(cls, len(records)))]
+
+
+    @classmethod
+    def bury(cls, pks):
+        """
+            This method records the removal of the records with the given
+            primary keys.
+        """
+        # if there is nothing to record
+        if not pks:
+            return
+        # the version of each removal
+        versions = next_versions(cls, len(pks))
+        # record the removals
+        Tombstone.insert_many([
+            {'model': cls._meta.db_table, 'record': str(pk), 'version': version} \
+                for pk, version in zip(pks, versions)
+        ]).execute()
+
+
+def next_versions(Model, count=1):
+    """
+        This function allocates the given number of consecutive versions for
+        the records of the model. It has to be called in the transaction of
+        the write that uses the versions: the counter of the model is bumped
+        in the database, which keeps it locked until the transaction is over
+        so the writes of a model commit in the order of their versions.
+
+        Returns:
+            (range): The new versions.
+    """
+    # the table of the model
+    table = Model._meta.db_table
+    # the counter of the model
+    counter = VersionCounter.select(VersionCounter.version).where(VersionCounter.model == table)
+
+    # bump the counter (and hold on to it until the write is committed)
+    if not _bump_counter(table, count):
+        try:
+            # if the model doesn't have a counter yet, start after the latest version saved
+            with VersionCounter._meta.database.atomic():
+                VersionCounter.create(model=table, version=latest_version(Model) + count)
+        # if another writer created the counter in the meantime
+        except IntegrityError:
+            # bump theirs
+            _bump_counter(table, count)
+
+    # the last of the new versions
+    last = counter.scalar()
+    # return the versions
+    return range(last - count + 1, last + 1)
+
+
+def _bump_counter(table, count):
+    # add to the counter of the table (returns false if there isn't one)
+    return VersionCounter.update(version=VersionCounter.version + count) \
+                         .where(VersionCounter.model == table) \
+                         .execute()
+
+
+def latest_version(Model):
+    """
+        This function returns the latest version saved for the records of the
+        model (including the ones that were removed).
+    """
+    # the latest version of the records in each database
+    versions = [
+        query.scalar() for query in _in_databases(Model, Model.select(fn.Max(Model.version)))
+    ]
+    # the latest version of the tombstones
+    versions.append(
+        Tombstone.select(fn.Max(Tombstone.version)) \
+                 .where(Tombstone.model == Model._meta.db_table).scalar()
+    )
+    # return the largest one
+    return max([version for version in versions if version is not None] or [0])
+
+
+def changes(Model, since=0, limit=None):
+    """
+        This function returns the changes made to the records of the model
+        since the given version.
+
+        Args:
+            Model (nautilus.models.Versioned): The model to look at.
+            since (int): The version to start after.
+            limit (int): The maximum number of changes to return. The next
+                changes can be found by starting after the returned version.
+
+        Returns:
+            (list, list, int): The records that were created or updated, the
+                primary keys of the records that were removed, and the version
+                of the last change (`since` if there were no changes).
+    """
+    # the records that changed (from every database that holds them)
+    records = []
+    for query in _in_databases(Model, Model.select().where(Model.version > since) \
+                                                     .order_by(Model.version)):
+        records.extend(query.limit(limit) if limit else query)
+    # the records that were removed
+    tombstones = Tombstone.select().where(
+        (Tombstone.model == Model._meta.db_table) & (Tombstone.version > since)
+    ).order_by(Tombstone.version)
+
+    # every change in order
+    changed = sorted(
+        [(record.version, record) for record in records] + \
+        [(tombstone.version, tombstone) for tombstone in (tombstones.limit(limit) if limit else tombstones)],
+        key=lambda change: change[0]
+    )[:limit]
+
+    # the primary key of the model
+    pk_field = Model.primary_key()
+    # the records that changed
+    records = [change for _, change in changed if not isinstance(change, Tombstone)]
+    # the keys of the records that still exist (a key could have been reused after a removal)
+    existing = {str(record._get_pk_value()) for record in records}
+
+    # return the changes
+    return (
+        records,
+        [pk_field.python_value(change.record) for _, change in changed \
+            if isinstance(change, Tombstone) and change.record not in existing],
+        changed[-1][0] if changed else since,
+    )
+
+
+def is_versioned(Model):
+    """
+        This function returns wether the changes to the records of the given
+        model are being tracked.
+    """
+    return isinstance(Model, type) and issubclass(Model, Versioned)
+
+
+def _in_databases(Model, query):
+    # the shards of the model
+    shards = model_shards(Model)
+    # if the model isn't sharded
+    if not shards:
+        # there's only one database to ask
+        return [query]
+    # a copy of the query for each shard
+    queries = []
+    for database in shards.databases:
+        # point a copy of the query to the shard
+        shard_query = query.clone()
+        shard_query.database = database
+        queries.append(shard_query)
+    # return the queries
+    return queries
@@ -1,3 +1,4 @@
 from .consumers import *
 from .actionHandlers import *
 from .util import *
+from .outbox import Outbox, OutboxEvent
@@ -2,10 +2,20 @@ from .crudHandler import crud_handler
 from .createHandler import create_handler
 from .updateHandler import update_handler
 from .deleteHandler import delete_handler
+from .upsertHandler import upsert_handler
+from .createManyHandler import create_many_handler
+from .updateManyHandler import update_many_handler
+from .deleteManyHandler import delete_many_handler
+from .upsertManyHandler import upsert_many_handler
+from .linkHandler import link_handler
+from .unlinkHandler import unlink_handler
 from .readHandler import read_handler
+from .changesHandler import changes_handler
 from .rollCallHandler import roll_call_handler
 from .queryHandler import query_handler
 from .flexibleAPIHandler import flexible_api_handler
+from .subscriptionHandler import subscription_handler
+from .materializedViewHandler import materialized_view_handler
 
 async def noop_handler(action_type, payload, dispatcher=None):
     return
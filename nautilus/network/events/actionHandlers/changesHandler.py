@@ -0,0 +1,73 @@
+# external imports
+import json
+# local imports
+from nautilus.conventions.actions import (
+    get_crud_action,
+    change_action_status,
+    success_status,
+    error_status
+)
+from nautilus.models.serializers import ModelSerializer
+from nautilus.models.versioned import changes
+from nautilus.database import executor
+
+def changes_handler(Model, name=None, **kwds):
+    """
+        This factory returns an action handler that responds to requests for
+        the changes made to the records of a versioned model since a given
+        version (see `nautilus.models.Versioned`). The payload specifies the
+        version to start after (`since`) and optionally the maximum number of
+        changes to return (`limit`).
+
+        Args:
+            Model (nautilus.models.Versioned): The model to look at.
+
+        Returns:
+            function(type, payload): The action handler for this model
+    """
+    async def action_handler(service, action_type, payload, props, **kwds):
+        # if the payload asks for the changes to the model
+        if action_type == get_crud_action('changes', name or Model):
+            # the props of the message
+            message_props = {}
+            # if there was a correlation id in the request
+            if 'correlation_id' in props:
+                # make sure it ends up in the reply
+                message_props['correlation_id'] = props['correlation_id']
+
+            try:
+                # make sure we are looking at the payload as a dictionary
+                if isinstance(payload, str):
+                    payload = json.loads(payload)
+
+                # find the changes (without blocking the loop)
+                records, deleted, version = await executor.run(
+                    changes,
+                    Model,
+                    since=payload.get('since', 0),
+                    limit=payload.get('limit')
+                )
+
+                # publish the changes
+                await service.event_broker.send(
+                    payload=ModelSerializer().serialize({
+                        'version': version,
+                        'records': records,
+                        'deleted': deleted,
+                    }),
+                    action_type=change_action_status(action_type, success_status()),
+                    **message_props
+                )
+
+            # if something goes wrong
+            except Exception as err:
+                # publish the error as an event
+                await service.event_broker.send(
+                    payload=str(err),
+                    action_type=change_action_status(action_type, error_status()),
+                    **message_props
+                )
+
+
+    # return the handler
+    return action_handler
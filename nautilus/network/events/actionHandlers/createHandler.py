@@ -8,8 +8,9 @@ from nautilus.conventions.actions import (
     error_status
 )
 from nautilus.models.serializers import ModelSerializer
+from nautilus.database import write, model_shards
 
-def create_handler(Model, name=None, **kwds):
+def create_handler(Model, name=None, delta_events=False, **kwds):
     """
         This factory returns an action handler that creates a new instance of
         the specified model when a create action is recieved, assuming the
@@ -18,6 +19,11 @@ def create_handler(Model, name=None, **kwds):
         Args:
             Model (nautilus.BaseModel): The model to create when the action
                 received.
+            delta_events (bool): Wether the success event should only carry
+                the fields with a value (see `nautilus.conventions.actions.is_delta`).
+
+        If the service has an `outbox`, the success event is recorded in the
+        same transaction as the new record and published in the background.
 
         Returns:
             function(action_type, payload): The action handler for this model
@@ -34,30 +40,55 @@ def create_handler(Model, name=None, **kwds):
                     # make sure it ends up in the reply
                     message_props['correlation_id'] = props['correlation_id']
 
-                # for each required field
-                for requirement in Model.required_fields():
-
-                    # save the name of the field
-                    field_name = requirement.name
-                    # ensure the value is in the payload
-                    # TODO: check all required fields rather than failing on the first
-                    if not field_name in payload and field_name != 'id':
-                        # yell loudly
-                        raise ValueError(
-                            "Required field not found in payload: %s" %field_name
+                # check every value (and the required fields) before touching the database
+                payload = Model._validator.validate(payload)
+
+                # the shards of the model (if its records are spread over several databases)
+                shards = model_shards(Model)
+                # the outbox of the service (events of sharded models are sent right away
+                # since they are not written to the same database as the outbox)
+                outbox = getattr(service, 'outbox', None) if notify and not shards else None
+
+                # if the model is sharded
+                if shards:
+                    # store the new record in the appropriate shard (without blocking the loop)
+                    new_model = await write(shards.create, Model, payload)
+                    # if each shard has its own partition
+                    if shards.partitioned:
+                        # send the reply to the partition of the record
+                        message_props['partition'] = shards.shard_for(
+                            getattr(new_model, Model.primary_key().name)
                         )
 
-                # create a new model
-                new_model = Model(**payload)
+                # otherwise the model lives in a single database
+                else:
+                    # create a new model
+                    new_model = Model(**payload)
+                    # the function that saves it
+                    save = new_model.save
+
+                    # if the success event goes through the service's outbox
+                    if outbox:
+                        # record the event along with the new record
+                        save = outbox.recorded(
+                            save,
+                            change_action_status(action_type, success_status()),
+                            lambda _: _success_payload(new_model, delta_events),
+                            **message_props
+                        )
 
-                # save the new model instance
-                new_model.save()
+                    # save the new model instance (without blocking the loop)
+                    await write(save, batcher=getattr(service, 'write_batcher', None))
 
-                # if we need to tell someone about what happened
-                if notify:
+                # if the event was recorded in the outbox
+                if outbox:
+                    # let the publisher know
+                    outbox.wake()
+                # otherwise if we need to tell someone about what happened
+                elif notify:
                     # publish the scucess event
                     await service.event_broker.send(
-                        payload=ModelSerializer().serialize(new_model),
+                        payload=_success_payload(new_model, delta_events),
                         action_type=change_action_status(action_type, success_status()),
                         **message_props
                     )
@@ -81,3 +112,15 @@ def create_handler(Model, name=None, **kwds):
 
     # return the handler
     return action_handler
+
+
+def _success_payload(model, delta_events):
+    # if we are supposed to announce the whole record
+    if not delta_events:
+        # serialize the record
+        return ModelSerializer().serialize(model)
+    # otherwise only announce the fields that have a value
+    return ModelSerializer().serialize_delta(
+        model,
+        [field.name for field in type(model).fields() if getattr(model, field.name) is not None]
+    )
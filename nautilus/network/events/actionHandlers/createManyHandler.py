@@ -0,0 +1,97 @@
+# local imports
+from nautilus.conventions.actions import (
+    get_crud_action,
+    change_action_status,
+    success_status,
+    error_status,
+    bulk_method
+)
+from nautilus.models.serializers import ModelSerializer
+from nautilus.database import executor, write, model_shards
+from nautilus.models.bulk import in_transaction, validate_records, insert_records, select_records
+
+def create_many_handler(Model, name=None, chunk_size=100, **kwds):
+    """
+        This factory returns an action handler that creates a batch of new
+        instances of the specified model when a `create_many` action is
+        recieved. The whole batch is validated up front and inserted with
+        multi-row inserts inside of a single transaction, followed by a single
+        success event carrying every new record.
+
+        Args:
+            Model (nautilus.BaseModel): The model to create when the action
+                received.
+            chunk_size (int): The maximum number of rows inserted per statement.
+
+        Returns:
+            function(action_type, payload): The action handler for this model
+    """
+    async def action_handler(service, action_type, payload, props, notify=True, **kwds):
+        # if the payload represents a batch of new instances of `Model`
+        if action_type == get_crud_action(bulk_method('create'), name or Model):
+            try:
+                # the props of the message
+                message_props = {}
+                # if there was a correlation id in the request
+                if 'correlation_id' in props:
+                    # make sure it ends up in the reply
+                    message_props['correlation_id'] = props['correlation_id']
+
+                # the records to create
+                records = payload['records'] if isinstance(payload, dict) else payload
+
+                # make sure every record is valid before we write anything
+                records = validate_records(Model, records)
+
+                # the outbox of the service (events of sharded models are sent right away)
+                outbox = getattr(service, 'outbox', None) if notify and not model_shards(Model) else None
+                # the function that writes the batch
+                write_batch = in_transaction
+                # if the success event goes through the service's outbox
+                if outbox:
+                    # record the event (the new records) along with the batch
+                    write_batch = outbox.recorded(
+                        write_batch,
+                        change_action_status(action_type, success_status()),
+                        lambda pks: ModelSerializer().serialize(select_records(Model, pks)),
+                        **message_props
+                    )
+
+                # write the whole batch in a single transaction (without blocking the loop)
+                pks = await write(
+                    write_batch, Model, insert_records, Model, records, chunk_size=chunk_size
+                )
+
+                # if the event was recorded in the outbox
+                if outbox:
+                    # let the publisher know
+                    outbox.wake()
+                # otherwise if we need to tell someone about what happened
+                elif notify:
+                    # publish a single success event for the batch
+                    await service.event_broker.send(
+                        payload=ModelSerializer().serialize(
+                            await executor.run(select_records, Model, pks)
+                        ),
+                        action_type=change_action_status(action_type, success_status()),
+                        **message_props
+                    )
+
+            # if something goes wrong
+            except Exception as err:
+                # if we need to tell someone about what happened
+                if notify:
+                    # publish the error as an event
+                    await service.event_broker.send(
+                        payload=str(err),
+                        action_type=change_action_status(action_type, error_status()),
+                        **message_props
+                    )
+                # otherwise we aren't supposed to notify
+                else:
+                    # raise the exception normally
+                    raise err
+
+
+    # return the handler
+    return action_handler
@@ -1,4 +1,4 @@
-def crud_handler(Model, name=None, **kwds):
+def crud_handler(Model, name=None, delta_events=False, **kwds):
     """
         This action handler factory reaturns an action handler that
         responds to actions with CRUD types (following nautilus conventions)
@@ -7,6 +7,8 @@ def crud_handler(Model, name=None, **kwds):
         Args:
             Model (nautilus.BaseModel): The model to delete when the action
                 received.
+            delta_events (bool): Wether the success events of creates and
+                updates should only carry the fields that changed.
 
         Returns:
             function(type, payload): The action handler for this model
@@ -14,12 +16,36 @@ def crud_handler(Model, name=None, **kwds):
 
     # import the necessary modules
     from nautilus.network.events import combine_action_handlers
-    from . import update_handler, create_handler, delete_handler, read_handler
+    from nautilus.models.versioned import is_versioned
+    from . import (
+        update_handler,
+        create_handler,
+        delete_handler,
+        read_handler,
+        create_many_handler,
+        update_many_handler,
+        delete_many_handler,
+        upsert_handler,
+        upsert_many_handler,
+        changes_handler
+    )
 
-    # combine them into one handler
-    return combine_action_handlers(
-        create_handler(Model, name=name),
+    # the handlers for the model
+    handlers = [
+        create_handler(Model, name=name, delta_events=delta_events),
         read_handler(Model, name=name),
-        update_handler(Model, name=name),
+        update_handler(Model, name=name, delta_events=delta_events),
         delete_handler(Model, name=name),
-    )
+        create_many_handler(Model, name=name),
+        update_many_handler(Model, name=name),
+        delete_many_handler(Model, name=name),
+        upsert_handler(Model, name=name),
+        upsert_many_handler(Model, name=name),
+    ]
+    # if we are keeping track of the changes to the model
+    if is_versioned(Model):
+        # they can be asked for
+        handlers.append(changes_handler(Model, name=name))
+
+    # combine them into one handler
+    return combine_action_handlers(*handlers)
@@ -1,3 +1,5 @@
+# external imports
+import json
 # local imports
 from nautilus.conventions.actions import (
     get_crud_action,
@@ -6,6 +8,7 @@ from nautilus.conventions.actions import (
     error_status
 )
 from nautilus.models.serializers import ModelSerializer
+from nautilus.database import write, model_shards
 
 def delete_handler(Model, name=None, **kwds):
     """
@@ -17,6 +20,9 @@ def delete_handler(Model, name=None, **kwds):
             Model (nautilus.BaseModel): The model to delete when the action
                 received.
 
+        If the service has an `outbox`, the success event is recorded in the
+        same transaction as the removal and published in the background.
+
         Returns:
             function(type, payload): The action handler for this model
     """
@@ -40,13 +46,42 @@ def delete_handler(Model, name=None, **kwds):
                     model_query = Model.select().where(Model.primary_key() == record_id)
                 except KeyError:
                     raise RuntimeError("Could not find appropriate id to remove service record.")
-                # remove the model instance
-                model_query.get().delete_instance()
-                # if we need to tell someone about what happened
-                if notify:
+                # the shards of the model (if its records are spread over several databases)
+                shards = model_shards(Model)
+                # the outbox of the service (events of sharded models are sent right away)
+                outbox = getattr(service, 'outbox', None) if notify and not shards else None
+                # if the model is sharded
+                if shards:
+                    # remove the record from its shard (without blocking the loop)
+                    await write(shards.delete_instance, Model, record_id)
+                    # if each shard has its own partition
+                    if shards.partitioned:
+                        # send the reply to the partition of the record
+                        message_props['partition'] = shards.shard_for(record_id)
+                # otherwise the model lives in a single database
+                else:
+                    # the function that removes the model instance
+                    remove = lambda: model_query.get().delete_instance()
+                    # if the success event goes through the service's outbox
+                    if outbox:
+                        # record the event along with the removal
+                        remove = outbox.recorded(
+                            remove,
+                            change_action_status(action_type, success_status()),
+                            lambda _: json.dumps({'status': 'ok', 'pk': record_id}),
+                            **message_props
+                        )
+                    # remove the model instance (without blocking the loop)
+                    await write(remove)
+                # if the event was recorded in the outbox
+                if outbox:
+                    # let the publisher know
+                    outbox.wake()
+                # otherwise if we need to tell someone about what happened
+                elif notify:
                     # publish the success event
                     await service.event_broker.send(
-                        payload='{"status":"ok"}',
+                        payload=json.dumps({'status': 'ok', 'pk': record_id}),
                         action_type=change_action_status(action_type, success_status()),
                         **message_props
                     )
@@ -0,0 +1,93 @@
+# external imports
+import json
+# local imports
+from nautilus.conventions.actions import (
+    get_crud_action,
+    change_action_status,
+    success_status,
+    error_status,
+    bulk_method
+)
+from nautilus.database import write, model_shards
+from nautilus.models.bulk import in_transaction, delete_records
+
+def delete_many_handler(Model, name=None, chunk_size=100, **kwds):
+    """
+        This factory returns an action handler that deletes a batch of
+        instances of the specified model when a `delete_many` action is
+        recieved. The payload is either a list of pks or an object with the
+        list under `pk`. The records are removed in a single transaction.
+
+        Args:
+            Model (nautilus.BaseModel): The model to delete when the action
+                received.
+            chunk_size (int): The maximum number of records per statement.
+
+        Returns:
+            function(type, payload): The action handler for this model
+    """
+    async def action_handler(service, action_type, payload, props, notify=True, **kwds):
+        # if the payload represents a batch of `Model` instances to remove
+        if action_type == get_crud_action(bulk_method('delete'), name or Model):
+            try:
+                # the props of the message
+                message_props = {}
+                # if there was a correlation id in the request
+                if 'correlation_id' in props:
+                    # make sure it ends up in the reply
+                    message_props['correlation_id'] = props['correlation_id']
+
+                # the ids of the records to delete
+                record_ids = payload if isinstance(payload, list) else \
+                                payload['id'] if 'id' in payload else payload['pk']
+
+                # the outbox of the service (events of sharded models are sent right away)
+                outbox = getattr(service, 'outbox', None) if notify and not model_shards(Model) else None
+                # the function that writes the batch
+                write_batch = in_transaction
+                # if the success event goes through the service's outbox
+                if outbox:
+                    # record the event (the removed keys) along with the batch
+                    write_batch = outbox.recorded(
+                        write_batch,
+                        change_action_status(action_type, success_status()),
+                        lambda _: json.dumps({'status': 'ok', 'pk': record_ids}),
+                        **message_props
+                    )
+
+                # remove every record in a single transaction (without blocking the loop)
+                await write(
+                    write_batch, Model, delete_records, Model, record_ids, chunk_size=chunk_size
+                )
+
+                # if the event was recorded in the outbox
+                if outbox:
+                    # let the publisher know
+                    outbox.wake()
+                # otherwise if we need to tell someone about what happened
+                elif notify:
+                    # publish a single success event for the batch
+                    await service.event_broker.send(
+                        payload=json.dumps({'status': 'ok', 'pk': record_ids}),
+                        action_type=change_action_status(action_type, success_status()),
+                        **message_props
+                    )
+
+            # if something goes wrong
+            except Exception as err:
+                # if we need to tell someone about what happened
+                if notify:
+                    # publish the error as an event
+                    await service.event_broker.send(
+                        payload=str(err),
+                        action_type=change_action_status(action_type, error_status()),
+                        **message_props
+                    )
+                # otherwise we aren't supposed to notify
+                else:
+                    # raise the exception normally
+                    raise err
+
+
+    # return the handler
+    return action_handler
@@ -0,0 +1,34 @@
+# external imports
+import json
+# local imports
+from nautilus.conventions.actions import intialize_service_action
+
+async def materialized_view_handler(service, action_type, payload, props, **kwds):
+    """
+        This action handler maintains the materialized views of the api
+        gateway. Views are created when the corresponding service announces
+        itself and are kept up to date with the result of crud actions.
+    """
+    # if the service doesn't keep materialized views
+    if not hasattr(service, 'materialized_views'):
+        # there's nothing to do
+        return
+
+    # if the action represents a new service
+    if action_type == intialize_service_action():
+        # the treat the payload like json if its a string
+        model = json.loads(payload) if isinstance(payload, str) else payload
+        # let the service decide if it needs to replicate the model
+        service.materialize(model)
+
+    # otherwise the action could affect a view
+    elif service.materialized_views:
+        # the treat the payload like json if its a string
+        record = json.loads(payload) if isinstance(payload, str) else payload
+
+        # if the payload is a record (or a list of them)
+        if isinstance(record, (dict, list)):
+            # for each view maintained by the service
+            for view in service.materialized_views.values():
+                # apply the action if its relevant
+                view.handle_action(action_type, record)
@@ -15,7 +15,9 @@ async def query_handler(service, action_type, payload, props, **kwds):
             service.object_resolver,
             service.connection_resolver,
             service.mutation_resolver,
-            obey_auth=False
+            obey_auth=False,
+            traversal_resolver=service.traversal_resolver,
+            fused_resolver=service.fused_resolver
         )
 
         # the props for the reply message
@@ -1,12 +1,32 @@
 # external imports
 import json
 # local imports
-from nautilus.conventions.actions import get_crud_action, success_status, change_action_status
+from nautilus.conventions.actions import (
+    get_crud_action,
+    success_status,
+    error_status,
+    change_action_status
+)
+from nautilus.conventions.api import root_query
+from nautilus.api.filter import project_model
+from nautilus.api.util import serialize_rows
+from nautilus.database import executor
 
 def read_handler(Model, name=None, **kwds):
     """
         This factory returns an action handler that responds to read requests
         by resolving the payload as a graphql query against the internal schema.
+        Structured payloads (a dictionary of `fields` and `filters`, see
+        `nautilus.api.util.structured_query_for_model`) are resolved directly
+        against the database without going through graphql.
+
+        A structured payload can also designate a read to perform with the
+        results under `then`: the values of its `column` are passed as the
+        `pk_in` filter of the `query` sent to `action_type`, and whoever
+        answers that read replies to the original question (ie, a connection
+        and the records it points to can be read with a single question).
+        Only pending reads can be chained so a request can't make the service
+        send any other action.
 
 
         Args:
@@ -27,13 +47,45 @@ def read_handler(Model, name=None, **kwds):
                 message_props['correlation_id'] = props['correlation_id']
 
             try:
-                # resolve the query using the service schema
-                resolved = service.schema.execute(payload)
-                # create the string response
-                response = json.dumps({
-                    'data': {key:value for key,value in resolved.data.items()},
-                    'errors': resolved.errors
-                })
+                # if the results are to be passed along to another read
+                if isinstance(payload, dict) and payload.get('then'):
+                    # the read to chain
+                    then = payload['then']
+                    # make sure we are only asked to pass the ids to another read
+                    _validate_chained_action(then.get('action_type'))
+                    # the values to pass along (without blocking the loop)
+                    ids = await executor.run(_chained_ids, Model, payload, then['column'])
+                    # if there is nothing to read
+                    if not ids:
+                        # we already know the answer
+                        response = json.dumps({'data': {root_query(): []}, 'errors': []})
+                    # otherwise
+                    else:
+                        # the chained query (only for the records we found)
+                        query = dict(then['query'])
+                        query['filters'] = dict(query.get('filters', {}), pk_in=ids)
+                        # ask the next service to answer in our place
+                        await service.event_broker.send(
+                            payload=query,
+                            action_type=then['action_type'],
+                            **message_props
+                        )
+                        # we're done here
+                        return
+
+                # if the payload is a structured read
+                elif isinstance(payload, dict):
+                    # resolve it without the schema (and without blocking the loop)
+                    response = await executor.run(_structured_read, Model, payload)
+                # otherwise the payload is a graphql query
+                else:
+                    # resolve the query using the service schema
+                    resolved = await executor.run(service.schema.execute, payload)
+                    # create the string response
+                    response = json.dumps({
+                        'data': {key:value for key,value in resolved.data.items()},
+                        'errors': resolved.errors
+                    })
 
                 # publish the success event
                 await service.event_broker.send(
@@ -54,3 +106,52 @@ def read_handler(Model, name=None, **kwds):
 
     # return the handler
     return action_handler
+
+
+def _structured_read(Model, payload):
+    """
+        This function resolves a structured read payload and returns the same
+        response the graphql schema would have produced for the equivalent query.
+    """
+    # the fields to include in each record
+    fields = payload['fields']
+
+    try:
+        # load the matching rows
+        rows = project_model(Model, payload.get('filters', {}), fields)
+        # serialize them as they come
+        records = serialize_rows(Model, rows, fields)
+    # if the read could not be resolved
+    except ValueError as err:
+        # report the error like the schema would
+        return json.dumps({
+            'data': {root_query(): None},
+            'errors': [str(err)]
+        })
+
+    # create the string response around the serialized records
+    return '{"data": {%s: %s}, "errors": []}' % (json.dumps(root_query()), records)
+
+
+def _chained_ids(Model, payload, column):
+    """
+        This function returns the values of the given column for the records
+        designated by a structured read.
+    """
+    return [row[column] for row in project_model(Model, payload.get('filters', {}), [column])]
+
+
+def _validate_chained_action(action_type):
+    """
+        This function makes sure the given action type designates a pending
+        read of some model.
+
+        Raises:
+            ValueError: If the action is anything else.
+    """
+    # the parts of the action type
+    parts = action_type.split('.') if isinstance(action_type, str) else []
+    # if the action isn't a read request
+    if len(parts) != 3 or not all(parts) or action_type != get_crud_action('read', parts[1]):
+        # yell loudly
+        raise ValueError("Reads can only be chained to other reads: %s" % action_type)
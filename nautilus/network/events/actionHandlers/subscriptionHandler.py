@@ -0,0 +1,13 @@
+async def subscription_handler(service, action_type, payload, props, **kwds):
+    """
+        This action handler forwards the result of crud actions to the
+        subscription registry of the api gateway which pushes the changes
+        to the appropriate subscribers.
+    """
+    # the subscription registry of the service
+    registry = getattr(service, 'subscriptions', None)
+
+    # if the service supports subscriptions
+    if registry:
+        # let the registry handle the action
+        await registry.publish(action_type, payload)
@@ -6,8 +6,9 @@ from nautilus.conventions.actions import (
     error_status
 )
 from nautilus.models.serializers import ModelSerializer
+from nautilus.database import write, model_shards
 
-def update_handler(Model, name=None, **kwds):
+def update_handler(Model, name=None, delta_events=False, **kwds):
     """
         This factory returns an action handler that updates a new instance of
         the specified model when a update action is recieved, assuming the
@@ -16,6 +17,12 @@ def update_handler(Model, name=None, **kwds):
         Args:
             Model (nautilus.BaseModel): The model to update when the action
                 received.
+            delta_events (bool): Wether the success event should only carry
+                the fields that changed along with the primary key (and
+                version). The whole record can still be read when needed.
+
+        If the service has an `outbox`, the success event is recorded in the
+        same transaction as the update and published in the background.
 
         Returns:
             function(type, payload): The action handler for this model
@@ -35,31 +42,50 @@ def update_handler(Model, name=None, **kwds):
                 # grab the nam eof the primary key for the model
                 pk_field = Model.primary_key()
 
-                # make sure there is a primary key to id the model
-                if not pk_field.name in payload:
-                    # yell loudly
-                    raise ValueError("Must specify the pk of the model when updating")
-
-                # grab the matching model
-                model = Model.select().where(pk_field == payload[pk_field.name]).get()
+                # check the changes (which have to designate the record) before touching the database
+                payload = Model._validator.validate(payload, partial=True, require_pk=True)
 
-                # remove the key from the payload
-                payload.pop(pk_field.name, None)
+                # the shards of the model (if its records are spread over several databases)
+                shards = model_shards(Model)
+                # if each shard has its own partition
+                if shards and shards.partitioned:
+                    # send the reply to the partition of the record
+                    message_props['partition'] = shards.shard_for(payload[pk_field.name])
 
-                # for every key,value pair
-                for key, value in payload.items():
-                    # TODO: add protection for certain fields from being
-                    # changed by the api
-                    setattr(model, key, value)
+                # the payload of the success event
+                serialize = lambda model: ModelSerializer().serialize_delta(model, payload.keys()) \
+                                            if delta_events else ModelSerializer().serialize(model)
+                # the function that applies the update
+                update = _update_record
+                # the outbox of the service (events of sharded models are sent right away)
+                outbox = getattr(service, 'outbox', None) if notify and not shards else None
+                # if the success event goes through the service's outbox
+                if outbox:
+                    # record the event along with the update
+                    update = outbox.recorded(
+                        update,
+                        change_action_status(action_type, success_status()),
+                        serialize,
+                        **message_props
+                    )
 
-                # save the updates
-                model.save()
+                # apply the update (without blocking the loop)
+                model = await write(
+                    update,
+                    Model,
+                    payload,
+                    batcher=getattr(service, 'write_batcher', None)
+                )
 
-                # if we need to tell someone about what happened
-                if notify:
+                # if the event was recorded in the outbox
+                if outbox:
+                    # let the publisher know
+                    outbox.wake()
+                # otherwise if we need to tell someone about what happened
+                elif notify:
                     # publish the scucess event
                     await service.event_broker.send(
-                        payload=ModelSerializer().serialize(model),
+                        payload=serialize(model),
                         action_type=change_action_status(action_type, success_status()),
                         **message_props
                     )
@@ -81,3 +107,30 @@ def update_handler(Model, name=None, **kwds):
 
     # return the handler
     return action_handler
+
+
+def _update_record(Model, payload):
+    # the shards of the model
+    shards = model_shards(Model)
+    # if the model is sharded
+    if shards:
+        # update the record in its shard
+        return shards.update(Model, payload)
+
+    # grab the name of the primary key for the model
+    pk_field = Model.primary_key()
+    # grab the matching model (loaded in the same transaction as the update
+    # so that batched updates of the same record see each other)
+    model = Model.select().where(pk_field == payload[pk_field.name]).get()
+
+    # for every key,value pair (other than the key)
+    for key, value in payload.items():
+        if key != pk_field.name:
+            # TODO: add protection for certain fields from being
+            # changed by the api
+            setattr(model, key, value)
+
+    # save the updates
+    model.save()
+    # return the updated model
+    return model
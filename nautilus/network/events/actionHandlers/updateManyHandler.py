@@ -0,0 +1,120 @@
+# local imports
+from nautilus.conventions.actions import (
+    get_crud_action,
+    change_action_status,
+    success_status,
+    error_status,
+    bulk_method
+)
+from nautilus.models.serializers import ModelSerializer
+from nautilus.database import executor, write, model_shards
+from nautilus.models.bulk import in_transaction, validate_records, update_records, select_records
+
+def update_many_handler(Model, name=None, chunk_size=100, **kwds):
+    """
+        This factory returns an action handler that updates a batch of
+        instances of the specified model when an `update_many` action is
+        recieved. The payload is either a list of changes (each one with the
+        pk of the record) or a single set of values along with the list of pks
+        to apply them to. Records receiving the same values are updated with a
+        single statement and the whole batch is applied in one transaction.
+
+        Args:
+            Model (nautilus.BaseModel): The model to update when the action
+                received.
+            chunk_size (int): The maximum number of records per statement.
+
+        Returns:
+            function(action_type, payload): The action handler for this model
+    """
+    async def action_handler(service, action_type, payload, props, notify=True, **kwds):
+        # if the payload represents changes to a batch of `Model` instances
+        if action_type == get_crud_action(bulk_method('update'), name or Model):
+            try:
+                # the props of the message
+                message_props = {}
+                # if there was a correlation id in the request
+                if 'correlation_id' in props:
+                    # make sure it ends up in the reply
+                    message_props['correlation_id'] = props['correlation_id']
+
+                # the changes to apply
+                changes = _changes_from_payload(Model, payload)
+
+                # make sure every change is valid before we write anything
+                changes = validate_records(Model, changes, require_pk=True, check_required=False)
+
+                # the outbox of the service (events of sharded models are sent right away)
+                outbox = getattr(service, 'outbox', None) if notify and not model_shards(Model) else None
+                # the function that writes the batch
+                write_batch = in_transaction
+                # if the success event goes through the service's outbox
+                if outbox:
+                    # record the event (the updated records) along with the batch
+                    write_batch = outbox.recorded(
+                        write_batch,
+                        change_action_status(action_type, success_status()),
+                        lambda pks: ModelSerializer().serialize(select_records(Model, pks)),
+                        **message_props
+                    )
+
+                # write the whole batch in a single transaction (without blocking the loop)
+                pks = await write(
+                    write_batch, Model, update_records, Model, changes, chunk_size=chunk_size
+                )
+
+                # if the event was recorded in the outbox
+                if outbox:
+                    # let the publisher know
+                    outbox.wake()
+                # otherwise if we need to tell someone about what happened
+                elif notify:
+                    # publish a single success event for the batch
+                    await service.event_broker.send(
+                        payload=ModelSerializer().serialize(
+                            await executor.run(select_records, Model, pks)
+                        ),
+                        action_type=change_action_status(action_type, success_status()),
+                        **message_props
+                    )
+
+            # if something goes wrong
+            except Exception as err:
+                # if we need to tell someone about what happened
+                if notify:
+                    # publish the error as an event
+                    await service.event_broker.send(
+                        payload=str(err),
+                        action_type=change_action_status(action_type, error_status()),
+                        **message_props
+                    )
+                # otherwise we aren't supposed to notify
+                else:
+                    # raise the exception normally
+                    raise err
+
+
+    # return the handler
+    return action_handler
+
+
+def _changes_from_payload(Model, payload):
+    # if we were given a list of changes
+    if isinstance(payload, list):
+        # use it as is
+        return payload
+
+    # otherwise the payload designates a list of keys and the values to give them
+    values = dict(payload)
+    # the name of the primary key
+    pk_name = Model.primary_key().name
+    # pull out the keys of the records to update
+    pks = values.pop('pk', values.pop(pk_name, None))
+
+    # if there are no keys
+    if not isinstance(pks, list):
+        # yell loudly
+        raise ValueError("Must specify the list of pks to update")
+
+    # apply the values to each record
+    return [{pk_name: pk, **values} for pk in pks]
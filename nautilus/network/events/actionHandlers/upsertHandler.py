@@ -0,0 +1,111 @@
+# local imports
+from nautilus.conventions.actions import (
+    get_crud_action,
+    change_action_status,
+    success_status,
+    error_status
+)
+from nautilus.models.serializers import ModelSerializer
+from nautilus.models.bulk import upsert_records
+from nautilus.database import write, model_shards
+
+def upsert_handler(Model, name=None, **kwds):
+    """
+        This factory returns an action handler that creates a record of the
+        specified model, or updates it if it already exists, when an upsert
+        action is recieved. The record is identified by its primary key or a
+        unique field (see `nautilus.models.bulk.upsert_records`) and written
+        with a single statement.
+
+        Args:
+            Model (nautilus.BaseModel): The model to upsert when the action
+                received.
+
+        If the service has an `outbox`, the success event is recorded in the
+        same transaction as the write and published in the background.
+
+        Returns:
+            function(type, payload): The action handler for this model
+    """
+    async def action_handler(service, action_type, payload, props, notify=True, **kwds):
+        # if the payload represents an instance of `Model`
+        if action_type == get_crud_action('upsert', name or Model):
+            try:
+                # the props of the message
+                message_props = {}
+                # if there was a correlation id in the request
+                if 'correlation_id' in props:
+                    # make sure it ends up in the reply
+                    message_props['correlation_id'] = props['correlation_id']
+
+                # check the values before touching the database (required fields are
+                # left to the database since the record might already exist)
+                payload = Model._validator.validate(payload, partial=True)
+
+                # the shards of the model (if its records are spread over several databases)
+                shards = model_shards(Model)
+                # the function that writes the record
+                upsert = _upsert_record
+                # the outbox of the service (events of sharded models are sent right away)
+                outbox = getattr(service, 'outbox', None) if notify and not shards else None
+                # if the success event goes through the service's outbox
+                if outbox:
+                    # record the event along with the write
+                    upsert = outbox.recorded(
+                        upsert,
+                        change_action_status(action_type, success_status()),
+                        ModelSerializer().serialize,
+                        **message_props
+                    )
+
+                # write the record (without blocking the loop)
+                model = await write(
+                    upsert,
+                    Model,
+                    payload,
+                    batcher=getattr(service, 'write_batcher', None)
+                )
+                # if each shard has its own partition
+                if shards and shards.partitioned:
+                    # send the reply to the partition of the record
+                    message_props['partition'] = shards.shard_for(model._get_pk_value())
+
+                # if the event was recorded in the outbox
+                if outbox:
+                    # let the publisher know
+                    outbox.wake()
+                # otherwise if we need to tell someone about what happened
+                elif notify:
+                    # publish the success event
+                    await service.event_broker.send(
+                        payload=ModelSerializer().serialize(model),
+                        action_type=change_action_status(action_type, success_status()),
+                        **message_props
+                    )
+
+            # if something goes wrong
+            except Exception as err:
+                # if we need to tell someone about what happened
+                if notify:
+                    # publish the error as an event
+                    await service.event_broker.send(
+                        payload=str(err),
+                        action_type=change_action_status(action_type, error_status()),
+                        **message_props
+                    )
+                # otherwise we aren't supposed to notify
+                else:
+                    # raise the exception normally
+                    raise err
+
+    # return the handler
+    return action_handler
+
+
+def _upsert_record(Model, payload):
+    # write the record
+    pk, = upsert_records(Model, [payload])
+    # the shards of the model
+    shards = model_shards(Model)
+    # load the record as it was saved
+    return shards.get(Model, pk) if shards else Model.get(Model.primary_key() == pk)
@@ -2,7 +2,12 @@
 import json
 # local imports
 from .actions import ActionHandler
-from ..actionHandlers import query_handler, flexible_api_handler
+from ..actionHandlers import (
+    query_handler,
+    flexible_api_handler,
+    subscription_handler,
+    materialized_view_handler,
+)
 from ..util import combine_action_handlers
 
 class APIActionHandler(ActionHandler):
@@ -21,7 +26,11 @@ class APIActionHandler(ActionHandler):
             # handle event-based queries
             # query_handler,
             # build the schema of possible services
-            flexible_api_handler
+            flexible_api_handler,
+            # push record changes to subscribers
+            subscription_handler,
+            # keep the local replicas up to date
+            materialized_view_handler,
         )
 
         # pass the arguments to the combination handler
@@ -5,7 +5,7 @@ import json
 import re
 from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
 # local imports
-from nautilus.conventions.actions import serialize_action, hydrate_action
+from nautilus.conventions.actions import serialize_action, hydrate_action, pending_status
 
 
 
@@ -111,9 +111,10 @@ class KafkaBroker:
             pass
 
 
-    async def send(self, payload='', action_type='', channel=None, **kwds):
+    async def send(self, payload='', action_type='', channel=None, partition=None, **kwds):
         """
-            This method sends a message over the kafka stream.
+            This method sends a message over the kafka stream. If a partition
+            is given, the message is sent to that partition of the channel.
         """
         # use a custom channel if one was provided
         channel = channel or self.producer_channel
@@ -121,7 +122,7 @@ class KafkaBroker:
         # serialize the action type for the
         message = serialize_action(action_type=action_type, payload=payload, **kwds)
         # send the message
-        return await self._producer.send(channel, message.encode())
+        return await self._producer.send(channel, message.encode(), partition=partition)
 
 
     async def ask(self, action_type, **kwds):
@@ -178,9 +179,12 @@ class KafkaBroker:
                     # don't do anything
                     continue
 
-            # if we know how to respond to this message
+            # if we know how to respond to this message (questions can be passed
+            # along to other services with the same correlation id before the
+            # reply comes back so only treat finished actions as replies)
             if correlation_id and correlation_id in self._request_handlers \
-                and action_type != self._pending_outbound[correlation_id]:
+                and action_type != self._pending_outbound[correlation_id] \
+                and action_type.split('.')[-1] != pending_status():
 
                 # pass the message to the handler
                 self._request_handlers[correlation_id](message['payload'])
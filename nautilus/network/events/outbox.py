@@ -0,0 +1,204 @@
+"""
+    This module defines the outbox used to publish the events of a service
+    only once the writes they describe have been committed.
+"""
+# external imports
+import asyncio
+import datetime
+import json
+import logging
+# local imports
+from nautilus.database import db, executor
+from nautilus.models.base import BaseModel
+from nautilus.models.fields import CharField, DateTimeField, TextField
+
+
+class OutboxEvent(BaseModel):
+    """
+        This model holds an event that was recorded along with a write and
+        has not been published yet.
+    """
+    # the action type of the event
+    action_type = CharField()
+    # the (serialized) payload of the event
+    payload = TextField()
+    # the other properties of the message (ie, the correlation id)
+    props = TextField(default='{}')
+    # when the event was recorded
+    created_at = DateTimeField(default=datetime.datetime.utcnow)
+
+
+class Outbox:
+    """
+        This class records the events of a service in the same transaction as
+        the writes they describe and publishes them in the background, in
+        batches. An event is only removed from the outbox once it was sent so
+        a crash can't lose it but it could be published more than once
+        (subscribers should expect duplicates).
+
+        Args:
+            event_broker (nautilus.network.events.consumers.KafkaBroker): The
+                broker used to publish the events.
+            batch_size (int): The maximum number of events published at once.
+            interval (float): The number of seconds to wait before looking for
+                events again when the outbox is empty (or publishing failed).
+            logger (logging.Logger): Where to report the failures to publish
+                (defaults to the logger of this module).
+    """
+
+    def __init__(self, event_broker, batch_size=100, interval=0.5, loop=None, logger=None):
+        self.event_broker = event_broker
+        self.batch_size = batch_size
+        self.interval = interval
+        self.loop = loop
+        self.logger = logger or logging.getLogger(__name__)
+        # set whenever there are new events to publish
+        self._wake = asyncio.Event(loop=loop)
+        # the background task publishing the events
+        self._task = None
+
+
+    def record(self, action_type, payload, **props):
+        """
+            This method adds an event to the outbox. It is blocking and has to
+            be called inside the transaction of the write it describes (see
+            `recorded`).
+        """
+        OutboxEvent.create(
+            action_type=action_type,
+            payload=payload,
+            props=json.dumps(props)
+        )
+
+
+    def recorded(self, function, action_type, serialize, **props):
+        """
+            This method returns a blocking function that calls the given one
+            and records its success event in the same transaction.
+
+            Args:
+                function (callable): The blocking function that performs the write.
+                action_type (str): The action type of the event.
+                serialize (callable): Returns the payload of the event given
+                    the result of the write.
+
+            Returns:
+                (callable): The function to hand to `nautilus.database.write`.
+        """
+        def write_and_record(*args, **kwds):
+            # make sure the event is only saved along with the write
+            with db.atomic():
+                # perform the write
+                result = function(*args, **kwds)
+                # record the event
+                self.record(action_type, serialize(result), **props)
+            # return the result of the write
+            return result
+
+        return write_and_record
+
+
+    def wake(self):
+        """
+            This method lets the publisher know there are new events to send.
+        """
+        self._wake.set()
+
+
+    def start(self):
+        """
+            This method starts publishing the events in the background.
+        """
+        # if we are already publishing
+        if self._task is not None:
+            # there's nothing to do
+            return
+        # publish the events until we are stopped
+        self._task = (self.loop or asyncio.get_event_loop()).create_task(self._run())
+
+
+    async def stop(self):
+        """
+            This method stops the background publisher and sends the events
+            that are left.
+        """
+        # if we are publishing in the background
+        if self._task is not None:
+            # stop
+            self._task.cancel()
+            self._task = None
+        # send what we can before we go
+        while await self.publish():
+            pass
+
+
+    async def publish(self):
+        """
+            This method sends the oldest batch of events in the outbox and
+            removes them once they were sent.
+
+            Returns:
+                (int): The number of events that were published.
+        """
+        # the oldest events (always read from the database that was written to)
+        events = await executor.run(
+            lambda: list(OutboxEvent.select().order_by(OutboxEvent.id).limit(self.batch_size))
+        )
+        # if there is nothing to send
+        if not events:
+            return 0
+
+        # the deliveries we are waiting on
+        deliveries = []
+        # for each event (in the order they were recorded)
+        for event in events:
+            # queue the event with the producer
+            delivery = await self.event_broker.send(
+                action_type=event.action_type,
+                payload=event.payload,
+                **json.loads(event.props)
+            )
+            # if the producer hands back the future of the delivery
+            if asyncio.isfuture(delivery):
+                # wait for it along with the rest of the batch
+                deliveries.append(delivery)
+        # make sure every event of the batch was delivered
+        await asyncio.gather(*deliveries, loop=self.loop)
+
+        # remove the events that were sent
+        await executor.run(
+            lambda: OutboxEvent.delete() \
+                               .where(OutboxEvent.id.in_([event.id for event in events])) \
+                               .execute()
+        )
+
+        # return the number of events that were published
+        return len(events)
+
+
+    async def _run(self):
+        # continuously loop
+        while True:
+            # we are about to look at every event recorded so far
+            self._wake.clear()
+            try:
+                # send a batch of events
+                published = await self.publish()
+            # if something went wrong (ie, the broker is unavailable)
+            except Exception:
+                # the events are still in the outbox so we'll try again later
+                self.logger.exception("Could not publish the events in the outbox.")
+                published = 0
+
+            # if the batch was full
+            if published == self.batch_size:
+                # there are probably more events waiting
+                continue
+
+            try:
+                # wait for new events (or for the next time to look)
+                await asyncio.wait_for(self._wake.wait(), self.interval, loop=self.loop)
+            # if nothing was recorded in the meantime
+            except asyncio.TimeoutError:
+                # look anyway
+                pass
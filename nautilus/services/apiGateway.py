@@ -1,4 +1,6 @@
 # external imports
+import asyncio
+import logging
 import aiohttp_cors
 from collections.abc import Callable
 from collections import defaultdict
@@ -12,16 +14,25 @@ import nautilus.network.events.consumers.api as api_handler
 from nautilus.conventions.services import api_gateway_name
 from nautilus.conventions.actions import roll_call_type
 from nautilus.conventions.actions import get_crud_action
-from nautilus.conventions.api import root_query
+from nautilus.conventions.api import root_query, root_aggregate_query, aggregate_query_name
 from nautilus.auth.util import generate_session_token, read_session_token
+from nautilus.config import Config
 from nautilus.api.endpoints import static_dir as api_endpoint_static
-from nautilus.api.util import query_for_model, arg_string_from_dict
+from nautilus.api.util import (
+    query_for_model,
+    aggregate_query_for_model,
+    structured_query_for_model,
+    arg_string_from_dict
+)
 from .service import Service
 from nautilus.api.util import GraphEntity
 from nautilus.api.util import parse_string
+from nautilus.api.subscriptions import SubscriptionRegistry
+from nautilus.api.materialized_view import MaterializedView
 from nautilus.api.endpoints import (
     GraphiQLRequestHandler,
-    GraphQLRequestHandler
+    GraphQLRequestHandler,
+    SubscriptionRequestHandler,
 )
 
 
@@ -31,6 +42,14 @@ class APIGateway(Service):
         use to query the cloud without worrying about the distributed nature
         of the system.
 
+        Small, read-heavy models can be replicated in the memory of the gateway
+        by listing their names in `materialized_models`. Replicated models are
+        bootstrapped with a single read when their service announces itself and
+        are kept up to date with the result of crud actions. Queries that the
+        replica cannot answer fall back to the remote service (as do all of
+        the queries while the replica is bootstrapped, which is tried again
+        every `materialized_view_retry_interval` seconds if it fails).
+
         Example:
 
             .. code-block:: python
@@ -50,12 +69,25 @@ class APIGateway(Service):
     action_handler = api_handler.APIActionHandler
     _external_service_data = defaultdict(list)
     secret_key = None
+    subscription_buffer_size = 100
+    materialized_models = []
+    materialized_view_max_records = 10000
+    materialized_view_retry_interval = 30
 
     def __init__(self, *args, **kwds):
         # bubble up
         super().__init__(*args, **kwds)
         # attach this service to the action handler
         self.action_handler.service = self
+        # keep track of the clients subscribed to record changes
+        self.subscriptions = SubscriptionRegistry(
+            buffer_size=self.config.get('subscription_buffer_size', self.subscription_buffer_size),
+            loop=self.loop,
+            fetch=self._fetch_record,
+            authorize=self._authorize_record
+        )
+        # the local replicas of remote models
+        self.materialized_views = {}
         # do any sort of database setup
         self.init_db()
         # make sure there is a valid secret key
@@ -69,7 +101,10 @@ class APIGateway(Service):
         # get the database url from the configuration
         db_url = self.config.get('database_url', 'sqlite:///passwords.db')
         # configure the nautilus database to the url
-        nautilus.database.init_db(db_url)
+        nautilus.database.init_db(
+            db_url,
+            **nautilus.database.database_options(self.config)
+        )
 
 
     # when its time for the service to announce itself
@@ -140,6 +175,11 @@ class APIGateway(Service):
         # add the graphiql endpoint
         self.add_http_endpoint('/graphiql', GraphiQLRequestHandler)
 
+        # add the subscription reference to the websocket handler
+        SubscriptionRequestHandler.service = self
+        # add the websocket endpoint for subscriptions
+        self.add_http_endpoint('/subscriptions', SubscriptionRequestHandler)
+
 
     async def login_user(self, password, **kwds):
         """
@@ -148,10 +188,10 @@ class APIGateway(Service):
         # find the matching user with the given email
         user_data = (await self._get_matching_user(fields=list(kwds.keys()), **kwds))['data']
         try:
-            # look for a matching entry in the local database
-            passwordEntry = self.model.select().where(
+            # look for a matching entry in the local database (without blocking the loop)
+            passwordEntry = (await nautilus.database.executor.run(list, self.model.select().where(
                 self.model.user == user_data[root_query()][0]['pk']
-            )[0]
+            )))[0]
         # if we couldn't acess the id of the result
         except (KeyError, IndexError) as e:
             # yell loudly
@@ -190,7 +230,7 @@ class APIGateway(Service):
         match_query = self.model.user == user['id']
 
         # if the user has already been registered
-        if self.model.select().where(match_query).count() > 0:
+        if await nautilus.database.executor.run(self.model.select().where(match_query).count) > 0:
             # yell loudly
             raise RuntimeError('The user is already registered.')
 
@@ -198,7 +238,7 @@ class APIGateway(Service):
         password = self.model(user=user['id'], password=password)
 
         # save it to the database
-        password.save()
+        await nautilus.database.executor.run(password.save)
 
         # return a dictionary with the user we created and a session token for later use
         return {
@@ -211,86 +251,201 @@ class APIGateway(Service):
         """
             This function resolves a given object in the remote backend services
         """
+        # if the request is for aggregates over a model
+        if self._aggregated_model(object_name):
+            # let the owning service compute them
+            return await self.aggregate_resolver(
+                object_name,
+                fields,
+                obey_auth=obey_auth,
+                current_user=current_user,
+                **filters
+            )
+
+        # check if an object with that name has been registered
+        registered = self._registered_model(object_name)
+        # make sure we can ask for the fields (and that we include the id in the request)
+        fields = self._requested_fields(registered, fields)
+
+        # the local replica of the model
+        view = self.materialized_views.get(object_name)
+
+        # if the replica can resolve the request
+        if view and view.can_serve(fields, filters):
+            # use the local records
+            result = view.query(fields, **filters)
+        # otherwise we have to ask the remote service
+        else:
+            result = await self._read_remote_objects(object_name, fields, **filters)
 
-        try:
-            # check if an object with that name has been registered
-            registered = [model for model in self._external_service_data['models'] \
-                                if model['name']==object_name][0]
-        # if there is no connection data yet
-        except AttributeError:
-            raise ValueError("No objects are registered with this schema yet.")
-        # if we dont recognize the model that was requested
-        except IndexError:
-            raise ValueError("Cannot query for object {} on this service.".format(object_name))
-
-        # the valid fields for this object
-        valid_fields = [field['name'] for field in registered['fields']]
+        # apply the auth handler to the result
+        return await self._apply_auth(object_name, result, obey_auth=obey_auth, current_user=current_user)
 
-        # figure out if any invalid fields were requested
-        invalid_fields = [field for field in fields if field not in valid_fields]
-        try:
-            # make sure we never treat pk as invalid
-            invalid_fields.remove('pk')
-        # if they weren't asking for pk as a field
-        except ValueError:
-            pass
 
-        # if there were
-        if invalid_fields:
-            # yell loudly
-            raise ValueError("Cannot query for fields {!r} on {}".format(
-                invalid_fields, registered['name']
-            ))
+    async def fused_resolver(self, connection_name, object, fields, obey_auth=False, current_user=None, **filters):
+        """
+            This method resolves the records connected to the given object
+            with a single question: the connection service passes the ids it
+            finds straight to the service that owns the connected model, which
+            replies to the gateway. Connections that can't be read this way
+            (or whose records are replicated locally) fall back to asking for
+            the ids and then the records.
 
-        # make sure we include the id in the request
-        fields.append('pk')
+            Returns:
+                (list of dict, str): The connected records and the name of
+                    their model.
+        """
+        # the connection and the model it leads to
+        expected, to_service = self._connection_summary(connection_name, object['name'])
+        # the summary of the connected model
+        registered = self._registered_model(to_service)
+        # make sure we can ask for the fields (and that we include the id in the request)
+        fields = self._requested_fields(registered, fields)
+
+        # the local replica of the connected model
+        view = self.materialized_views.get(to_service)
+        # if the connection can't pass its results along or the records are available locally
+        if not expected.get('chained_read') or not registered.get('structured_read') \
+                or (view and view.can_serve(fields, dict(filters, pk_in=[]))):
+            # walk the connection
+            ids, _ = await self.connection_resolver(connection_name, object)
+            # resolve the connected records (if there are any)
+            result = await self.object_resolver(
+                to_service,
+                fields,
+                obey_auth=obey_auth,
+                current_user=current_user,
+                pk_in=ids,
+                **filters
+            ) if ids else []
+            # we're done
+            return result, to_service
+
+        # ask for the entries connected to the object
+        query = structured_query_for_model([to_service], **{object['name']: object['pk']})
+        # and pass the ids along to the owner of the connected model
+        query['then'] = {
+            'action_type': get_crud_action('read', to_service),
+            'column': to_service,
+            'query': structured_query_for_model(fields, **filters),
+        }
 
-        # the query for model records
-        query = query_for_model(fields, **filters)
+        # ask the connection service (the reply comes from whoever answers last)
+        response = json.loads(await self.event_broker.ask(
+            action_type=get_crud_action('read', expected['name']),
+            payload=query
+        ))
 
-        # the action type for the question
-        action_type = get_crud_action('read', object_name)
+        # if something went wrong
+        if 'errors' in response and response['errors']:
+            # yell loudly
+            raise ValueError(','.join(response['errors']))
 
-        # query the appropriate stream for the information
-        response = await self.event_broker.ask(
-            action_type=action_type,
-            payload=query
+        # apply the auth handler to the connected records
+        result = await self._apply_auth(
+            to_service,
+            response['data'][root_query()],
+            obey_auth=obey_auth,
+            current_user=current_user
         )
+        # return the records along with their model
+        return result, to_service
 
-        # treat the reply like a json object
-        response_data = json.loads(response)
 
-        # if something went wrong
-        if 'errors' in response_data and response_data['errors']:
-            # return an empty response
-            raise ValueError(','.join(response_data['errors']))
+    async def aggregate_resolver(self, object_name, fields, obey_auth=False, current_user=None, **filters):
+        """
+            This function resolves aggregates (counts, sums, bounds) over the
+            records of a remote model. The aggregates are computed by the
+            service that owns the model so only the summarized values travel
+            over the wire. Since auth criteria are checked one record at a
+            time, models with auth criteria cannot be aggregated through the
+            gateway (their records have to be queried instead).
+        """
+        # find the model being aggregated
+        registered = self._aggregated_model(object_name)
 
-        # grab the valid list of matches
-        result = response_data['data'][root_query()]
+        # if we dont recognize the model that was requested
+        if not registered:
+            raise ValueError("Cannot query for object {} on this service.".format(object_name))
 
-        # grab the auth handler for the object
-        auth_criteria = self.auth_criteria.get(object_name)
+        # the name of the model
+        model_name = registered['name']
 
         # if we care about auth requirements and there is one for this object
-        if obey_auth and auth_criteria:
+        if obey_auth and self.auth_criteria.get(model_name):
+            # the criteria are evaluated per record which we never see
+            raise ValueError(
+                "Cannot aggregate {} since it has auth criteria (which are checked for "
+                "each record). Query the records instead.".format(model_name)
+            )
 
-            # build a second list of authorized entries
-            authorized_results = []
+        # the query for the aggregates
+        query = aggregate_query_for_model(fields, **filters)
+        # ask the remote service for the aggregates
+        return await self._remote_read(model_name, query, root_aggregate_query())
 
-            # for each query result
-            for query_result in result:
-                # create a graph entity for the model
-                graph_entity = GraphEntity(self, model_type=object_name, id=query_result['pk'])
-                # if the auth handler passes
-                if await auth_criteria(model=graph_entity, user_id=current_user):
-                    # add the result to the final list
-                    authorized_results.append(query_result)
 
-            # overwrite the query result
-            result = authorized_results
+    def materialize(self, summary):
+        """
+            This method starts replicating the model described by the given
+            service summary if it was designated as a materialized model.
+        """
+        # the name of the model
+        name = summary.get('name')
+        # the models to replicate
+        materialized_models = self.config.get('materialized_models', self.materialized_models)
+
+        # if the model isn't one we replicate or we already have a view
+        if name not in materialized_models or 'fields' not in summary \
+                                           or name in self.materialized_views:
+            # there's nothing to do
+            return
+
+        # the fields of the model
+        fields = [field['name'] for field in summary['fields']]
+
+        # create a view for the model
+        view = MaterializedView(
+            name=name,
+            fields=fields,
+            max_records=self.config.get(
+                'materialized_view_max_records',
+                self.materialized_view_max_records
+            )
+        )
+        # save it so it starts buffering changes
+        self.materialized_views[name] = view
+
+        # the coroutine to fill the view
+        async def fetch():
+            return await self._read_remote_objects(name, fields + ['pk'])
+
+        # the coroutine that fills the view (and tries again if it can't)
+        async def bootstrap():
+            try:
+                # fill the view
+                await view.bootstrap(fetch)
+            # if the records could not be loaded
+            except Exception:
+                # the number of seconds to wait before trying again
+                interval = self.config.get(
+                    'materialized_view_retry_interval',
+                    self.materialized_view_retry_interval
+                )
+                # let someone know that queries fall back to the service in the meantime
+                logging.getLogger(self.name).exception(
+                    "Could not bootstrap the materialized view of %s, trying again in %s seconds.",
+                    name,
+                    interval
+                )
+                # forget the view so it can be created again
+                self.materialized_views.pop(name, None)
+                # try again later
+                await asyncio.sleep(interval)
+                self.materialize(summary)
 
-        # apply the auth handler to the result
-        return result
+        # fill the view without blocking the action handler
+        return self.loop.create_task(bootstrap())
 
 
     def user_session(self, user):
@@ -304,31 +459,25 @@ class APIGateway(Service):
 
 
     async def connection_resolver(self, connection_name, object):
+        # the connection and the model it leads to
+        expected, to_service = self._connection_summary(connection_name, object['name'])
 
-        try:
-            # grab the recorded data for this connection
-            expected = [ conn for conn in self._external_service_data['connections']\
-                              if conn['name'] == connection_name][0]
-        # if there is no connection data yet
-        except AttributeError:
-            raise ValueError("No objects are registered with this schema yet.")
-        # if we dont recognize the model that was requested
-        except IndexError:
-            raise ValueError("Cannot query for {} on {}.".format(connection_name, object['name']))
-
-        # the target of the connection
-        to_service = expected['connection']['to']['service']
-
-        # ask for only the entries connected to the object
+        # ask for only the entries connected to the object (the connection
+        # service indexes both columns so either direction is a lookup)
         filters = {object['name']: object['pk']}
         # the field of the connection is the model name
         fields = [to_service]
 
-        # the query for model records
-        query = query_for_model(fields, **filters).replace("'", '"')
+        # if the connection service can resolve structured reads
+        if expected.get('structured_read'):
+            # skip the graphql round trip
+            query = structured_query_for_model(fields, **filters)
+        # otherwise build the query for model records
+        else:
+            query = query_for_model(fields, **filters).replace("'", '"')
 
-        # the action type for the question
-        action_type = get_crud_action('read', connection_name)
+        # the action type for the question (the connection service answers to its own name)
+        action_type = get_crud_action('read', expected['name'])
 
         # get the service name for the connection
         response = json.loads(await self.event_broker.ask(
@@ -347,6 +496,104 @@ class APIGateway(Service):
         return ids, to_service
 
 
+    async def traversal_resolver(self, connection_names, object_name, pks, obey_auth=False, current_user=None):
+        """
+            This method walks a chain of connections from the given records
+            with as few questions as possible. Connection services that
+            support traversals walk every connection they hold (joining the ones
+            that live side by side) for all of the records at once, the others
+            are asked about each record in turn.
+
+            Returns:
+                (list of tuples, list of str): The ids along each path through
+                    the chain and the name of the model at each step.
+        """
+        # the summary of each connection and the model it leads to
+        steps = []
+        # for each connection in the chain
+        for connection_name in connection_names:
+            # add the step (starting where the previous one left off)
+            steps.append(self._connection_summary(
+                connection_name,
+                steps[-1][1] if steps else object_name
+            ))
+        # the name of the model at each step
+        targets = [target for _, target in steps]
+
+        # start with a path for each record
+        paths = [(pk,) for pk in pks]
+        # the connection to walk next
+        index = 0
+        # while there are connections left to walk (and paths to extend)
+        while index < len(steps) and paths:
+            # the summary of the connection
+            expected = steps[index][0]
+            # the records at the end of the current paths
+            frontier = _unique([path[-1] for path in paths])
+
+            # if the connection service can walk the rest of the chain
+            if expected.get('traversal'):
+                # ask it for the paths starting at the frontier
+                response = json.loads(await self.event_broker.ask(
+                    action_type=get_crud_action('traverse', expected['name']),
+                    payload={'ids': frontier, 'hops': connection_names[index:]}
+                ))
+                # if something went wrong
+                if response['errors']:
+                    # yell loudly
+                    raise ValueError(','.join(response['errors']))
+                # the segments of the paths
+                segments = response['data']
+                # the number of connections that were walked
+                resolved = max(1, response['resolved'])
+
+            # otherwise we have to ask about each record
+            else:
+                # the segments of the paths
+                segments = []
+                # for each record at the end of the paths
+                for pk in frontier:
+                    # walk the connection from the record
+                    ids, _ = await self.connection_resolver(
+                        connection_names[index],
+                        {'name': targets[index - 1] if index else object_name, 'pk': pk}
+                    )
+                    # add a segment for each connected record
+                    segments.extend([pk, connected] for connected in ids)
+                # we walked a single connection
+                resolved = 1
+
+            # the rest of each segment by where it starts
+            continuations = {}
+            for segment in segments:
+                continuations.setdefault(str(segment[0]), []).append(
+                    tuple(int(pk) for pk in segment[1:])
+                )
+            # extend the paths through the segments
+            paths = [path + rest for path in paths for rest in continuations.get(str(path[-1]), [])]
+
+            # move past the connections we walked
+            index += resolved
+
+            # for each intermediate model we just walked through
+            for step in range(index - resolved, min(index, len(steps) - 1)):
+                # if we care about auth requirements and there is one for the model
+                if obey_auth and self.auth_criteria.get(targets[step]):
+                    # the records the user is allowed to see
+                    allowed = {str(record['pk']) for record in await self.object_resolver(
+                        targets[step],
+                        [],
+                        obey_auth=obey_auth,
+                        current_user=current_user,
+                        pk_in=_unique([path[step + 1] for path in paths])
+                    )}
+                    # only keep the paths through them
+                    paths = [path for path in paths if str(path[step + 1]) in allowed]
+
+        # return the complete paths
+        return [path for path in paths if len(path) == len(steps) + 1], targets
+
+
     async def mutation_resolver(self, mutation_name, args, fields):
         """
             the default behavior for mutations is to look up the event,
@@ -403,11 +650,229 @@ class APIGateway(Service):
         return generate_session_token(self.secret_key, **user_session)
 
 
+    def current_user(self, headers):
+        """
+            This method returns the session of the user making a request with
+            the given headers (None if the request is anonymous).
+        """
+        # the authorization header value
+        auth_header = headers.get('Authorization')
+        # the name of the token method
+        method = 'Bearer'
+        # only accept bearer tokens
+        if not auth_header or method not in auth_header:
+            return None
+        # pull the session token out from the header value
+        session_token = auth_header.replace(method, '').strip()
+        # create a config object from the current user session
+        return Config(self._read_session_token(session_token))
+
+
     def _read_session_token(self, token):
         # make sure the token is valid while we're at it
         return read_session_token(self.secret_key, token)
 
 
+    def _requested_fields(self, registered, fields):
+        """
+            This method makes sure the given fields can be asked of the
+            registered model and returns them along with the primary key.
+        """
+        # the valid fields for this object
+        valid_fields = [field['name'] for field in registered['fields']]
+
+        # figure out if any invalid fields were requested
+        invalid_fields = [field for field in fields if field not in valid_fields]
+        # make sure we never treat pk or the pagination cursor as invalid
+        invalid_fields = [field for field in invalid_fields if field not in ('pk', 'cursor')]
+
+        # if there were
+        if invalid_fields:
+            # yell loudly
+            raise ValueError("Cannot query for fields {!r} on {}".format(
+                invalid_fields, registered['name']
+            ))
+
+        # make sure we include the id in the request
+        fields.append('pk')
+        # return the fields to ask for
+        return fields
+
+
+    async def _apply_auth(self, object_name, result, obey_auth=False, current_user=None):
+        """
+            This method removes the records the current user is not allowed to
+            see according to the auth criteria of the model (if there is one).
+        """
+        # grab the auth handler for the object
+        auth_criteria = self.auth_criteria.get(object_name)
+
+        # if we don't care about auth requirements or there isn't one for this object
+        if not obey_auth or not auth_criteria:
+            # the result is fine as is
+            return result
+
+        # build a second list of authorized entries
+        authorized_results = []
+
+        # for each query result
+        for query_result in result:
+            # if the auth handler passes
+            if await self._authorize_record(object_name, query_result, current_user):
+                # add the result to the final list
+                authorized_results.append(query_result)
+
+        # return the authorized entries
+        return authorized_results
+
+
+    async def _authorize_record(self, object_name, record, current_user=None):
+        """
+            This method returns wether the current user is allowed to see the
+            given serialized record according to the auth criteria of the
+            model. Records that can't be checked (ie, they were removed) are
+            not allowed.
+        """
+        # grab the auth handler for the object
+        auth_criteria = self.auth_criteria.get(object_name)
+        # if there isn't one
+        if not auth_criteria:
+            # anyone can see the record
+            return True
+
+        try:
+            # create a graph entity for the record
+            graph_entity = GraphEntity(
+                self,
+                model_type=object_name,
+                id=record.get('pk', record.get('id'))
+            )
+            # check the record against the criteria
+            return bool(await auth_criteria(model=graph_entity, user_id=current_user))
+        # if the record couldn't be checked
+        except Exception:
+            # don't show it
+            return False
+
+
+    async def _fetch_record(self, object_name, pk):
+        """
+            This method loads every field of the designated record (ie, to
+            complete a change that only carried the fields that changed).
+        """
+        # the summary of the model
+        registered = self._registered_model(object_name)
+        # ask for every field of the record
+        records = await self._read_remote_objects(
+            object_name,
+            [field['name'] for field in registered['fields']] + ['pk'],
+            pk=pk
+        )
+        # return the record if we found it
+        return records[0] if records else None
+
+
+    def _connection_summary(self, connection_name, object_name):
+        """
+            This method returns the summary of the given connection along with
+            the name of the model it leads to (in either direction).
+        """
+        try:
+            # grab the recorded data for this connection (in either direction)
+            expected = [ conn for conn in self._external_service_data['connections']\
+                              if conn['name'] == connection_name \
+                                or conn.get('reverse', {}).get('name') == connection_name][0]
+        # if there is no connection data yet
+        except AttributeError:
+            raise ValueError("No objects are registered with this schema yet.")
+        # if we dont recognize the model that was requested
+        except IndexError:
+            raise ValueError("Cannot query for {} on {}.".format(connection_name, object_name))
+
+        # if we are walking the connection from its source
+        if expected['name'] == connection_name:
+            # the target of the connection
+            return expected, expected['connection']['to']['service']
+        # otherwise we are walking back from the target
+        return expected, expected['connection']['from']['service']
+
+
+    def _registered_model(self, object_name):
+        """
+            This method returns the summary of the remote model with the given name.
+        """
+        try:
+            # check if an object with that name has been registered
+            return [model for model in self._external_service_data['models'] \
+                                if model['name']==object_name][0]
+        # if there is no connection data yet
+        except (AttributeError, KeyError):
+            raise ValueError("No objects are registered with this schema yet.")
+        # if we dont recognize the model that was requested
+        except IndexError:
+            raise ValueError("Cannot query for object {} on this service.".format(object_name))
+
+
+    def _aggregated_model(self, object_name):
+        """
+            This method returns the summary of the remote model whose aggregates
+            are designated by the given name (or None if there is no such model).
+        """
+        # look for the model whose aggregates match the name
+        for model in self._external_service_data.get('models', []):
+            # if the name designates the aggregates of the model
+            if aggregate_query_name(model['name']) == object_name:
+                # we found it
+                return model
+
+
+    async def _read_remote_objects(self, object_name, fields, **filters):
+        """
+            This method asks the service that owns the given model for the
+            matching records.
+        """
+        # the summary of the remote model
+        registered = [model for model in self._external_service_data.get('models', []) \
+                            if model['name'] == object_name]
+
+        # if the owning service can resolve structured reads
+        if registered and registered[0].get('structured_read'):
+            # skip the graphql round trip
+            query = structured_query_for_model(fields, **filters)
+        # otherwise build the query for model records
+        else:
+            query = query_for_model(fields, **filters)
+
+        # ask the remote service for the records
+        return await self._remote_read(object_name, query, root_query())
+
+
+    async def _remote_read(self, object_name, query, root):
+        """
+            This method sends the given query to the service that owns the model
+            and returns the value of the designated root field.
+        """
+        # the action type for the question
+        action_type = get_crud_action('read', object_name)
+
+        # query the appropriate stream for the information
+        response = await self.event_broker.ask(
+            action_type=action_type,
+            payload=query
+        )
+
+        # treat the reply like a json object
+        response_data = json.loads(response)
+
+        # if something went wrong
+        if 'errors' in response_data and response_data['errors']:
+            # return an empty response
+            raise ValueError(','.join(response_data['errors']))
+
+        # grab the valid list of matches
+        return response_data['data'][root]
+
+
     async def _get_matching_user(self, fields=[], **filters):
         # the action type for a remote query
         read_action = get_crud_action(method='read', model='user')
@@ -466,3 +931,9 @@ class APIGateway(Service):
         )
         # treat the reply like a json object
         return json.loads(user_data)
+
+
+def _unique(items):
+    # the items without duplicates (in order)
+    seen = set()
+    return [item for item in items if not (item in seen or seen.add(item))]
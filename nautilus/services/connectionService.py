@@ -1,10 +1,29 @@
+# external imports
+import json
 # local imports
 from nautilus.network.events import combine_action_handlers
-from nautilus.network.events.actionHandlers import noop_handler
-from nautilus.conventions.services import connection_service_name, model_service_name
-from nautilus.conventions.actions import get_crud_action, success_status
+from nautilus.network.events.actionHandlers import noop_handler, link_handler, unlink_handler
+from nautilus.conventions.services import (
+    connection_service_name,
+    model_service_name,
+    reverse_connection_name
+)
+from nautilus.conventions.actions import (
+    get_crud_action,
+    change_action_status,
+    success_status,
+    error_status,
+    bulk_method,
+    action_records
+)
 from .modelService import ModelService
 from nautilus.models.util import create_connection_model
+from nautilus.models.bulk import delete_matching, chunks, traverse_connections
+from nautilus.database import db, executor, write, model_shards
+
+# the connections managed by the services in this process (by the name of
+# either direction) so that chains of them can be walked with a single join
+_co_located = {}
 
 class ConnectionService(ModelService):
     """
@@ -17,6 +36,20 @@ class ConnectionService(ModelService):
         a way for the api gateway to deduce the relationship between services when
         summarizing the cloud.
 
+        The connection can also be walked from the target back to the source
+        through the field designated by `reverse_name` (which defaults to
+        `nautilus.conventions.services.reverse_connection_name`).
+
+        Batches of connections can be created and removed with the `link` and
+        `unlink` actions. When a linked record is removed, the matching
+        connections are removed `cascade_chunk_size` at a time and each chunk
+        is announced with a single `delete_many` action.
+
+        A `traverse` action walks a chain of connections from a set of ids and
+        replies with every path through them. The connections managed by other
+        services in the same process are joined in the database, the
+        rest of the chain is left for the caller to resolve.
+
         Args:
             services (list of nautilus.Service): The list of services to connect.
 
@@ -40,6 +73,8 @@ class ConnectionService(ModelService):
 
     from_service = None
     to_service = None
+    reverse_name = None
+    cascade_chunk_size = 1000
 
 
     def __init__(self, **kwargs):
@@ -65,12 +100,29 @@ class ConnectionService(ModelService):
             **kwargs
         )
 
+        # the columns of the connection
+        from_column = model_service_name(self.from_service[0])
+        to_column = model_service_name(self.to_service[0])
+        # let the other connections in this process walk through this one (in either direction)
+        _co_located[self.name] = (self.model, from_column, to_column)
+        _co_located[self.reverse_name or reverse_connection_name(self)] = \
+                                                    (self.model, to_column, from_column)
+
 
     @property
     def action_handler(self):
         # create a linked handler for every service
         linked_handlers = [self._create_linked_handler(service) \
                                         for service in self._services]
+        # the handlers for batches of connections
+        batch_handlers = [
+            link_handler(self.model, name=self.name),
+            unlink_handler(self.model, name=self.name),
+        ]
+        # the handler for traversals through the connection
+        traverse_handler = self._create_traverse_handler()
+        # the service to pass to the batch handlers
+        service = self
 
         class ConnectionActionHandler(super().action_handler):
             async def handle_action(self, *args, **kwds):
@@ -82,6 +134,14 @@ class ConnectionService(ModelService):
                 # bubble up
                 await super().handle_action(*args, **kwds)
 
+                # for each batch of connections we could be asked to change
+                for handler in batch_handlers:
+                    # call the handler
+                    await handler(service, *args, **kwds)
+
+                # walk the connection if we were asked to
+                await traverse_handler(*args, **kwds)
+
                 # for each service we care about
                 for handler in linked_handlers:
                     # call the handler
@@ -103,6 +163,12 @@ class ConnectionService(ModelService):
                         'service': model_service_name(self.to_service[0]),
                     }
                 },
+                # the connection can be walked backwards (the target column is indexed)
+                'reverse': {
+                    'name': self.reverse_name or reverse_connection_name(self),
+                },
+                # chains of connections can be walked with a single action
+                'traversal': True,
                 **extra_fields
             }
         except Exception as e:
@@ -110,8 +176,11 @@ class ConnectionService(ModelService):
 
 
     def _create_linked_handler(self, model):
-        # the related action type
-        related_action_type = get_crud_action('delete', model, status=success_status())
+        # the related action types (single and bulk deletes)
+        related_action_types = {
+            get_crud_action(method, model, status=success_status()): method \
+                for method in ('delete', bulk_method('delete'))
+        }
         # the action handler
         async def action_handler(action_type, payload, notify=True, **kwds):
             """
@@ -119,22 +188,142 @@ class ConnectionService(ModelService):
                 connection db.
             """
             # if the action designates a successful delete of the model
-            if action_type == related_action_type:
-                # the id of the deleted model
-                related_id = payload['id']
+            if action_type in related_action_types:
+                # make sure we are looking at the payload as a dictionary
+                if isinstance(payload, str):
+                    payload = json.loads(payload)
+                # the ids of the deleted records
+                related_ids = [
+                    record.get('pk', record.get('id')) for record in \
+                        action_records(related_action_types[action_type], payload)
+                ]
+                # if there is nothing to remove
+                if not related_ids:
+                    return
+
                 # the query for matching fields
-                matching_records = getattr(self.model, model_service_name(model)) == related_id
-                ids = [model.id for model in self.model.filter(matching_records)]
-                # find the matching records
-                self.model.delete().where(matching_records).execute()
-
-                # if we are supposed to notify
-                if notify:
-                    # notify of the related delete
-                    await self.event_broker.send(
-                        action_type=get_crud_action('delete', self.model, status=success_status()),
-                        payload=ids
-                    )
+                matching_records = getattr(self.model, model_service_name(model)).in_(
+                    [str(related_id) for related_id in related_ids]
+                )
+
+                # the action type of the related deletes
+                delete_action = get_crud_action(bulk_method('delete'), self.model, status=success_status())
+                # the outbox of the service (events of sharded connections are sent right away)
+                outbox = self.outbox if notify and not model_shards(self.model) else None
+
+                # remove the matching records a chunk at a time
+                while True:
+                    # if the related deletes go through the service's outbox
+                    if outbox:
+                        # record them along with the removal
+                        ids = await write(self._remove_and_record, matching_records, delete_action)
+                        # let the publisher know
+                        outbox.wake()
+                    # otherwise
+                    else:
+                        # remove the records
+                        ids = await write(
+                            delete_matching,
+                            self.model,
+                            matching_records,
+                            chunk_size=self.cascade_chunk_size
+                        )
+                    # if there was nothing left to remove
+                    if not ids:
+                        break
+
+                    # if we are supposed to notify (and didn't record the deletes already)
+                    if notify and not outbox:
+                        # for each chunk of removed records (a single statement can remove them all)
+                        for chunk in chunks(ids, self.cascade_chunk_size):
+                            # notify of the related deletes
+                            await self.event_broker.send(
+                                action_type=delete_action,
+                                payload=json.dumps({'status': 'ok', 'pk': chunk})
+                            )
+
+
+        # pass the action handler
+        return action_handler
+
+
+    def _remove_and_record(self, condition, action_type):
+        """
+            This method removes the next connections matching the condition
+            and records their deletes in the outbox in the same transaction.
+        """
+        with db.atomic():
+            # remove the records
+            ids = delete_matching(self.model, condition, chunk_size=self.cascade_chunk_size)
+            # for each chunk of removed records
+            for chunk in chunks(ids, self.cascade_chunk_size):
+                # record the related deletes
+                self.outbox.record(action_type, json.dumps({'status': 'ok', 'pk': chunk}))
+        # return the keys of the removed records
+        return ids
+
+
+    def _create_traverse_handler(self):
+        # the action type to respond to
+        traverse_action_type = get_crud_action('traverse', self.name)
+        # the action handler
+        async def action_handler(action_type, payload, props, notify=True, **kwds):
+            """
+                an action handler to walk a chain of connections starting
+                with this one.
+            """
+            # if we were not asked to walk the connection
+            if action_type != traverse_action_type:
+                return
+
+            # the props of the reply
+            message_props = {}
+            # if there was a correlation id in the request
+            if 'correlation_id' in props:
+                # make sure it ends up in the reply
+                message_props['correlation_id'] = props['correlation_id']
+
+            try:
+                # make sure we are looking at the payload as a dictionary
+                if isinstance(payload, str):
+                    payload = json.loads(payload)
+
+                # the connections we can walk (the leading ones that live in this process)
+                hops = []
+                for hop in payload['hops']:
+                    # if the connection is managed somewhere else
+                    if hop not in _co_located:
+                        # the caller will have to take it from here
+                        break
+                    # add the connection to the chain
+                    hops.append(_co_located[hop])
+
+                # if the chain doesn't start with this connection
+                if not hops or hops[0][0] is not self.model:
+                    # yell loudly
+                    raise ValueError("Traversals of %s must start with it." % self.name)
+
+                # walk the chain
+                paths = await executor.run(traverse_connections, hops, payload['ids'])
+                # the reply
+                response = {'data': paths, 'resolved': len(hops), 'errors': []}
+
+            # if something goes wrong
+            except Exception as err:
+                # reply with the error
+                response = {'data': [], 'resolved': 0, 'errors': [str(err)]}
+
+            # if we are supposed to notify
+            if notify:
+                # reply with the paths through the chain
+                await self.event_broker.send(
+                    payload=json.dumps(response),
+                    action_type=change_action_status(
+                        action_type,
+                        error_status() if response['errors'] else success_status()
+                    ),
+                    **message_props
+                )
 
 
         # pass the action handler
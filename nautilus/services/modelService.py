@@ -1,11 +1,17 @@
+# external imports
+import asyncio
+import logging
 # local imports
 import nautilus
 from nautilus.network.events import crud_handler, combine_action_handlers
 from nautilus.conventions.services import model_service_name
+from nautilus.conventions.actions import get_crud_action
 from nautilus.network.events.actionHandlers import noop_handler
 from nautilus.network.events.consumers import ActionHandler
 from nautilus.contrib.graphene_peewee import convert_peewee_field
 from nautilus.api.util.summarize_crud_mutation import summarize_crud_mutation
+from nautilus.models.versioned import is_versioned, Tombstone, VersionCounter
+from nautilus.network.events.outbox import Outbox, OutboxEvent
 from .service import Service
 
 
@@ -17,6 +23,22 @@ class ModelService(Service):
         finished (whether successfully or not). The external API is
         automatically generated to match the given model.
 
+        Besides the usual crud actions, the service answers `upsert` actions
+        (and the matching mutation) which create a record or update it if it
+        already exists in a single statement.
+
+        If the model is versioned (see `nautilus.models.Versioned`), the
+        service also answers `changes` actions (and queries) with the records
+        that changed since a given version.
+
+        If the `delta_events` config value is set, the success events of
+        creates and updates only carry the fields that changed (along with
+        the primary key and version) instead of the whole record.
+
+        If the `event_outbox` config value is set, the success events are
+        saved in the same transaction as the writes they describe and
+        published in the background (see `nautilus.network.events.Outbox`).
+
         Args:
             model (nautilus.BaseModel): The nautilus model to manage.
 
@@ -75,12 +97,32 @@ class ModelService(Service):
         )
         # initialize the database
         self.init_db()
+        # only keep track of the filters if they are going to be saved
+        if self.config.get('filter_usage_path'):
+            nautilus.database.filter_usage.enabled = True
+        # group the writes into shared transactions if asked
+        self.write_batcher = self.init_write_batcher()
+        # publish the success events through an outbox if asked
+        self.outbox = self.init_outbox()
 
 
     @property
     def action_handler(self):
+        # if we already built the handler of the service
+        if self.__dict__.get('_model_action_handler'):
+            # every caller has to share it (along with the writes it is waiting for)
+            return self._model_action_handler
+
         # create a crud handler for the model
-        model_handler = crud_handler(self.model, name=self.name)
+        model_handler = crud_handler(
+            self.model,
+            name=self.name,
+            delta_events=self.config.get('delta_events', False)
+        )
+        # the actions whose writes can be batched
+        batched_actions = {get_crud_action(method, self.name) for method in ('create', 'update', 'upsert')}
+        # the batched writes that are still being handled
+        pending_writes = set()
 
         class ModelActionHandler(super().action_handler):
 
@@ -92,21 +134,134 @@ class ModelService(Service):
                 """
                 # bubble up
                 response = await super(ModelActionHandler, inner_self).handle_action(action_type=action_type, payload=payload, props=props,**kwds)
-                # call the crud handler
+
+                # if the action is a write that will wait for its batch
+                if self.write_batcher and action_type in batched_actions:
+                    # handle the next action while the batch fills up
+                    task = self.loop.create_task(
+                        model_handler(self, action_type=action_type, payload=payload, props=props,**kwds)
+                    )
+                    # keep track of it until it is done
+                    pending_writes.add(task)
+                    task.add_done_callback(pending_writes.discard)
+                    # we're done here
+                    return
+
+                # if there are batched writes that haven't been handled yet
+                if pending_writes:
+                    # commit the writes that are waiting for their batch
+                    await self.write_batcher.flush()
+                    # make sure this action can't overtake the earlier writes (ie, reading stale data)
+                    await asyncio.wait(list(pending_writes))
+
+                # handle the action
                 await model_handler(self, action_type=action_type, payload=payload, props=props,**kwds)
 
+        # hold onto the handler for the next caller
+        self._model_action_handler = ModelActionHandler
         return ModelActionHandler
 
 
     def init_db(self):
         """
             This function configures the database used for models to make
-            the configuration parameters.
+            the configuration parameters. If `database_shard_urls` is set, the
+            records of the model are spread over those databases according
+            to `database_shard_strategy` ('hash' or 'range', along with the
+            `database_shard_ranges`).
         """
         # get the database url from the configuration
         db_url = self.config.get('database_url', 'sqlite:///nautilus.db')
-        # configure the nautilus database to the url
-        nautilus.database.init_db(db_url)
+        # the urls of the shards of the model (if its records are spread out)
+        shard_urls = self.config.get('database_shard_urls')
+
+        # configure the nautilus database to the url (or the first shard)
+        nautilus.database.init_db(
+            shard_urls[0] if shard_urls else db_url,
+            **nautilus.database.database_options(self.config)
+        )
+
+        # if the model is sharded
+        if shard_urls:
+            # route the records of the model to the shards
+            self.model._meta.shards = nautilus.database.ShardRouter.from_urls(
+                shard_urls,
+                first=nautilus.database.db.obj,
+                strategy=self.config.get('database_shard_strategy', 'hash'),
+                ranges=self.config.get('database_shard_ranges'),
+                partitioned=self.config.get('database_shard_partitions', False)
+            )
+
+
+    def init_write_batcher(self):
+        """
+            This function creates the batcher used to commit the writes of the
+            service together if `database_write_batch_size` is configured. The
+            writes of each batch are collected for at most
+            `database_write_batch_window` seconds.
+        """
+        # the maximum number of writes in a batch
+        batch_size = self.config.get('database_write_batch_size')
+        # if the writes are not supposed to be batched
+        if not batch_size:
+            # don't create a batcher
+            return None
+
+        # create the batcher
+        return nautilus.database.WriteBatcher(
+            max_batch_size=batch_size,
+            window=self.config.get('database_write_batch_window', 0.005),
+            loop=self.loop
+        )
+
+
+    def init_outbox(self):
+        """
+            This function creates the outbox used to publish the success
+            events if `event_outbox` is configured. At most
+            `event_outbox_batch_size` events are sent at once and the outbox
+            is checked every `event_outbox_interval` seconds when it's idle.
+        """
+        # if the events are supposed to be sent right away
+        if not self.config.get('event_outbox'):
+            # don't create an outbox
+            return None
+
+        # create the outbox
+        return Outbox(
+            self.event_broker,
+            batch_size=self.config.get('event_outbox_batch_size', 100),
+            interval=self.config.get('event_outbox_interval', 0.5),
+            loop=self.loop,
+            # report the failures under the name of the service
+            logger=logging.getLogger(self.name)
+        )
+
+
+    async def announce(self):
+        # bubble up
+        await super().announce()
+        # if there is an outbox
+        if self.outbox:
+            # the broker is running so we can start publishing its events
+            self.outbox.start()
+
+
+    def cleanup(self):
+        # if there are writes waiting for a batch
+        if self.write_batcher:
+            # commit them before we go
+            self.loop.run_until_complete(self.write_batcher.flush())
+        # if there is an outbox
+        if self.outbox:
+            # publish the events that are left
+            self.loop.run_until_complete(self.outbox.stop())
+        # if we are supposed to keep track of the filters that were used
+        if self.config.get('filter_usage_path'):
+            # save them for the index recommendations (see `ServiceManager`)
+            nautilus.database.filter_usage.save(self.config['filter_usage_path'])
+        # bubble up
+        super().cleanup()
 
 
     def summarize(self, **extra_fields):
@@ -126,8 +281,13 @@ class ModelService(Service):
             mutations=[
                 summarize_crud_mutation(model=self, method='create'),
                 summarize_crud_mutation(model=self, method='update'),
+                summarize_crud_mutation(model=self, method='upsert'),
                 summarize_crud_mutation(model=self, method='delete'),
             ],
+            # the service can resolve reads without parsing graphql
+            structured_read=True,
+            # the service can pass the results of a read along to another one
+            chained_read=True,
             **extra_fields
         )
 
@@ -140,4 +300,15 @@ class ModelService(Service):
             Returns:
                 (list): the models managed by the service
         """
-        return [self.model]
+        # the models of the service
+        models = [self.model]
+        # if we are keeping track of the changes to the model
+        if is_versioned(self.model):
+            # the removals and the latest versions are recorded in separate tables
+            models.extend([Tombstone, VersionCounter])
+        # if the events are published through an outbox
+        if self.outbox:
+            # it needs a table too
+            models.append(OutboxEvent)
+        # return the list
+        return models
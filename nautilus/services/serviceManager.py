@@ -7,6 +7,7 @@
 import click
 # local imports
 from ..config import Config
+from ..database import model_shards, ensure_indexes, create_indexes, recommend_indexes, FilterUsage
 
 class ServiceManager:
 
@@ -50,8 +51,16 @@ class ServiceManager:
             if models:
                 # for each model that we are managing
                 for model in models:
-                    # create the table in the database
-                    model.create_table(True)
+                    # if the records of the model are spread over several databases
+                    if model_shards(model):
+                        # create the table in every shard
+                        model_shards(model).create_table(model)
+                    # otherwise the model lives in a single database
+                    else:
+                        # create the table in the database
+                        model.create_table(True)
+                        # add any indexes declared after the table was created
+                        ensure_indexes(model)
 
                 # notify the user
                 print("Successfully created necessary database tables.")
@@ -73,8 +82,14 @@ class ServiceManager:
             if models:
                 # for each model that we are managing
                 for model in models:
-                    # create the table in the database
-                    model.drop_table(True)
+                    # if the records of the model are spread over several databases
+                    if model_shards(model):
+                        # drop the table in every shard
+                        model_shards(model).drop_table(model)
+                    # otherwise the model lives in a single database
+                    else:
+                        # create the table in the database
+                        model.drop_table(True)
 
                 # notify the user
                 print("Successfully dropped necessary database tables.")
@@ -84,6 +99,35 @@ class ServiceManager:
                 print("There are no models to drop.")
 
 
+        @group.command(help="Recommend (or create) indexes for the filters used the most.")
+        @click.option('--usage', default=None, help="The file with the recorded filter usage.")
+        @click.option('--min-count', default=100, help="The number of uses that makes a filter hot.")
+        @click.option('--create', default=False, is_flag=True, help="Create the recommended indexes.")
+        def indexes(usage, min_count, create):
+            """ Look for filters that are not backed by an index. """
+            # instantiate the service before we do anything
+            service = self.service()
+            # the usage recorded by the service
+            recorded = FilterUsage.load(usage or service.config.get('filter_usage_path', 'filter_usage.json'))
+
+            # for each model that we are managing
+            for model in getattr(service, 'get_models', lambda: [])():
+                # the indexes that would help
+                recommended = recommend_indexes(model, usage=recorded, min_count=int(min_count))
+                # for each index
+                for columns in recommended:
+                    # let the user know
+                    print("%s: %s index on (%s)" % (
+                        model._meta.db_table,
+                        'creating' if create else 'recommend',
+                        ', '.join(columns)
+                    ))
+                # if we are supposed to create the indexes
+                if create and recommended:
+                    # do so
+                    create_indexes(model, recommended)
+
+
         # save the command group to the manager
         self.group = group
 
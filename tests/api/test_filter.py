@@ -3,7 +3,13 @@ import unittest
 # local imports
 import nautilus
 import nautilus.models as models
-from nautilus.api.filter import args_for_model, filter_model
+from nautilus.api.filter import (
+    args_for_model,
+    filter_model,
+    project_model,
+    match_record,
+    aggregate_model
+)
 from ..util import MockModel
 
 class TestUtil(unittest.TestCase):
@@ -167,6 +173,280 @@ class TestUtil(unittest.TestCase):
         )
 
 
+    def test_args_have_cursor_filters(self):
+        # make sure the arguments exist for cursor pagination
+        assert self.arg_names >= {'after', 'before'}, (
+            "Generated args do not have cursor filters."
+        )
+
+
+    def test_can_paginate_with_cursor(self):
+        # grab the first page
+        first_page = filter_model(self.model, dict(first=4))
+        # use the cursor of the last record to grab the next page
+        next_page = filter_model(self.model, dict(first=4, after=first_page[-1]._cursor))
+
+        # figure out the names of the records we retrieved
+        retrieved_names = [record.name for record in next_page]
+        # the page should match the one computed with an offset
+        expected = [record.name for record in filter_model(self.model, dict(first=4, offset=4))]
+        assert retrieved_names == expected, (
+            "Got %(retrieved_names)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_can_paginate_with_cursor_and_order_by(self):
+        # the ordering to test
+        order_by = ["date", "-name"]
+        # grab the first page
+        first_page = filter_model(self.model, dict(first=4, order_by=order_by))
+        # use the cursor of the last record to grab the next page
+        next_page = filter_model(self.model, dict(
+            first=4,
+            order_by=order_by,
+            after=first_page[-1]._cursor
+        ))
+
+        # figure out the names of the records we retrieved
+        retrieved_names = [record.name for record in next_page]
+        expected = ['foo5', 'foo4', 'foo3', 'foo2']
+        assert retrieved_names == expected, (
+            "Got %(retrieved_names)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_can_paginate_before_cursor(self):
+        # grab a page in the middle of the records
+        page = filter_model(self.model, dict(first=2, offset=4))
+        # ask for the records before the first one in the page
+        previous = filter_model(self.model, dict(before=page[0]._cursor))
+
+        # figure out the names of the records we retrieved
+        retrieved_names = [record.name for record in previous]
+        expected = ['foo1', 'bar1', 'foo2', 'bar2']
+        assert retrieved_names == expected, (
+            "Got %(retrieved_names)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_can_paginate_last_before_cursor(self):
+        # grab a record in the middle of the records
+        cursor = filter_model(self.model, dict(first=1, offset=4))[0]._cursor
+        # ask for the last records before it
+        previous = filter_model(self.model, dict(last=2, before=cursor))
+
+        # figure out the names of the records we retrieved
+        retrieved_names = [record.name for record in previous]
+        expected = ['foo2', 'bar2']
+        assert retrieved_names == expected, (
+            "Got %(retrieved_names)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_can_paginate_first_before_cursor(self):
+        # grab a record in the middle of the records
+        cursor = filter_model(self.model, dict(first=1, offset=4))[0]._cursor
+        # ask for the first records before it
+        previous = filter_model(self.model, dict(first=2, before=cursor))
+
+        # figure out the names of the records we retrieved
+        retrieved_names = [record.name for record in previous]
+        expected = ['foo1', 'bar1']
+        assert retrieved_names == expected, (
+            "Got %(retrieved_names)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_can_paginate_backwards_from_last_page(self):
+        # grab the last records along with their cursors
+        last_page = filter_model(self.model, dict(last=2))
+        # ask for the records before the earliest of them
+        previous = list(project_model(
+            self.model,
+            dict(last=2, before=last_page[-1]._cursor),
+            ['name']
+        ))
+
+        # figure out the names of the records we retrieved
+        retrieved_names = [record['name'] for record in previous]
+        expected = ['foo9', 'bar9']
+        assert retrieved_names == expected, (
+            "Got %(retrieved_names)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_cannot_combine_first_and_last(self):
+        # grab a cursor in the middle of the records
+        cursor = filter_model(self.model, dict(first=1, offset=4))[0]._cursor
+        # make sure the page can't be both the first and the last records
+        self.assertRaises(ValueError, filter_model, self.model, dict(first=2, last=2))
+        self.assertRaises(ValueError, filter_model, self.model, dict(first=2, last=2, after=cursor))
+
+
+    def test_cursor_must_match_ordering(self):
+        # grab a cursor for the default ordering
+        cursor = filter_model(self.model, dict(first=1))[0]._cursor
+        # make sure it can't be used with a different ordering
+        self.assertRaises(ValueError, filter_model, self.model, dict(order_by=['name'], after=cursor))
+
+        # grab a cursor for a descending ordering
+        cursor = filter_model(self.model, dict(first=1, order_by=['-name']))[0]._cursor
+        # make sure it can't be used in the other direction
+        self.assertRaises(ValueError, filter_model, self.model, dict(order_by=['name'], after=cursor))
+
+
+    def test_args_have_operator_filters(self):
+        # the filters we would expect for the name field
+        expected = {'name_' + operator for operator in \
+                        ['gt', 'gte', 'lt', 'lte', 'ne', 'isnull', 'contains', 'startswith']}
+        # make sure the arguments exist for the operators
+        assert self.arg_names >= expected, (
+            "Generated args do not have operator filters."
+        )
+
+
+    def test_can_filter_by_comparison(self):
+        # filter the models with a range of primary keys
+        records_filtered = filter_model(self.model, dict(pk_gt=2, pk_lte=4))
+
+        # figure out the names of the records we retrieved
+        retrieved_names = [record.name for record in records_filtered]
+        expected = ['foo2', 'bar2']
+        assert retrieved_names == expected, (
+            "Got %(retrieved_names)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_can_filter_by_text_operators(self):
+        # filter the models by the start of their name
+        starts_with = {record.name for record in filter_model(self.model, dict(name_startswith='FOO1'))}
+        # make sure we got the right records
+        assert starts_with == {'foo1', 'foo10'}, (
+            "Got %s instead of {'foo1', 'foo10'}" % starts_with
+        )
+
+        # filter the models by part of their name
+        contains = {record.name for record in filter_model(self.model, dict(name_contains='r1'))}
+        # make sure we got the right records
+        assert contains == {'bar1', 'bar10'}, (
+            "Got %s instead of {'bar1', 'bar10'}" % contains
+        )
+
+
+    def test_can_filter_by_null(self):
+        # add a record without a date
+        self.model(name='baz').save()
+
+        # filter the models without a date
+        retrieved_names = [record.name for record in filter_model(self.model, dict(date_isnull=True))]
+        # make sure we only got the new record
+        assert retrieved_names == ['baz'], (
+            "Got %(retrieved_names)s instead of ['baz']" % locals()
+        )
+        # make sure the opposite filter leaves it out
+        assert len(filter_model(self.model, dict(date_isnull=False, date_ne='foo'))) == 10, (
+            "Negated null filter did not return the right records."
+        )
+
+
+    def test_unknown_filter_raises(self):
+        # make sure filtering by a field that doesn't exist yells
+        self.assertRaises(ValueError, filter_model, self.model, dict(color_gt='red'))
+
+
+    def test_match_record_supports_operators(self):
+        # a serialized record to match against
+        record = {'id': 3, 'name': 'Foo', 'date': None}
+
+        # make sure the record satisfies the matching filters
+        assert match_record(record, dict(pk_gte='3', name_startswith='f', date_isnull=True)), (
+            "Record did not match the operator filters."
+        )
+        # and not the others
+        assert not match_record(record, dict(pk_lt=3)), (
+            "Record matched a failing comparison."
+        )
+        assert not match_record(record, dict(name_ne='Foo')), (
+            "Record matched a failing negation."
+        )
+
+
+    def test_can_project_fields(self):
+        # filter the models while only asking for their name
+        records_filtered = filter_model(self.model, dict(first=2), ['name'])
+
+        # make sure the records are produced lazily
+        assert not isinstance(records_filtered, list), (
+            "Projected records were loaded all at once."
+        )
+        # the values loaded for each record
+        retrieved = [vars(record) for record in records_filtered]
+        expected = [{'id': 1, 'name': 'foo1'}, {'id': 2, 'name': 'bar1'}]
+        assert retrieved == expected, (
+            "Got %(retrieved)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_match_record_agrees_with_the_database(self):
+        # a record with an empty value and a flag
+        record = {'id': 1, 'name': None, 'active': False}
+        # make sure empty values are not different from anything (like sql)
+        assert not match_record(record, dict(name_ne='foo')), (
+            "Empty value satisfied a not equal filter."
+        )
+        # make sure flags passed as strings are parsed
+        assert match_record(record, dict(active='false')) and \
+                    not match_record(record, dict(active='true')), (
+            "Flag filter was not parsed."
+        )
+        assert not match_record(record, dict(name_isnull='false')), (
+            "Null check was not parsed."
+        )
+
+
+    def test_project_model_matches_filter_model(self):
+        # the filters to test
+        filters = dict(name_startswith='bar', order_by=['-name'], first=3)
+        # project the records into dictionaries
+        projected = list(project_model(self.model, filters, ['pk', 'cursor']))
+        # and filter the model like usual
+        expected = [{'pk': record.id, 'cursor': record._cursor} \
+                            for record in filter_model(self.model, filters)]
+
+        # make sure the two agree
+        assert projected == expected, (
+            "Got %(projected)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_can_count_filtered_records(self):
+        # count the records matching a filter
+        result = aggregate_model(self.model, dict(name_startswith='foo'), ['count'])
+        # make sure we got a single row with the count
+        assert result == [{'count': 10}], (
+            "Got %s instead of [{'count': 10}]" % result
+        )
+
+
+    def test_can_group_aggregates(self):
+        # compute aggregates for each date
+        result = aggregate_model(self.model, dict(group_by=['date']), ['count', 'max_id', 'min_name'])
+
+        # the expected aggregates (the foo records were saved first)
+        expected = [
+            {'date': 'bar', 'count': 10, 'max_id': 19, 'min_name': 'foo1'},
+            {'date': 'foo', 'count': 10, 'max_id': 20, 'min_name': 'bar1'},
+        ]
+        assert result == expected, (
+            "Got %(result)s instead of %(expected)s" % locals()
+        )
+
+
+    def test_cannot_group_by_unknown_field(self):
+        # make sure grouping by a field that doesn't exist yells
+        self.assertRaises(ValueError, aggregate_model, self.model, dict(group_by=['color']))
+
+
     def _gen_testdata(self):
         # some test records
         for i in range(10):
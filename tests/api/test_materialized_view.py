@@ -0,0 +1,189 @@
+# external imports
+import unittest
+# local imports
+from nautilus.api.materialized_view import MaterializedView
+from nautilus.conventions.actions import get_crud_action
+from ..util import async_test
+
+
+class TestUtil(unittest.TestCase):
+
+    def setUp(self):
+        # create a view to test against
+        self.view = MaterializedView(name='recipe', fields=['id', 'name'], max_records=3)
+
+
+    @async_test
+    async def test_bootstrap_and_query(self):
+        # fill the view with a few records
+        await self.view.bootstrap(self._fetch([
+            {'pk': 1, 'id': 1, 'name': 'foo'},
+            {'pk': 2, 'id': 2, 'name': 'bar'},
+        ]))
+
+        # make sure the view can resolve the query
+        assert self.view.can_serve(['name', 'pk'], {'name_in': ['foo']}), (
+            "View could not serve a query for replicated fields."
+        )
+        # make sure we get the right records
+        assert self.view.query(['name', 'pk'], name_in=['foo']) == [{'name': 'foo', 'pk': '1'}], (
+            "View did not filter the records correctly."
+        )
+        assert self.view.query(['pk'], last=1) == [{'pk': '2'}], (
+            "View did not segment the records correctly."
+        )
+        assert self.view.query(['pk'], order_by=['-name']) == [{'pk': '1'}, {'pk': '2'}], (
+            "View did not order the records correctly."
+        )
+
+
+    @async_test
+    async def test_last_walks_the_ordering_backwards(self):
+        # fill the view with a few records
+        await self.view.bootstrap(self._fetch([
+            {'pk': '1', 'name': 'b'},
+            {'pk': '2', 'name': 'a'},
+            {'pk': '3', 'name': 'c'},
+        ]))
+
+        # make sure the last records of the ordering are returned (like the database would)
+        assert self.view.query(['pk'], last=2, order_by=['name']) == [{'pk': '3'}, {'pk': '1'}], (
+            "View did not return the last records of the ordering."
+        )
+
+
+    @async_test
+    async def test_applies_changes_received_during_bootstrap(self):
+        # a change arrives before the view is ready
+        self.view.handle_action(
+            get_crud_action('update', 'recipe', status='success'),
+            {'id': 1, 'name': 'baz'}
+        )
+        # make sure the view cannot serve queries yet
+        assert not self.view.can_serve(['pk'], {}), (
+            "View served queries before it was bootstrapped."
+        )
+
+        # fill the view
+        await self.view.bootstrap(self._fetch([{'pk': 1, 'id': 1, 'name': 'foo'}]))
+
+        # make sure the pending change was applied
+        assert self.view.query(['name'], pk=1) == [{'name': 'baz'}], (
+            "View did not apply the change received during bootstrap."
+        )
+
+        # remove the record
+        self.view.handle_action(
+            get_crud_action('delete', 'recipe', status='success'),
+            {'status': 'ok', 'pk': 1}
+        )
+        # make sure the view is empty
+        assert self.view.query(['name']) == [], (
+            "View did not apply the delete."
+        )
+
+
+    @async_test
+    async def test_bootstrap_with_string_keys(self):
+        # fill the view the way remote reads return the records (with string keys)
+        await self.view.bootstrap(self._fetch([
+            {'pk': '1', 'id': '1', 'name': 'foo'},
+            {'pk': '2', 'id': '2', 'name': 'bar'},
+        ]))
+
+        # update one of them and create another (actions carry integer keys)
+        self.view.handle_action(
+            get_crud_action('update', 'recipe', status='success'),
+            {'id': 1, 'name': 'baz'}
+        )
+        self.view.handle_action(
+            get_crud_action('create', 'recipe', status='success'),
+            {'id': 10, 'name': 'qux'}
+        )
+        # make sure the update replaced the bootstrapped record
+        assert self.view.query(['pk', 'name']) == [
+            {'pk': '1', 'name': 'baz'},
+            {'pk': '2', 'name': 'bar'},
+            {'pk': '10', 'name': 'qux'},
+        ], (
+            "View did not apply the change to the bootstrapped record."
+        )
+
+        # remove the bootstrapped record
+        self.view.handle_action(
+            get_crud_action('delete', 'recipe', status='success'),
+            {'status': 'ok', 'pk': 2}
+        )
+        # make sure it is gone
+        assert self.view.query(['pk'], last=2) == [{'pk': '10'}, {'pk': '1'}], (
+            "View did not apply the delete to the bootstrapped record."
+        )
+
+
+    @async_test
+    async def test_disables_when_too_big(self):
+        # fill the view with more records than it can hold
+        await self.view.bootstrap(self._fetch([{'pk': pk} for pk in range(4)]))
+
+        # make sure the view gave up
+        assert self.view.disabled and not self.view.can_serve(['pk'], {}), (
+            "View did not disable itself when exceeding its limit."
+        )
+
+
+    def test_cannot_serve_unknown_fields(self):
+        # pretend the view is ready
+        self.view.ready = True
+        # make sure the view does not claim fields it doesn't have
+        assert not self.view.can_serve(['description'], {}), (
+            "View claimed to serve a field it does not replicate."
+        )
+        assert not self.view.can_serve(['name'], {'description': 'foo'}), (
+            "View claimed to serve a filter it does not replicate."
+        )
+
+
+    @async_test
+    async def test_applies_bulk_changes(self):
+        # fill the view
+        await self.view.bootstrap(self._fetch([{'pk': 1, 'id': 1, 'name': 'foo'}]))
+
+        # create a batch of records
+        self.view.handle_action(
+            get_crud_action('create_many', 'recipe', status='success'),
+            [{'id': 2, 'name': 'bar'}, {'id': 3, 'name': 'baz'}]
+        )
+        # remove some of them
+        self.view.handle_action(
+            get_crud_action('delete_many', 'recipe', status='success'),
+            {'status': 'ok', 'pk': [1, 3]}
+        )
+
+        # make sure the view has the right records
+        assert self.view.query(['name']) == [{'name': 'bar'}], (
+            "View did not apply the bulk changes."
+        )
+
+
+    @async_test
+    async def test_applies_deltas(self):
+        # fill the view
+        await self.view.bootstrap(self._fetch([{'pk': 1, 'id': 1, 'name': 'foo'}]))
+
+        # change the name of the record with a delta
+        self.view.handle_action(
+            get_crud_action('update', 'recipe', status='success'),
+            {'id': 1, 'name': 'bar', '__delta__': True}
+        )
+
+        # make sure the change was merged into the record
+        assert self.view.query(['id', 'name']) == [{'id': 1, 'name': 'bar'}], (
+            "View did not apply the delta."
+        )
+
+
+    def _fetch(self, records):
+        # a coroutine function that returns the given records
+        async def fetch():
+            return records
+        return fetch
@@ -0,0 +1,311 @@
+# external imports
+import unittest
+import json
+# local imports
+from nautilus.api.subscriptions import SubscriptionRegistry, Subscription
+from nautilus.api.endpoints.requestHandlers.subscriptions import SubscriptionRequestHandler
+from nautilus.conventions.actions import get_crud_action
+from ..util import async_test
+
+
+class MockSocket:
+    """
+        A stand-in for a websocket that records how it was closed.
+    """
+
+    def __init__(self):
+        self.closed_with = None
+
+    def send_str(self, data):
+        pass
+
+    async def close(self, message=b''):
+        self.closed_with = message
+
+
+class TestUtil(unittest.TestCase):
+
+    def test_subscription_from_query(self):
+        # create a subscription from a query string
+        subscription = Subscription.from_query('1', """
+            subscription {
+                recipe(name: "foo") {
+                    id
+                    name
+                }
+            }
+        """)
+
+        # make sure the subscription has the right values
+        assert subscription.model == 'recipe', (
+            "Subscription did not have the right model."
+        )
+        assert subscription.fields == ['id', 'name'], (
+            "Subscription did not have the right fields."
+        )
+        assert subscription.filters == {'name': 'foo'}, (
+            "Subscription did not have the right filters."
+        )
+
+
+    @async_test
+    async def test_pushes_matching_records(self):
+        # create a registry and a client
+        registry = SubscriptionRegistry()
+        socket = MockSocket()
+        connection = registry.connect(socket)
+
+        # subscribe to a subset of the recipes
+        registry.subscribe(connection, '1', 'subscription { recipe(name: "foo") { pk } }')
+
+        # publish a change to a matching and a non-matching record
+        await registry.publish(
+            get_crud_action('create', 'recipe', status='success'),
+            json.dumps({'id': 1, 'name': 'foo', 'other': 'bar'})
+        )
+        await registry.publish(
+            get_crud_action('create', 'recipe', status='success'),
+            json.dumps({'id': 2, 'name': 'bar', 'other': 'bar'})
+        )
+        # make sure only the matching record was pushed
+        assert self._buffered(connection) == [{
+            'type': 'data',
+            'id': '1',
+            'action': 'create',
+            'payload': {'pk': 1},
+        }], (
+            "Registry did not push the right deltas."
+        )
+
+
+    @async_test
+    async def test_pushes_deltas(self):
+        # the records that were loaded to check a delta
+        fetched = []
+        # load the whole record of a delta
+        async def fetch(model, pk):
+            fetched.append((model, pk))
+            return {'id': pk, 'name': 'foo', 'other': 'bar'}
+
+        # create a registry and a client
+        registry = SubscriptionRegistry(fetch=fetch)
+        socket = MockSocket()
+        connection = registry.connect(socket)
+
+        # subscribe to a subset of the recipes
+        registry.subscribe(connection, '1', 'subscription { recipe(name: "foo") { pk, other } }')
+
+        # publish a change that doesn't carry the filtered field
+        await registry.publish(
+            get_crud_action('update', 'recipe', status='success'),
+            json.dumps({'id': 1, 'other': 'baz', '__delta__': True})
+        )
+        # make sure the whole record was loaded to check the subscription
+        assert fetched == [('recipe', 1)], (
+            "Registry did not load the record of a delta it could not check."
+        )
+        # make sure only the changed fields were pushed
+        assert self._buffered(connection) == [{
+            'type': 'data',
+            'id': '1',
+            'action': 'update',
+            'payload': {'pk': 1, 'other': 'baz'},
+            'delta': True,
+        }], (
+            "Registry did not push the delta."
+        )
+
+
+    @async_test
+    async def test_pushes_deletes_to_filtered_subscribers(self):
+        # create a registry and a client
+        registry = SubscriptionRegistry()
+        socket = MockSocket()
+        connection = registry.connect(socket)
+        # subscribe to a subset of the recipes
+        registry.subscribe(connection, '1', 'subscription { recipe(name: "foo") { pk } }')
+
+        # create a matching and a non-matching record
+        await registry.publish(
+            get_crud_action('create', 'recipe', status='success'),
+            {'id': 1, 'name': 'foo'}
+        )
+        await registry.publish(
+            get_crud_action('create', 'recipe', status='success'),
+            {'id': 2, 'name': 'bar'}
+        )
+        # delete both of them (deletes only carry the key)
+        await registry.publish(
+            get_crud_action('delete', 'recipe', status='success'),
+            {'pk': '1'}
+        )
+        await registry.publish(
+            get_crud_action('delete', 'recipe', status='success'),
+            {'pk': '2'}
+        )
+
+        # make sure the client was told about the record it holds
+        assert self._buffered(connection) == [
+            {'type': 'data', 'id': '1', 'action': 'create', 'payload': {'pk': 1}},
+            {'type': 'data', 'id': '1', 'action': 'delete', 'payload': {'pk': '1'}},
+        ], (
+            "Registry did not push the delete to the filtered subscriber."
+        )
+
+
+    @async_test
+    async def test_pushes_records_leaving_the_filters_as_deletes(self):
+        # create a registry and a client
+        registry = SubscriptionRegistry()
+        socket = MockSocket()
+        connection = registry.connect(socket)
+        # subscribe to a subset of the recipes
+        registry.subscribe(connection, '1', 'subscription { recipe(name: "foo") { pk, name } }')
+
+        # create a matching record and then move it out of the filters
+        await registry.publish(
+            get_crud_action('create', 'recipe', status='success'),
+            {'id': 1, 'name': 'foo'}
+        )
+        await registry.publish(
+            get_crud_action('update', 'recipe', status='success'),
+            {'id': 1, 'name': 'bar'}
+        )
+        # change it again
+        await registry.publish(
+            get_crud_action('update', 'recipe', status='success'),
+            {'id': 1, 'name': 'baz'}
+        )
+
+        # make sure the client was told to drop the record (only once)
+        assert self._buffered(connection) == [
+            {'type': 'data', 'id': '1', 'action': 'create', 'payload': {'pk': 1, 'name': 'foo'}},
+            {'type': 'data', 'id': '1', 'action': 'delete', 'payload': {'pk': 1, 'name': 'bar'}},
+        ], (
+            "Registry did not push the record leaving the filters."
+        )
+
+
+    @async_test
+    async def test_tolerates_unsubscribing_while_publishing(self):
+        # the registry and the clients (filled in below)
+        registry = None
+        connections = []
+
+        # load the whole record of a delta
+        async def fetch(model, pk):
+            # the first client goes away while the record is being loaded
+            registry.unsubscribe(connections[0], '1')
+            return {'id': pk, 'name': 'foo'}
+
+        # create a registry with two clients following the same records
+        registry = SubscriptionRegistry(fetch=fetch)
+        for _ in range(2):
+            connection = registry.connect(MockSocket())
+            registry.subscribe(connection, '1', 'subscription { recipe(name: "foo") { pk } }')
+            connections.append(connection)
+
+        # publish a delta that has to be checked against the whole record
+        await registry.publish(
+            get_crud_action('update', 'recipe', status='success'),
+            {'id': 1, 'other': 'bar', '__delta__': True}
+        )
+
+        # make sure the second client still received the change
+        assert len(self._buffered(connections[1])) == 1, (
+            "Registry skipped a subscriber when another one went away."
+        )
+
+
+    @async_test
+    async def test_only_pushes_authorized_records(self):
+        # only the owner of a record can see it
+        async def authorize(model, record, user):
+            return user == record['owner']
+
+        # create a registry with a client for each user
+        registry = SubscriptionRegistry(authorize=authorize)
+        connections = {user: registry.connect(MockSocket(), user=user) for user in ('foo', 'bar')}
+        # subscribe both of them to every recipe
+        for connection in connections.values():
+            registry.subscribe(connection, '1', 'subscription { recipe { pk } }')
+
+        # create a record owned by one of them
+        await registry.publish(
+            get_crud_action('create', 'recipe', status='success'),
+            {'id': 1, 'owner': 'foo'}
+        )
+
+        # make sure only the owner received it
+        assert len(self._buffered(connections['foo'])) == 1 and \
+                    self._buffered(connections['bar']) == [], (
+            "Registry pushed a record to a user that isn't allowed to see it."
+        )
+
+
+    @async_test
+    async def test_replies_to_invalid_messages(self):
+        # create a registry and a client
+        registry = SubscriptionRegistry()
+        connection = registry.connect(MockSocket())
+
+        # send a subscription that can't be parsed
+        SubscriptionRequestHandler._handle_message(
+            None,
+            registry,
+            connection,
+            json.dumps({'type': 'start', 'id': '1', 'query': 'subscription {'})
+        )
+
+        # make sure the client was told
+        assert [(message['type'], message['id']) for message in self._buffered(connection)] \
+                    == [('error', '1')], (
+            "Client was not told about the invalid subscription."
+        )
+
+
+    @async_test
+    async def test_ignores_pending_actions(self):
+        # create a registry and a client
+        registry = SubscriptionRegistry()
+        socket = MockSocket()
+        connection = registry.connect(socket)
+        # subscribe to every recipe
+        registry.subscribe(connection, '1', 'subscription { recipe { pk } }')
+
+        # publish a pending action
+        await registry.publish(get_crud_action('create', 'recipe'), {'name': 'foo'})
+        # make sure nothing was sent
+        assert self._buffered(connection) == [], (
+            "Registry pushed a pending action to subscribers."
+        )
+
+
+    @async_test
+    async def test_evicts_slow_consumers(self):
+        # create a registry with a very small buffer
+        registry = SubscriptionRegistry(buffer_size=1)
+        socket = MockSocket()
+        connection = registry.connect(socket)
+        # subscribe to every recipe
+        registry.subscribe(connection, '1', 'subscription { recipe { pk } }')
+
+        # publish more changes than the buffer can hold without yielding
+        for pk in range(3):
+            await registry.publish(
+                get_crud_action('update', 'recipe', status='success'),
+                {'id': pk}
+            )
+
+        # make sure the connection was evicted
+        assert connection not in registry.connections, (
+            "Slow consumer was not removed from the registry."
+        )
+        assert socket.closed_with == b'slow consumer', (
+            "Slow consumer's socket was not closed."
+        )
+
+
+    def _buffered(self, connection):
+        # the messages waiting to be sent to the client
+        return [connection._buffer.get_nowait() for _ in range(connection.pending)]
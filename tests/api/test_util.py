@@ -23,6 +23,8 @@ from nautilus.api.util import (
     build_native_type_dictionary,
     serialize_native_type,
     query_for_model,
+    aggregate_query_for_model,
+    structured_query_for_model,
     arg_string_from_dict,
     GraphEntity
 )
@@ -36,15 +38,19 @@ class TestUtil(unittest.TestCase):
 
         # the fields in the schema
         schema_fields = schema.introspect()['__schema']['types'][0]['fields']
-        # make sure there is only one field
-        self.assertRaises(IndexError, lambda: schema_fields[1])
+        # make sure there are only the record and aggregate fields
+        self.assertRaises(IndexError, lambda: schema_fields[2])
 
-        # the single field in the schema
+        # the record field in the schema
         field = schema_fields[0]
         # make sure that field matches the convention
         assert field['name'] == nautilus.conventions.api.root_query(), (
             'The generated schema does not have a field named `all_models`'
         )
+        # make sure the aggregate field matches the convention
+        assert schema_fields[1]['name'] == nautilus.conventions.api.root_aggregate_query(), (
+            'The generated schema does not have a field named `aggregate_models`'
+        )
 
         # grab the arguments for the field
         arg_names = {arg['name'] for arg in field['args']}
@@ -120,6 +126,22 @@ class TestUtil(unittest.TestCase):
         )
 
 
+    def test_graphql_type_from_summary_with_reverse_connections(self):
+        # mock summaries
+        summary = MockModelService()().summarize()
+        connection_summary = MockConnectionService()().summarize()
+
+        # create the graphql type for the target of the connection
+        graphql_type = graphql_type_from_summary(summary, [], [connection_summary])
+        # grab a list of the fields of the generated type
+        fields = {field.default_name for field in graphql_type._meta.local_fields}
+
+        # make sure they are what we expect
+        assert fields == {'id', 'name', 'date', 'testConnection_reverse'} , (
+            "Generated graphql type with reverse connection does not have the correct fields"
+        )
+
+
     def test_graphql_mutation_from_summary(self):
         # create a mock mutation summary
         mock_summary = summarize_crud_mutation(model=MockModelService(), method="delete")
@@ -231,6 +253,114 @@ class TestUtil(unittest.TestCase):
         )
 
 
+    @async_test
+    async def test_parse_string_walks_connection_chains(self):
+        # the query to parse (the ingredients are only passed through)
+        query = """
+            query {
+                recipe {
+                    name
+                    ingredients {
+                        suppliers {
+                            name
+                        }
+                    }
+                }
+            }
+        """
+        # the records asked for
+        reads = []
+
+        # the resolver for models
+        async def model_resolver(object_name, fields, **filters):
+            reads.append(object_name)
+            # the recipes
+            if object_name == 'recipe':
+                return [{'pk': 1, 'name': 'foo'}, {'pk': 2, 'name': 'bar'}]
+            # the suppliers
+            return [{'pk': pk, 'name': 'supplier %s' % pk} for pk in filters['pk_in']]
+
+        async def connection_resolver(connection_name, object):
+            raise AssertionError('Connection was walked for a single record.')
+
+        async def traversal_resolver(connection_names, object_name, pks, **kwds):
+            # every path through the recipes, ingredients and suppliers
+            return [(1, 3, 5), (1, 4, 5), (2, 4, 6)], ['ingredient', 'supplier']
+
+        async def mutation_resolver(mutation_name, args, fields):
+            return 'hello'
+
+        # parse the string with the query
+        result = await parse_string(
+            query,
+            model_resolver,
+            connection_resolver,
+            mutation_resolver,
+            traversal_resolver=traversal_resolver
+        )
+
+        # make sure the intermediate records were not read
+        assert reads == ['recipe', 'supplier'], (
+            "Connection chain did not skip the intermediate records."
+        )
+        # make sure the result is nested correctly
+        assert result['data']['recipe'] == [
+            {'pk': 1, 'name': 'foo', 'ingredients': [
+                {'pk': 3, 'suppliers': [{'pk': 5, 'name': 'supplier 5'}]},
+                {'pk': 4, 'suppliers': [{'pk': 5, 'name': 'supplier 5'}]},
+            ]},
+            {'pk': 2, 'name': 'bar', 'ingredients': [
+                {'pk': 4, 'suppliers': [{'pk': 6, 'name': 'supplier 6'}]},
+            ]},
+        ], (
+            "Connection chain was not nested correctly."
+        )
+
+
+    @async_test
+    async def test_parse_string_fuses_connection_reads(self):
+        # the query to parse
+        query = """
+            query {
+                recipe {
+                    ingredients(first: 1) {
+                        name
+                    }
+                }
+            }
+        """
+        # the resolver for models
+        async def model_resolver(object_name, fields, **filters):
+            return [{'pk': 1}, {'pk': 2}]
+
+        async def connection_resolver(connection_name, object):
+            raise AssertionError('Connection was walked without its records.')
+
+        async def fused_resolver(connection_name, object, fields, **filters):
+            # the records connected to the object
+            return [{'pk': object['pk'] * 10, 'name': filters['first']}], 'ingredient'
+
+        async def mutation_resolver(mutation_name, args, fields):
+            return 'hello'
+
+        # parse the string with the query
+        result = await parse_string(
+            query,
+            model_resolver,
+            connection_resolver,
+            mutation_resolver,
+            fused_resolver=fused_resolver
+        )
+
+        # make sure the connected records were resolved with the connection
+        assert result['data']['recipe'] == [
+            {'pk': 1, 'ingredients': [{'pk': 10, 'name': 1}]},
+            {'pk': 2, 'ingredients': [{'pk': 20, 'name': 1}]},
+        ], (
+            "Connection was not resolved along with its records."
+        )
+
+
     def test_fields_for_model(self):
         # a mock to test with
         model = MockModel()
@@ -377,6 +507,24 @@ class TestUtil(unittest.TestCase):
         )
 
 
+    def test_aggregate_query_for_model(self):
+        # create an aggregate query to test
+        query = aggregate_query_for_model(['count'], group_by=['name'])
+        # make sure it matches expectations
+        assert query == 'query { aggregate_models(group_by: ["name"]) { count } }', (
+            "Could not generate aggregate query for model."
+        )
+
+
+    def test_structured_query_for_model(self):
+        # create a structured query to test
+        query = structured_query_for_model(['hello'], world=1, foo=None)
+        # make sure it matches expectations
+        assert query == {'fields': ['hello'], 'filters': {'world': 1}}, (
+            "Could not generate structured query for model."
+        )
+
+
 
     def test_graph_entity_needs_to_start_somewhere(self):
         # make sure an exception is raised
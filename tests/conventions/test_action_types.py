@@ -10,6 +10,9 @@ from nautilus.conventions.actions import (
     error_status,
     pending_status,
     query_action_type,
+    is_delta,
+    apply_delta,
+    delta_marker,
 )
 from ..util import MockModel
 
@@ -130,3 +133,17 @@ class TestUtil(unittest.TestCase):
         status = pending_status()
         # make sure its a string
         assert isinstance(status, str)
+
+
+    def test_can_apply_deltas(self):
+        # a change that only carries the name
+        delta = {'id': 1, 'name': 'bar', delta_marker: True}
+        # make sure it is recognized
+        assert is_delta(delta) and not is_delta({'id': 1}), (
+            "Could not tell deltas from full records."
+        )
+        # make sure it merges on top of the record (without the marker)
+        assert apply_delta({'id': 1, 'name': 'foo', 'date': 'baz'}, delta) == \
+                    {'id': 1, 'name': 'bar', 'date': 'baz'}, (
+            "Delta was not applied to the record."
+        )
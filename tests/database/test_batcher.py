@@ -0,0 +1,122 @@
+# external imports
+import unittest
+import asyncio
+import time
+# local imports
+import nautilus
+from nautilus.database import WriteBatcher, DatabaseExecutor
+from ..util import async_test, MockModel
+
+class TestUtil(unittest.TestCase):
+
+    def setUp(self):
+        # point the database to an in-memory database
+        nautilus.database.init_db('sqlite:///:memory:')
+        # create a table to write to
+        self.model = MockModel()
+        self.model.create_table(True)
+
+
+    @async_test
+    async def test_commits_writes_together(self):
+        # create a batcher that waits for a full batch
+        batcher = WriteBatcher(max_batch_size=3, window=10)
+        # keep track of the transactions that were opened
+        transactions = []
+        # the database of the model
+        database = nautilus.database.db.obj
+        # the original transaction factory
+        transaction = database.transaction
+        # wrap it to count the transactions
+        def counting_transaction(*args, **kwds):
+            transactions.append(True)
+            return transaction(*args, **kwds)
+        database.transaction = counting_transaction
+
+        try:
+            # submit a batch of writes
+            records = await asyncio.gather(*[
+                batcher.submit(self.model.create, name=name) for name in ('foo', 'bar', 'baz')
+            ])
+        finally:
+            # restore the database
+            del database.transaction
+
+        # make sure every record was created
+        assert [record.name for record in records] == ['foo', 'bar', 'baz'], (
+            "Batcher did not return the result of each write."
+        )
+        # make sure they shared a transaction
+        assert len(transactions) == 1, (
+            "Batched writes were not committed together."
+        )
+
+
+    @async_test
+    async def test_isolates_failing_writes(self):
+        # create a batcher to test
+        batcher = WriteBatcher(max_batch_size=10, window=0.001)
+
+        # a write that fails after changing the database
+        def fail():
+            self.model.create(name='partial')
+            raise ValueError('nope')
+
+        # submit a failing write along with a good one
+        results = await asyncio.gather(
+            batcher.submit(fail),
+            batcher.submit(self.model.create, name='foo'),
+            return_exceptions=True
+        )
+
+        # make sure the failure was passed to its caller only
+        assert isinstance(results[0], ValueError) and results[1].name == 'foo', (
+            "Batcher did not report the outcome of each write separately."
+        )
+        # make sure the failed write was rolled back
+        assert [record.name for record in self.model.select()] == ['foo'], (
+            "Failed write was not rolled back."
+        )
+
+
+    @async_test
+    async def test_flush_commits_pending_writes(self):
+        # create a batcher that would wait a long time
+        batcher = WriteBatcher(max_batch_size=10, window=10)
+        # submit a write without waiting for it
+        pending = asyncio.ensure_future(batcher.submit(self.model.create, name='foo'))
+        # let the write reach the batcher
+        await asyncio.sleep(0)
+
+        # commit the batch
+        await batcher.flush()
+
+        # make sure the write was applied
+        assert self.model.select().count() == 1 and (await pending).name == 'foo', (
+            "Flush did not commit the pending writes."
+        )
+
+
+    @async_test
+    async def test_commits_batches_in_order(self):
+        # create a batcher that commits every write on its own thread
+        batcher = WriteBatcher(max_batch_size=1, window=10, executor=DatabaseExecutor(max_workers=2))
+        # the order in which the batches were applied
+        applied = []
+
+        # a write that takes longer than the ones after it
+        def slow_write():
+            time.sleep(0.05)
+            applied.append('first')
+
+        # submit the slow write
+        first = asyncio.ensure_future(batcher.submit(slow_write))
+        # let it reach the batcher
+        await asyncio.sleep(0)
+        # followed by a quick one
+        await asyncio.gather(first, batcher.submit(applied.append, 'second'))
+
+        # make sure the batches were applied in the order they were closed
+        assert applied == ['first', 'second'], (
+            "Batcher let a later batch commit before an earlier one."
+        )
@@ -0,0 +1,49 @@
+# external imports
+import unittest
+import threading
+# local imports
+import nautilus
+from nautilus.database import DatabaseExecutor
+from ..util import async_test
+
+class TestUtil(unittest.TestCase):
+
+    @async_test
+    async def test_runs_work_off_the_loop_thread(self):
+        # create an executor to test
+        executor = DatabaseExecutor(max_workers=2)
+        # find the thread that runs the work
+        thread = await executor.run(threading.current_thread)
+        # clean up
+        executor.shutdown()
+
+        # make sure it isn't the current one
+        assert thread is not threading.current_thread(), (
+            "Executor ran the work on the event loop thread."
+        )
+
+
+    @async_test
+    async def test_can_run_inline(self):
+        # create an executor without any workers
+        executor = DatabaseExecutor(max_workers=0)
+        # make sure the work is done on the current thread
+        assert await executor.run(threading.current_thread) is threading.current_thread(), (
+            "Executor without workers did not run the work inline."
+        )
+
+
+    def test_in_memory_databases_run_inline(self):
+        # point the database to an in-memory sqlite database
+        nautilus.database.init_db('sqlite:///:memory:')
+        # make sure the executor doesn't use any threads
+        assert nautilus.database.executor.max_workers == 0, (
+            "In-memory database was queried from separate threads."
+        )
+
+        # point the database to a file
+        nautilus.database.init_db('sqlite:///test.db', executor_threads=3)
+        # make sure the executor uses the given number of threads
+        assert nautilus.database.executor.max_workers == 3, (
+            "Executor was not resized for the database."
+        )
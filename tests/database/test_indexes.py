@@ -0,0 +1,105 @@
+# external imports
+import unittest
+import os
+# local imports
+import nautilus
+from nautilus.database import FilterUsage, recommend_indexes, create_indexes, ensure_indexes
+from nautilus.api.filter import filter_model
+from ..util import MockModel
+
+class TestUtil(unittest.TestCase):
+
+    def setUp(self):
+        # point the database to a file
+        nautilus.database.init_db('sqlite:///test.db')
+        # create a model to test with
+        self.model = MockModel()
+        self.model.create_table(True)
+        # start with a clean slate
+        nautilus.database.filter_usage.counts = {}
+
+
+    def tearDown(self):
+        self.model.drop_table()
+        # stop keeping track of the filters
+        nautilus.database.filter_usage.enabled = False
+
+
+    def test_records_filter_usage(self):
+        # keep track of the filters
+        nautilus.database.filter_usage.enabled = True
+        # filter the model a few times
+        for _ in range(3):
+            list(filter_model(self.model, {'name': 'foo', 'date': 'bar'}))
+        list(filter_model(self.model, {'name': 'foo'}))
+
+        # make sure the usage was recorded
+        assert nautilus.database.filter_usage.counts_for(self.model) == {
+            ('date', 'name'): 3,
+            ('name',): 1,
+        }, (
+            "Filter usage was not recorded."
+        )
+
+
+    def test_skips_usage_unless_enabled(self):
+        # filter the model without keeping track of the filters
+        list(filter_model(self.model, {'name': 'foo'}))
+        # make sure nothing was recorded
+        assert nautilus.database.filter_usage.counts_for(self.model) == {}, (
+            "Filter usage was recorded without being enabled."
+        )
+
+
+    def test_recommends_and_creates_indexes(self):
+        # some recorded usage
+        usage = FilterUsage()
+        for _ in range(5):
+            usage.record(self.model, ['name', 'date'])
+        usage.record(self.model, ['date'])
+        usage.record(self.model, ['id'])
+
+        # make sure only the hot filter is recommended (the primary key is always indexed)
+        recommended = recommend_indexes(self.model, usage=usage, min_count=1)
+        assert recommended == [('date', 'name'), ('date',)], (
+            "Did not recommend the right indexes."
+        )
+
+        # create the most used index
+        create_indexes(self.model, recommended[:1])
+        # make sure both filters are now covered
+        assert recommend_indexes(self.model, usage=usage, min_count=1) == [], (
+            "Created index did not cover the filters."
+        )
+
+
+    def test_ensures_declared_indexes(self):
+        # a model with an index declared after its table was created
+        self.model.name.index = True
+        try:
+            # create the missing indexes
+            created = ensure_indexes(self.model)
+        finally:
+            self.model.name.index = False
+
+        # make sure the index was created once
+        assert created == [['name']] and ensure_indexes(self.model) == [], (
+            "Declared index was not created."
+        )
+
+
+    def test_saves_usage(self):
+        # some recorded usage
+        usage = FilterUsage()
+        usage.record(self.model, ['name'])
+
+        try:
+            # save it twice
+            usage.save('test_usage.json')
+            usage.save('test_usage.json')
+            # make sure the counts were combined
+            assert FilterUsage.load('test_usage.json').counts_for(self.model) == {('name',): 2}, (
+                "Filter usage was not saved correctly."
+            )
+        finally:
+            os.remove('test_usage.json')
@@ -0,0 +1,79 @@
+# external imports
+import unittest
+import threading
+# local imports
+import nautilus
+from nautilus.database import PoolTimeout
+from ..util import async_test
+
+class TestUtil(unittest.TestCase):
+
+    def setUp(self):
+        # point the database to a pool of connections
+        nautilus.database.init_db(
+            'sqlite+pool:///test.db',
+            executor_threads=2,
+            max_connections=1,
+            pool_timeout=0.05
+        )
+        # the pool to test
+        self.pool = nautilus.database.db.obj
+
+
+    def tearDown(self):
+        # return any connections held by the test
+        if not self.pool.is_closed():
+            self.pool.close()
+        # close the connections in the pool
+        self.pool.close_all()
+
+
+    def test_pooled_urls_create_a_pool(self):
+        # make sure the pool was configured
+        assert self.pool.max_connections == 1 and self.pool.pool_timeout == 0.05, (
+            "Pool was not configured with the given options."
+        )
+        assert nautilus.database.executor.release is not None, (
+            "Executor does not return connections to the pool."
+        )
+
+
+    def test_waits_for_a_connection(self):
+        # check out the only connection in the pool
+        self.pool.connect()
+        # the error raised on the other thread
+        errors = []
+
+        # a function that checks out a connection on another thread
+        def checkout():
+            try:
+                self.pool.connect()
+            except PoolTimeout as err:
+                errors.append(err)
+
+        # try to check out a connection from another thread
+        thread = threading.Thread(target=checkout)
+        thread.start()
+        thread.join()
+
+        # make sure the other thread gave up after waiting
+        assert len(errors) == 1, (
+            "Exhausted pool did not time out."
+        )
+        # make sure the wait was recorded
+        metrics = nautilus.database.pool_metrics()
+        assert metrics['in_use'] == 1 and metrics['waits'] == 1 and metrics['wait_time'] >= 0.05, (
+            "Pool did not record the wait."
+        )
+
+
+    @async_test
+    async def test_executor_returns_connections(self):
+        # run a query on the executor
+        await nautilus.database.executor.run(self.pool.execute_sql, 'SELECT 1')
+
+        # make sure the connection was returned to the pool
+        metrics = nautilus.database.pool_metrics()
+        assert metrics['in_use'] == 0 and metrics['idle'] == 1 and metrics['checkouts'] == 1, (
+            "Executor did not return the connection to the pool."
+        )
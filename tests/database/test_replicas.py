@@ -0,0 +1,83 @@
+# external imports
+import unittest
+import os
+# local imports
+import nautilus
+from nautilus.database import ReplicaRouter
+from nautilus.api.filter import filter_model
+from ..util import async_test, MockModel
+
+class TestUtil(unittest.TestCase):
+
+    def setUp(self):
+        # point the database to a primary with a local copy as its replica
+        nautilus.database.init_db(
+            'sqlite:///test.db',
+            replica_urls=['sqlite:///test_replica.db'],
+            max_staleness=60
+        )
+        # the replica
+        self.replica = nautilus.database.router.replicas[0]
+        # create the table on both databases
+        self.model = MockModel()
+        nautilus.db.create_table(self.model, True)
+        self.replica.create_table(self.model, True)
+
+
+    def tearDown(self):
+        # clean up the primary
+        nautilus.db.drop_table(self.model)
+        # remove the replica
+        self.replica.close()
+        os.remove('test_replica.db')
+        # go back to the default configuration
+        nautilus.database.init_db('sqlite:///test.db')
+
+
+    def test_router_alternates_replicas(self):
+        # create a router with a few replicas
+        router = ReplicaRouter(['foo', 'bar'])
+        # make sure the reads are spread between them
+        assert [router.read_database() for _ in range(3)] == ['foo', 'bar', 'foo'], (
+            "Router did not alternate between the replicas."
+        )
+        # make sure the primary is used when there are no replicas
+        assert ReplicaRouter().read_database() is None, (
+            "Router without replicas did not use the primary."
+        )
+
+
+    def test_router_reads_its_writes_by_default(self):
+        # create a router without a staleness window
+        router = ReplicaRouter(['foo'])
+        # write to the primary
+        router.note_write()
+        # make sure the following read goes to the primary
+        assert router.read_database() is None, (
+            "Router sent a read following a write to a replica by default."
+        )
+        # make sure the window can be turned off
+        router = ReplicaRouter(['foo'], max_staleness=0)
+        router.note_write()
+        assert router.read_database() == 'foo', (
+            "Router without a staleness window did not use the replica."
+        )
+
+
+    @async_test
+    async def test_reads_go_to_replicas(self):
+        # add a record that only exists on the replica
+        self.replica.execute_sql('INSERT INTO %s (name) VALUES (?)' % self.model._meta.db_table, ('foo',))
+
+        # make sure reads are served by the replica
+        assert [record.name for record in filter_model(self.model, {})] == ['foo'], (
+            "Read was not served by the replica."
+        )
+
+        # write to the primary
+        await nautilus.database.write(self.model.create, name='bar')
+
+        # make sure the primary serves reads while the replica could be behind
+        assert [record.name for record in filter_model(self.model, {})] == ['bar'], (
+            "Read following a write was not served by the primary."
+        )
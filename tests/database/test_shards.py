@@ -0,0 +1,160 @@
+# external imports
+import unittest
+import os
+from concurrent.futures import ThreadPoolExecutor
+# local imports
+import nautilus
+import nautilus.network.events.actionHandlers as action_handlers
+from nautilus.conventions.actions import get_crud_action
+from nautilus.database import ShardRouter
+from nautilus.api.filter import filter_model, project_model, aggregate_model
+from ..util import async_test, Mock, MockModel
+
+class TestUtil(unittest.TestCase):
+
+    def setUp(self):
+        # point the database to the first shard
+        nautilus.database.init_db('sqlite:///test.db')
+        # create a model to spread over two databases
+        self.model = MockModel()
+        self.model._meta.shards = ShardRouter.from_urls(
+            ['sqlite:///test.db', 'sqlite:///test_shard.db'],
+            first=nautilus.database.db.obj
+        )
+        # create the table in each shard
+        self.model._meta.shards.create_table(self.model)
+
+
+    def tearDown(self):
+        # remove the tables
+        self.model._meta.shards.drop_table(self.model)
+        # remove the second shard
+        self.model._meta.shards.databases[1].close()
+        os.remove('test_shard.db')
+
+
+    def test_hash_allocates_keys_for_each_shard(self):
+        # the router to test
+        shards = self.model._meta.shards
+        # create a few records
+        records = [shards.create(self.model, {'name': name}) for name in ('a', 'b', 'c', 'd')]
+
+        # make sure every key routes back to the shard that holds the record
+        for record in records:
+            assert shards.get(self.model, record.id).name == record.name, (
+                "Allocated key did not route to the shard of the record."
+            )
+        # make sure the records were spread out
+        assert all(database.execute_sql(
+            'SELECT COUNT(*) FROM %s' % self.model._meta.db_table
+        ).fetchone()[0] == 2 for database in shards.databases), (
+            "Records were not spread over the shards."
+        )
+
+
+    def test_processes_allocate_distinct_keys(self):
+        # routers with their own connections to the shards (like separate processes)
+        routers = [
+            ShardRouter.from_urls(['sqlite:///test.db', 'sqlite:///test_shard.db'])
+            for _ in range(4)
+        ]
+
+        def create_records(router):
+            try:
+                # create a few records through the router
+                return [router.create(self.model, {'name': 'foo'}).id for _ in range(10)]
+            # regardless of what happened
+            finally:
+                # clean up the connections of the router
+                for database in router.databases:
+                    database.close()
+
+        # create records through every router at once
+        with ThreadPoolExecutor(max_workers=len(routers)) as pool:
+            keys = [key for keys in pool.map(create_records, routers) for key in keys]
+
+        # make sure no key was handed out twice
+        assert len(set(keys)) == len(keys) == 40, (
+            "Routers sharing the shards allocated the same key."
+        )
+
+
+    def test_range_routing(self):
+        # create a router that splits the keys by range
+        shards = ShardRouter(['foo', 'bar'], strategy='range', ranges=[(1, 100), (100, None)])
+        # make sure keys are routed to the right shard
+        assert [shards.shard_for(pk) for pk in (1, 99, 100, 5000)] == [0, 0, 1, 1], (
+            "Keys were not routed by range."
+        )
+        # make sure keys outside of the ranges are refused
+        with self.assertRaises(ValueError):
+            shards.shard_for(0)
+
+
+    def test_reads_gather_every_shard(self):
+        # create records in both shards
+        for name in ('d', 'b', 'a', 'c'):
+            self.model._meta.shards.create(self.model, {'name': name})
+
+        # make sure the records are merged with the requested ordering and limits
+        assert [record.name for record in filter_model(
+            self.model, {'order_by': ['name'], 'first': 2, 'offset': 1}
+        )] == ['b', 'c'], (
+            "Sharded records were not merged correctly."
+        )
+        assert [row['name'] for row in project_model(
+            self.model, {'order_by': ['-name']}, ['name']
+        )] == ['d', 'c', 'b', 'a'], (
+            "Sharded rows were not merged correctly."
+        )
+
+
+    def test_aggregates_combine_every_shard(self):
+        # create records in both shards
+        for name, date in (('a', 'x'), ('b', 'x'), ('c', 'y'), ('d', 'y')):
+            self.model._meta.shards.create(self.model, {'name': name, 'date': date})
+
+        # make sure the aggregates cover every record
+        assert aggregate_model(self.model, {}, ['count', 'min_name', 'max_name']) == [
+            {'count': 4, 'min_name': 'a', 'max_name': 'd'}
+        ], (
+            "Sharded aggregates were not combined."
+        )
+        # make sure the groups are combined too
+        assert aggregate_model(self.model, {'group_by': ['date']}, ['count', 'max_name']) == [
+            {'date': 'x', 'count': 2, 'max_name': 'b'},
+            {'date': 'y', 'count': 2, 'max_name': 'd'},
+        ], (
+            "Sharded groups were not combined."
+        )
+
+
+    @async_test
+    async def test_crud_handlers_use_shards(self):
+        # create a record through the action handler
+        await action_handlers.create_handler(self.model)(
+            Mock(),
+            action_type=get_crud_action('create', self.model),
+            payload={'id': 3, 'name': 'foo'},
+            props={},
+            notify=False
+        )
+        # make sure the record ended up in the right shard
+        assert self.model._meta.shards.databases[1].execute_sql(
+            'SELECT name FROM %s WHERE id = 3' % self.model._meta.db_table
+        ).fetchone() == ('foo',), (
+            "Create handler did not store the record in its shard."
+        )
+
+        # remove the record through the action handler
+        await action_handlers.delete_handler(self.model)(
+            Mock(),
+            action_type=get_crud_action('delete', self.model),
+            payload={'id': 3},
+            props={},
+            notify=False
+        )
+        # make sure the record is gone
+        assert list(filter_model(self.model, {})) == [], (
+            "Delete handler did not remove the record from its shard."
+        )
@@ -0,0 +1,43 @@
+# external imports
+import unittest
+from types import SimpleNamespace
+# local imports
+import nautilus
+from nautilus.database import db, read_query
+
+class TestUtil(unittest.TestCase):
+
+    def tearDown(self):
+        # go back to the default configuration
+        nautilus.database.init_db('sqlite:///test.db')
+
+
+    def test_tunes_sqlite_files(self):
+        # point the database to a file
+        nautilus.database.init_db('sqlite:///test.db')
+        # make sure the pragmas were applied
+        assert db.execute_sql('PRAGMA journal_mode').fetchone()[0] == 'wal', (
+            "Sqlite file was not switched to write-ahead logging."
+        )
+        assert db.execute_sql('PRAGMA synchronous').fetchone()[0] == 1, (
+            "Sqlite file did not relax synchronous writes."
+        )
+
+
+    def test_can_skip_tuning(self):
+        # point the database to an untuned file
+        nautilus.database.init_db('sqlite:///test.db', tune_sqlite=False)
+        # make sure the default synchronous mode is used
+        assert db.execute_sql('PRAGMA synchronous').fetchone()[0] == 2, (
+            "Sqlite file was tuned when asked not to."
+        )
+
+
+    def test_reads_use_main_connection_by_default(self):
+        # point the database to a file
+        nautilus.database.init_db('sqlite:///test.db')
+        # make sure queries are left alone
+        query = read_query(SimpleNamespace(database=db))
+        assert query.database is db, (
+            "Query was routed away from the main database."
+        )
@@ -30,3 +30,56 @@ class TestUtil(unittest.TestCase):
         assert serialized == json.dumps(inner_dict), (
             'ModelSerializer did not return the correct string.'
         )
+
+
+    def test_serializes_records_with_their_model(self):
+        # import the model serializer
+        from nautilus.models.serializers import ModelSerializer
+        # import the necessary modules
+        import datetime, decimal, json, uuid
+        import nautilus.models as models
+
+        class Invoice(models.BaseModel):
+            """ The model to test serialization with """
+            issued = models.fields.DateTimeField()
+            total = models.fields.DecimalField()
+            reference = models.fields.UUIDField()
+            note = models.fields.CharField(null=True)
+
+        # a record with values that json can't encode as they are
+        record = Invoice(
+            id=1,
+            issued=datetime.datetime(2016, 1, 2, 3, 4, 5),
+            total=decimal.Decimal('1.5'),
+            reference=uuid.UUID(int=1),
+        )
+
+        # make sure each value was converted
+        assert json.loads(ModelSerializer().serialize(record)) == {
+            'id': 1,
+            'issued': '2016-01-02 03:04:05',
+            'total': 1.5,
+            'reference': str(uuid.UUID(int=1)),
+            'note': None,
+        }, (
+            "ModelSerializer did not convert the values of the record."
+        )
+
+        # make sure lists of records are serialized with a projection
+        assert json.loads(Invoice._serializer.serialize_many([record, record], fields=['id', 'total'])) \
+                    == [{'id': 1, 'total': 1.5}] * 2, (
+            "RecordSerializer did not project the list of records."
+        )
+
+        # make sure records nested in other values are serialized too
+        assert json.loads(ModelSerializer().serialize({'records': [record]}))['records'][0]['issued'] \
+                    == '2016-01-02 03:04:05', (
+            "ModelSerializer did not serialize a nested record."
+        )
+
+        # make sure reads expose the dates the same way as the events
+        from nautilus.api.util import serialize_rows
+        assert json.loads(serialize_rows(Invoice, [{'issued': record.issued}], ['issued'])) \
+                    == [{'issued': '2016-01-02 03:04:05'}], (
+            "Reads and events serialized the same date differently."
+        )
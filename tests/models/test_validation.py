@@ -0,0 +1,84 @@
+# external imports
+import unittest
+import decimal
+# local imports
+import nautilus.models as models
+
+
+class TestUtil(unittest.TestCase):
+
+    def setUp(self):
+
+        class Recipe(models.BaseModel):
+            name = models.fields.CharField()
+            servings = models.fields.IntegerField()
+            price = models.fields.DecimalField(null=True)
+            vegan = models.fields.BooleanField(default=False)
+
+        # save the model
+        self.model = Recipe
+
+
+    def test_coerces_values(self):
+        # validate a payload with values that need converting
+        values = self.model._validator.validate({
+            'pk': '1',
+            'name': 'foo',
+            'servings': '2',
+            'price': 1.5,
+            'vegan': 'true',
+        })
+
+        # make sure each value was converted to the type of its field
+        assert values == {
+            'id': '1',
+            'name': 'foo',
+            'servings': 2,
+            'price': decimal.Decimal('1.5'),
+            'vegan': True,
+        }, (
+            "Validator did not coerce the values of the payload."
+        )
+
+
+    def test_reports_every_problem(self):
+        # validate a payload with several problems
+        try:
+            self.model._validator.validate({'servings': 'many', 'color': 'red', 'price': True})
+            # we shouldn't get here
+            raise AssertionError("Validator accepted an invalid payload.")
+        # if the payload was rejected
+        except ValueError as err:
+            # the problems that were reported
+            message = str(err)
+
+        # make sure every problem was reported
+        for problem in [
+            'Payload has an invalid value for servings',
+            'Payload has unknown field: color',
+            'Payload has an invalid value for price',
+            'Payload is missing required field: name',
+        ]:
+            assert problem in message, (
+                "Validator did not report: %s" % problem
+            )
+        # fields with a default don't have to be provided
+        assert 'vegan' not in message, (
+            "Validator required a field with a default value."
+        )
+
+
+    def test_can_validate_partial_updates(self):
+        # validate a change to a single field
+        values = self.model._validator.validate({'id': 1, 'servings': 3.0}, partial=True, require_pk=True)
+        # make sure the missing fields were allowed
+        assert values == {'id': 1, 'servings': 3}, (
+            "Validator did not accept a partial update."
+        )
+
+        # make sure the record has to be designated
+        with self.assertRaises(ValueError):
+            self.model._validator.validate({'servings': 3}, partial=True, require_pk=True)
+        # make sure required fields can't be cleared
+        with self.assertRaises(ValueError):
+            self.model._validator.validate({'id': 1, 'name': None}, partial=True)
@@ -0,0 +1,179 @@
+# external imports
+import unittest
+import json
+# local imports
+import nautilus
+import nautilus.models as models
+import nautilus.network.events.actionHandlers as action_handlers
+from nautilus.api.util import create_model_schema
+from nautilus.models import bulk
+from nautilus.models.versioned import changes
+from ..util import async_test, Mock, MockModel
+
+
+class MockEventBroker:
+    """
+        A stand-in for an event broker that records the messages it sends.
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, **kwds):
+        self.sent.append(kwds)
+
+
+class TestUtil(unittest.TestCase):
+    """
+        This test suite checks that the changes to versioned models are
+        tracked and can be found.
+    """
+
+    def setUp(self):
+        # point the database to a in-memory sqlite database
+        nautilus.database.init_db('sqlite:///test.db')
+        # create a versioned model
+        self.model = type('VersionedModel', (MockModel(), models.Versioned), {})
+        # create the tables
+        nautilus.db.create_tables([self.model, models.Tombstone, models.VersionCounter], safe=True)
+
+
+    def tearDown(self):
+        nautilus.db.drop_tables([self.model, models.Tombstone, models.VersionCounter])
+
+
+    def test_writes_bump_versions(self):
+        # create a record
+        record = self.model.create(name='foo')
+        # the version of the new record
+        created = record.version
+        # update it
+        record.name = 'bar'
+        record.save()
+
+        # make sure the version went up
+        assert record.version > created and record.updated_at, (
+            "Saving the record did not bump its version."
+        )
+        # make sure the record is the only change
+        assert [change.name for change in changes(self.model, since=created - 1)[0]] == ['bar'], (
+            "Changes did not include the updated record."
+        )
+
+
+    def test_changes_since_version(self):
+        # create a few records
+        pks = bulk.insert_records(self.model, [{'name': 'foo'}, {'name': 'bar'}, {'name': 'baz'}])
+        # the latest version so far
+        _, _, since = changes(self.model)
+
+        # change a record and remove another
+        bulk.update_records(self.model, [{'pk': pks[0], 'name': 'qux'}])
+        self.model.get(self.model.id == pks[1]).delete_instance()
+
+        # find the changes
+        records, deleted, version = changes(self.model, since=since)
+        # make sure we only got the changes
+        assert [record.name for record in records] == ['qux'] and deleted == [pks[1]], (
+            "Changes did not include only the records changed since the version."
+        )
+        # make sure there is nothing after the last change
+        assert changes(self.model, since=version) == ([], [], version), (
+            "Changes since the last version were not empty."
+        )
+        # make sure the changes can be paged through
+        assert changes(self.model, since=since, limit=1)[2] == since + 1, (
+            "Changes were not limited."
+        )
+
+
+    def test_can_page_through_bulk_updates(self):
+        # create a few records
+        pks = bulk.insert_records(self.model, [{'name': 'foo%s' % i} for i in range(4)])
+        # the latest version so far
+        _, _, since = changes(self.model)
+        # give every record the same values at once
+        bulk.update_records(self.model, [{'pk': pk, 'name': 'bar'} for pk in pks])
+
+        # page through the changes
+        synced = []
+        while True:
+            records, _, version = changes(self.model, since=since, limit=2)
+            # if there are no more changes
+            if not records:
+                break
+            # keep track of the records
+            synced.extend(record.id for record in records)
+            # start after the page
+            since = version
+
+        # make sure every updated record was found
+        assert synced == pks, (
+            "Paging through a bulk update skipped some records: %s" % synced
+        )
+
+
+    def test_versions_are_allocated_with_the_write(self):
+        # create a record in a transaction that doesn't go through
+        with nautilus.db.atomic() as transaction:
+            self.model.create(name='foo')
+            transaction.rollback()
+        # create another one
+        record = self.model.create(name='bar')
+
+        # make sure the version of the first write went away with it
+        assert record.version == 1, (
+            "Version was not allocated in the transaction of the write."
+        )
+
+
+    @async_test
+    async def test_changes_action_handler(self):
+        # create a few records
+        record = self.model.create(name='foo')
+        latest = self.model.create(name='bar')
+        # and remove one of them
+        bulk.delete_records(self.model, [record.id])
+
+        # a service to reply with
+        service = Mock()
+        service.event_broker = MockEventBroker()
+        # ask for the changes
+        await action_handlers.crud_handler(self.model)(
+            service,
+            action_type=nautilus.conventions.get_crud_action('changes', self.model),
+            payload={'since': 0},
+            props={}
+        )
+
+        # the reply of the handler
+        reply = json.loads(service.event_broker.sent[0]['payload'])
+        # make sure it carries the changes
+        assert [record['name'] for record in reply['records']] == ['bar'] and \
+                    reply['deleted'] == [record.id] and reply['version'] == latest.version + 1, (
+            "Changes action did not reply with the changes."
+        )
+
+
+    def test_changes_query(self):
+        # create a record
+        record = self.model.create(name='foo')
+        # query for the changes through the schema of the model
+        result = create_model_schema(self.model).execute("""
+            query {
+                changes(since: 0) {
+                    version
+                    records {
+                        name
+                    }
+                }
+            }
+        """)
+
+        # make sure the changes were resolved
+        assert result.errors == [] and result.data['changes'] == {
+            'version': record.version,
+            'records': [{'name': 'foo'}]
+        }, (
+            "Changes query did not resolve the changes: %s" % result.errors
+        )
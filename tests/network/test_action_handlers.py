@@ -1,5 +1,6 @@
 # external imports
 import unittest
+import json
 from unittest.mock import Mock
 # local imports
 import nautilus
@@ -7,6 +8,18 @@ import nautilus.models as models
 import nautilus.network.events.actionHandlers as action_handlers
 from ..util import async_test, Mock, MockModel
 
+class MockEventBroker:
+    """
+        A stand-in for an event broker that records the messages it sends.
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, **kwds):
+        self.sent.append(kwds)
+
+
 class TestUtil(unittest.TestCase):
 
     def setUp(self):
@@ -99,3 +112,310 @@ class TestUtil(unittest.TestCase):
         assert record_query.get().name == 'bar', (
             "Model query was not updated."
         )
+
+
+    @async_test
+    async def test_update_action_handler_publishes_deltas(self):
+        # create a record to update
+        record = self.model(name='foo', date='bar')
+        record.save()
+
+        # create an `update` action handler that only publishes the changes
+        action_handler = action_handlers.update_handler(self.model, delta_events=True)
+        # a service to reply with
+        service = Mock()
+        service.event_broker = MockEventBroker()
+
+        # change the name of the record
+        await action_handler(
+            service,
+            action_type=nautilus.conventions.get_crud_action('update', self.model),
+            payload={'id': record.id, 'name': 'baz'},
+            props={}
+        )
+
+        # make sure the event only carries the change
+        assert json.loads(service.event_broker.sent[0]['payload']) == \
+                    {'id': record.id, 'name': 'baz', '__delta__': True}, (
+            "Update event did not only carry the changed fields."
+        )
+
+
+    @async_test
+    async def test_read_action_handler_resolves_structured_reads(self):
+        # create a few records in the test database
+        for name in ['foo', 'bar']:
+            self.model(name=name).save()
+
+        # create a `read` action handler
+        action_handler = action_handlers.read_handler(self.model)
+        # the action type to fire
+        action_type = nautilus.conventions.get_crud_action('read', self.model)
+        # a service to reply with
+        service = Mock()
+        service.event_broker = MockEventBroker()
+
+        # fire the action handler with a structured payload
+        await action_handler(service, action_type=action_type, props={'correlation_id': 1}, payload={
+            'fields': ['pk', 'name'],
+            'filters': {'name': 'bar'},
+        })
+
+        # the reply of the handler
+        reply = service.event_broker.sent[0]
+        # make sure it has the same form as a graphql response
+        assert json.loads(reply['payload']) == {'data': {'all_models': [{'pk': '2', 'name': 'bar'}]}, 'errors': []}, (
+            "Structured read did not resolve the right records."
+        )
+        assert reply['correlation_id'] == 1, (
+            "Structured read reply did not carry the correlation id."
+        )
+
+
+    @async_test
+    async def test_read_action_handler_chains_reads(self):
+        # create a few records in the test database
+        for name in ['foo', 'bar']:
+            self.model(name=name).save()
+
+        # create a `read` action handler
+        action_handler = action_handlers.read_handler(self.model)
+        # the action type to fire
+        action_type = nautilus.conventions.get_crud_action('read', self.model)
+        # a service to reply with
+        service = Mock()
+        service.event_broker = MockEventBroker()
+
+        # ask for the records named after the matching records
+        await action_handler(service, action_type=action_type, props={'correlation_id': 1}, payload={
+            'fields': ['name'],
+            'filters': {'name_in': ['foo', 'bar']},
+            'then': {
+                'action_type': 'read.other.pending',
+                'column': 'name',
+                'query': {'fields': ['pk'], 'filters': {'first': 1}},
+            }
+        })
+
+        # make sure the read was passed along instead of answered
+        assert service.event_broker.sent == [{
+            'action_type': 'read.other.pending',
+            'payload': {'fields': ['pk'], 'filters': {'first': 1, 'pk_in': ['foo', 'bar']}},
+            'correlation_id': 1,
+        }], (
+            "Read handler did not pass its results along to the chained read."
+        )
+
+
+    @async_test
+    async def test_read_action_handler_only_chains_reads(self):
+        # create a record in the test database
+        self.model(name='foo').save()
+
+        # create a `read` action handler
+        action_handler = action_handlers.read_handler(self.model)
+        # the action type to fire
+        action_type = nautilus.conventions.get_crud_action('read', self.model)
+        # a service to reply with
+        service = Mock()
+        service.event_broker = MockEventBroker()
+
+        # try to make the service send something other than a read
+        await action_handler(service, action_type=action_type, props={}, payload={
+            'fields': ['name'],
+            'filters': {'name': 'foo'},
+            'then': {
+                'action_type': 'delete.other.pending',
+                'column': 'name',
+                'query': {'fields': ['pk']},
+            }
+        })
+
+        # make sure the request was refused
+        assert [message['action_type'] for message in service.event_broker.sent] == [
+            nautilus.conventions.get_crud_action('read', self.model, status='error')
+        ], (
+            "Read handler passed its results along to an action other than a read."
+        )
+
+
+    @async_test
+    async def test_create_many_action_handler(self):
+        # create a `create_many` action handler
+        action_handler = action_handlers.create_many_handler(self.model, chunk_size=2)
+        # the action type to fire
+        action_type = nautilus.conventions.get_crud_action('create_many', self.model)
+        # a service to reply with
+        service = Mock()
+        service.event_broker = MockEventBroker()
+
+        # fire the action handler with a batch of records
+        await action_handler(service, action_type=action_type, props={}, payload=[
+            {'name': 'foo%s' % i} for i in range(5)
+        ])
+
+        # make sure every record was created
+        assert [record.name for record in self.model.select()] == ['foo%s' % i for i in range(5)], (
+            "Records were not created by bulk action handler."
+        )
+        # make sure a single event announced every record
+        assert len(service.event_broker.sent) == 1, (
+            "Bulk action handler did not send a single event."
+        )
+        assert [record['id'] for record in json.loads(service.event_broker.sent[0]['payload'])] == \
+                    [1, 2, 3, 4, 5], (
+            "Bulk success event did not carry the created records."
+        )
+
+
+    @async_test
+    async def test_create_many_action_handler_validates_whole_batch(self):
+        # create a `create_many` action handler
+        action_handler = action_handlers.create_many_handler(self.model)
+        # the action type to fire
+        action_type = nautilus.conventions.get_crud_action('create_many', self.model)
+
+        # make sure a bad record fails the batch
+        try:
+            await action_handler(Mock(), action_type=action_type, props={}, notify=False, payload=[
+                {'name': 'foo'}, {'color': 'red'},
+            ])
+            # if we got here then we failed
+            raise AssertionError("Invalid batch was not rejected.")
+        # if an exception is raised
+        except ValueError as err:
+            # make sure it describes the bad record
+            assert 'Record 1 has unknown field: color' in str(err), (
+                "Validation error did not describe the bad record."
+            )
+
+        # make sure nothing was written
+        assert self.model.select().count() == 0, (
+            "Records were created from an invalid batch."
+        )
+
+
+    @async_test
+    async def test_update_and_delete_many_action_handlers(self):
+        # create a few records in the test database
+        for name in ['foo', 'bar', 'baz']:
+            self.model(name=name).save()
+
+        # create the bulk action handlers
+        update_handler = action_handlers.update_many_handler(self.model)
+        delete_handler = action_handlers.delete_many_handler(self.model)
+
+        # update two of the records
+        await update_handler(Mock(), action_type=nautilus.conventions.get_crud_action('update_many', self.model),
+                             props={}, notify=False, payload={'pk': [1, 3], 'date': 'today'})
+        # make sure the right records were changed
+        assert [record.date for record in self.model.select()] == ['today', None, 'today'], (
+            "Bulk update did not change the right records."
+        )
+
+        # remove two of the records
+        await delete_handler(Mock(), action_type=nautilus.conventions.get_crud_action('delete_many', self.model),
+                             props={}, notify=False, payload=[1, 2])
+        # make sure only the last record is left
+        assert [record.name for record in self.model.select()] == ['baz'], (
+            "Bulk delete did not remove the right records."
+        )
+
+
+    @async_test
+    async def test_upsert_action_handlers(self):
+        # create a record in the test database
+        self.model(name='foo', date='today').save()
+
+        # create the upsert action handlers
+        upsert_handler = action_handlers.upsert_handler(self.model)
+        upsert_many_handler = action_handlers.upsert_many_handler(self.model, chunk_size=2)
+        # a service to reply with
+        service = Mock()
+        service.event_broker = MockEventBroker()
+
+        # change the existing record without mentioning the other fields
+        await upsert_handler(service, action_type=nautilus.conventions.get_crud_action('upsert', self.model),
+                             props={}, payload={'pk': 1, 'name': 'bar'})
+        # make sure the record was updated in place
+        assert [(record.id, record.name, record.date) for record in self.model.select()] == \
+                    [(1, 'bar', 'today')], (
+            "Upsert did not update the existing record."
+        )
+        # make sure the success event carried the whole record
+        assert json.loads(service.event_broker.sent[0]['payload']) == \
+                    {'id': 1, 'name': 'bar', 'date': 'today'}, (
+            "Upsert success event did not carry the record."
+        )
+
+        # write a batch that mixes existing and new records
+        await upsert_many_handler(service, action_type=nautilus.conventions.get_crud_action('upsert_many', self.model),
+                                  props={}, payload=[
+                                      {'id': 1, 'name': 'baz'}, {'id': 2, 'name': 'qux'}, {'id': 3, 'name': 'quux'},
+                                  ])
+        # make sure every record was written
+        assert [(record.id, record.name) for record in self.model.select()] == \
+                    [(1, 'baz'), (2, 'qux'), (3, 'quux')], (
+            "Bulk upsert did not write every record."
+        )
+        # make sure a single event announced the batch
+        assert [record['id'] for record in json.loads(service.event_broker.sent[1]['payload'])] == [1, 2, 3], (
+            "Bulk upsert success event did not carry the records."
+        )
+
+
+    def test_upsert_checks_the_database(self):
+        # import the bulk utilities
+        from unittest.mock import patch
+        from peewee import MySQLDatabase
+        from nautilus.models import bulk
+
+        class Ingredient(models.BaseModel):
+            name = models.fields.CharField(unique=True)
+            code = models.fields.CharField(unique=True)
+
+        # make sure old versions of sqlite are refused
+        with patch('sqlite3.sqlite_version_info', (3, 23, 1)):
+            with self.assertRaises(ValueError):
+                bulk.upsert_records(self.model, [{'pk': 1, 'name': 'foo'}])
+
+        # make sure mysql won't match records by another unique key than the one we asked for
+        with self.assertRaises(ValueError):
+            bulk._upsert_chunk(
+                Ingredient,
+                MySQLDatabase('test'),
+                Ingredient.name,
+                [{'name': 'salt', 'code': 'a'}]
+            )
+
+
+    @async_test
+    async def test_upsert_action_handler_matches_unique_fields(self):
+
+        class Ingredient(models.BaseModel):
+            name = models.fields.CharField(unique=True)
+            amount = models.fields.IntegerField(null=True)
+
+        # create the table (and its unique index) in the database
+        Ingredient.create_table()
+        try:
+            # create the upsert action handler
+            action_handler = action_handlers.upsert_many_handler(Ingredient)
+            # the action type to fire
+            action_type = nautilus.conventions.get_crud_action('upsert_many', Ingredient)
+
+            # write the same ingredients twice (identified by their name)
+            for amount in [1, 2]:
+                await action_handler(Mock(), action_type=action_type, props={}, notify=False, payload=[
+                    {'name': 'salt', 'amount': amount}, {'name': 'pepper', 'amount': amount},
+                ])
+
+            # make sure the second batch updated the records of the first
+            assert sorted((record.name, record.amount) for record in Ingredient.select()) == \
+                        [('pepper', 2), ('salt', 2)], (
+                "Upsert did not match the records by their unique field."
+            )
+        # regardless of how the test went
+        finally:
+            # clean up
+            Ingredient.drop_table()
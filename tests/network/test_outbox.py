@@ -0,0 +1,177 @@
+# external imports
+import unittest
+import json
+# local imports
+import nautilus
+import nautilus.network.events.actionHandlers as action_handlers
+from nautilus.network.events import Outbox, OutboxEvent
+from ..util import async_test, Mock, MockModel
+
+
+class MockEventBroker:
+    """
+        A stand-in for an event broker that records the messages it sends.
+    """
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    async def send(self, **kwds):
+        # if we are pretending the broker is down
+        if self.fail:
+            raise RuntimeError("broker unavailable")
+        self.sent.append(kwds)
+
+
+class TestUtil(unittest.TestCase):
+
+    def setUp(self):
+        # point the database to a test database
+        nautilus.database.init_db('sqlite:///test.db')
+
+        # save the class record
+        self.model = MockModel()
+        # create the tables in the database
+        nautilus.db.create_tables([self.model, OutboxEvent])
+
+        # a service with an outbox
+        self.service = Mock()
+        self.service.event_broker = MockEventBroker()
+        self.service.outbox = Outbox(self.service.event_broker, batch_size=2)
+
+
+    def tearDown(self):
+        nautilus.db.drop_tables([self.model, OutboxEvent])
+
+
+    @async_test
+    async def test_records_success_events_with_the_write(self):
+        # create an `update` action handler
+        action_handler = action_handlers.update_handler(self.model)
+        # a record to update
+        record = self.model(name='foo', date='bar')
+        record.save()
+
+        # change the name of the record
+        await action_handler(
+            self.service,
+            action_type=nautilus.conventions.get_crud_action('update', self.model),
+            payload={'id': record.id, 'name': 'baz'},
+            props={'correlation_id': 1}
+        )
+
+        # make sure nothing was sent right away
+        assert self.service.event_broker.sent == [], (
+            "Success event was sent before being published from the outbox."
+        )
+        # make sure the event was recorded instead
+        event = OutboxEvent.get()
+        assert event.action_type == nautilus.conventions.get_crud_action(
+            'update', self.model, status='success'
+        ) and json.loads(event.props) == {'correlation_id': 1}, (
+            "Success event was not recorded in the outbox."
+        )
+        assert json.loads(event.payload)['name'] == 'baz', (
+            "Recorded event did not carry the updated record."
+        )
+
+
+    @async_test
+    async def test_records_bulk_success_events_with_the_write(self):
+        # create a `create_many` action handler
+        action_handler = action_handlers.create_many_handler(self.model)
+
+        # create a batch of records
+        await action_handler(
+            self.service,
+            action_type=nautilus.conventions.get_crud_action('create_many', self.model),
+            payload=[{'name': 'foo', 'date': 'bar'}, {'name': 'baz', 'date': 'bar'}],
+            props={}
+        )
+
+        # make sure nothing was sent right away
+        assert self.service.event_broker.sent == [], (
+            "Bulk success event was sent before being published from the outbox."
+        )
+        # make sure the event was recorded with the new records
+        event = OutboxEvent.get()
+        assert event.action_type == nautilus.conventions.get_crud_action(
+            'create_many', self.model, status='success'
+        ) and [record['name'] for record in json.loads(event.payload)] == ['foo', 'baz'], (
+            "Bulk success event was not recorded in the outbox."
+        )
+
+
+    @async_test
+    async def test_does_not_record_failed_writes(self):
+        # create an `update` action handler
+        action_handler = action_handlers.update_handler(self.model)
+
+        # update a record that doesn't exist
+        await action_handler(
+            self.service,
+            action_type=nautilus.conventions.get_crud_action('update', self.model),
+            payload={'id': 1, 'name': 'baz'},
+            props={}
+        )
+
+        # make sure nothing was recorded
+        assert OutboxEvent.select().count() == 0, (
+            "Outbox recorded the event of a failed write."
+        )
+        # make sure the error was still reported
+        assert self.service.event_broker.sent[0]['action_type'] == \
+                    nautilus.conventions.get_crud_action('update', self.model, status='error'), (
+            "Error event was not sent."
+        )
+
+
+    @async_test
+    async def test_publishes_events_in_batches(self):
+        # record a few events
+        for index in range(3):
+            self.service.outbox.record('foo.bar.success', str(index), correlation_id=index)
+
+        # publish the first batch
+        published = await self.service.outbox.publish()
+
+        # make sure only a batch was sent (in order)
+        assert published == 2 and [message['payload'] for message in self.service.event_broker.sent] \
+                    == ['0', '1'], (
+            "Outbox did not publish the oldest batch of events."
+        )
+        # make sure the published events were removed
+        assert OutboxEvent.select().count() == 1, (
+            "Published events were not removed from the outbox."
+        )
+
+        # publish the rest before stopping
+        await self.service.outbox.stop()
+        # make sure everything was sent with its properties
+        assert self.service.event_broker.sent[-1] == {
+            'action_type': 'foo.bar.success',
+            'payload': '2',
+            'correlation_id': 2,
+        }, (
+            "Outbox did not publish the remaining events when stopped."
+        )
+
+
+    @async_test
+    async def test_keeps_events_that_could_not_be_sent(self):
+        # an outbox whose broker is down
+        outbox = Outbox(MockEventBroker(fail=True))
+        # record an event
+        outbox.record('foo.bar.success', 'baz')
+
+        # try to publish it
+        try:
+            await outbox.publish()
+        except RuntimeError:
+            pass
+
+        # make sure the event is still waiting
+        assert OutboxEvent.select().count() == 1, (
+            "Outbox lost an event that could not be sent."
+        )
@@ -1,8 +1,11 @@
 # external imports
+import asyncio
 import unittest
+import json
 from collections.abc import Callable
 # local imports
 import nautilus
+from ..util import async_test
 
 class TestUtil(unittest.TestCase):
 
@@ -55,6 +58,108 @@ class TestUtil(unittest.TestCase):
     def test_views_have_proper_cors_headers(self): pass
 
 
+    @async_test
+    async def test_traversal_resolver_walks_chains_at_once(self):
+        # create a gateway to test
+        service = self.service()
+        # the connections the gateway knows about
+        service._external_service_data['connections'] = [
+            {
+                'name': 'recipeIngredients',
+                'connection': {'from': {'service': 'recipe'}, 'to': {'service': 'ingredient'}},
+                'traversal': True,
+            },
+            {
+                'name': 'ingredientSuppliers',
+                'connection': {'from': {'service': 'ingredient'}, 'to': {'service': 'supplier'}},
+                'traversal': True,
+            },
+        ]
+        # the questions asked by the gateway
+        questions = []
+
+        # a stand-in for the event broker (the first service only holds its own connection)
+        class MockEventBroker:
+            async def ask(self, action_type, payload):
+                questions.append((action_type, payload))
+                # the first connection
+                if payload['hops'] == ['recipeIngredients', 'ingredientSuppliers']:
+                    return json.dumps({'data': [['1', '3'], ['2', '3'], ['2', '4']], 'resolved': 1, 'errors': []})
+                # the second connection
+                return json.dumps({'data': [['3', '5'], ['4', '6']], 'resolved': 1, 'errors': []})
+        service.event_broker = MockEventBroker()
+
+        # walk the chain from two recipes
+        paths, targets = await service.traversal_resolver(
+            ['recipeIngredients', 'ingredientSuppliers'],
+            'recipe',
+            [1, 2]
+        )
+
+        # make sure we found every path
+        assert paths == [(1, 3, 5), (2, 3, 5), (2, 4, 6)] and targets == ['ingredient', 'supplier'], (
+            "Traversal did not return the paths through the chain."
+        )
+        # make sure we asked once per connection service
+        assert questions[1] == (
+            'traverse.ingredientSuppliers.pending',
+            {'ids': [3, 4], 'hops': ['ingredientSuppliers']}
+        ) and len(questions) == 2, (
+            "Traversal did not ask about every record at once."
+        )
+
+
+    @async_test
+    async def test_fused_resolver_reads_connected_records_at_once(self):
+        # create a gateway to test
+        service = self.service()
+        # the connection and the model the gateway knows about
+        service._external_service_data['connections'] = [{
+            'name': 'recipeIngredients',
+            'connection': {'from': {'service': 'recipe'}, 'to': {'service': 'ingredient'}},
+            'chained_read': True,
+        }]
+        service._external_service_data['models'] = [{
+            'name': 'ingredient',
+            'fields': [{'name': 'name'}],
+            'structured_read': True,
+        }]
+        # the questions asked by the gateway
+        questions = []
+
+        # a stand-in for the event broker (the reply comes from the ingredient service)
+        class MockEventBroker:
+            async def ask(self, action_type, payload):
+                questions.append((action_type, payload))
+                return json.dumps({'data': {'all_models': [{'pk': '3', 'name': 'foo'}]}, 'errors': []})
+        service.event_broker = MockEventBroker()
+
+        # resolve the ingredients of a recipe
+        records, target = await service.fused_resolver(
+            'recipeIngredients',
+            {'name': 'recipe', 'pk': 1},
+            ['name'],
+            first=5
+        )
+
+        # make sure we got the connected records
+        assert records == [{'pk': '3', 'name': 'foo'}] and target == 'ingredient', (
+            "Fused resolver did not return the connected records."
+        )
+        # make sure we only asked a single question which passes the ids along
+        assert questions == [('read.recipeIngredients.pending', {
+            'fields': ['ingredient'],
+            'filters': {'recipe': 1},
+            'then': {
+                'action_type': 'read.ingredient.pending',
+                'column': 'ingredient',
+                'query': {'fields': ['name', 'pk'], 'filters': {'first': 5}},
+            },
+        })], (
+            "Fused resolver did not chain the reads."
+        )
+
+
     def test_can_find_service_auth_criteria(self):
         # the auth criteria of the mocked service
         auth_criteria = self.service().auth_criteria
@@ -71,3 +176,75 @@ class TestUtil(unittest.TestCase):
         assert isinstance(auth_criteria['TestService'], Callable), (
             "Auth criteria handler was not callable."
         )
+
+
+    @async_test
+    async def test_connection_resolver_walks_reverse_connections(self):
+        # create a gateway to test
+        service = self.service()
+        # the connection the gateway knows about
+        service._external_service_data['connections'] = [{
+            'name': 'recipeIngredients',
+            'connection': {
+                'from': {'service': 'recipe'},
+                'to': {'service': 'ingredient'},
+            },
+            'reverse': {'name': 'recipeIngredients_reverse'},
+            'structured_read': True,
+        }]
+        # the questions asked by the gateway
+        questions = []
+
+        # a stand-in for the event broker
+        class MockEventBroker:
+            async def ask(self, action_type, payload):
+                questions.append((action_type, payload))
+                return json.dumps({'data': {'all_models': [{'recipe': '1'}, {'recipe': '2'}]}})
+        service.event_broker = MockEventBroker()
+
+        # walk the connection back from an ingredient
+        ids, target = await service.connection_resolver(
+            'recipeIngredients_reverse',
+            {'name': 'ingredient', 'pk': '3'}
+        )
+
+        # make sure we found the recipes that use the ingredient
+        assert ids == [1, 2] and target == 'recipe', (
+            "Reverse connection did not resolve to the source records."
+        )
+        # make sure the connection was filtered by its target
+        assert questions == [(
+            'read.recipeIngredients.pending',
+            {'fields': ['recipe'], 'filters': {'ingredient': '3'}}
+        )], (
+            "Reverse connection did not filter by the target column."
+        )
+
+
+    @async_test
+    async def test_retries_failed_materialized_views(self):
+        # a gateway that replicates recipes (trying again right away)
+        service = self.service(config={
+            'materialized_models': ['recipe'],
+            'materialized_view_retry_interval': 0,
+        })
+        # the number of times the records were read
+        reads = []
+        # the first read fails
+        async def read_remote_objects(name, fields, **filters):
+            reads.append(name)
+            if len(reads) == 1:
+                raise RuntimeError("service unavailable")
+            return [{'pk': '1', 'name': 'foo'}]
+        service._read_remote_objects = read_remote_objects
+
+        # start replicating the model
+        await service.materialize({'name': 'recipe', 'fields': [{'name': 'name'}]})
+        # give the second attempt a chance to finish
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+        # make sure the view was bootstrapped the second time around
+        assert len(reads) == 2 and service.materialized_views['recipe'].ready, (
+            "Gateway did not try to bootstrap the view again."
+        )
@@ -1,5 +1,6 @@
 # external imports
 import unittest
+import json
 # local imports
 from nautilus import conventions
 from nautilus.conventions import services as service_conventions
@@ -7,6 +8,18 @@ from nautilus.conventions.services import model_service_name
 import nautilus
 from ..util import Mock, async_test
 
+class MockEventBroker:
+    """
+        A stand-in for an event broker that records the messages it sends.
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, **kwds):
+        self.sent.append(kwds)
+
+
 class TestUtil(unittest.TestCase):
 
     def setUp(self):
@@ -51,6 +64,19 @@ class TestUtil(unittest.TestCase):
         self.assertRaises(ValueError, test_empty_class)
 
 
+    def test_connection_model_indexes(self):
+        # the columns of the indexes on the connection table
+        indexes = [sorted(index.columns) for index in nautilus.db.get_indexes(self.model._meta.db_table)]
+        # the columns of the connection
+        columns = sorted(model_service_name(service) for service in self.services)
+
+        # make sure each side of the connection is indexed along with the pair
+        for expected in [[columns[0]], [columns[1]], columns]:
+            assert expected in indexes, (
+                "Connection table was missing an index on %s." % expected
+            )
+
+
     def test_connection_model(self):
         # the fields of the underlying service model
         model_fields = {field.name for field in self.service.model.fields()}
@@ -155,6 +181,164 @@ class TestUtil(unittest.TestCase):
         self.assertRaises(Exception, self.model.get, self.service1_value == 1)
 
 
+    @async_test
+    async def test_links_and_unlinks_batches(self):
+        # record the messages sent by the service
+        self.service.event_broker = MockEventBroker()
+        # the names of the connected fields
+        from_field = model_service_name(self.service1)
+        to_field = model_service_name(self.service2)
+        # a batch of connections (with a duplicate)
+        records = [{from_field: '1', to_field: str(pk)} for pk in (1, 2, 2)]
+
+        # instantiate an action handler to test
+        handler = self.service.action_handler()
+        # link the batch twice
+        for _ in range(2):
+            await handler.handle_action(
+                action_type=conventions.get_crud_action('link', self.service.name),
+                payload=records,
+                props={}
+            )
+
+        # make sure each connection was only created once
+        assert self.model.select().count() == 2, (
+            "Linking did not skip the existing connections."
+        )
+        assert len(json.loads(self.service.event_broker.sent[0]['payload'])) == 2, (
+            "Link did not reply with the new connections."
+        )
+
+        # unlink one of the connections
+        await handler.handle_action(
+            action_type=conventions.get_crud_action('unlink', self.service.name),
+            payload={'records': records[:1]},
+            props={}
+        )
+
+        # make sure only the other connection is left
+        assert [getattr(record, to_field) for record in self.model.select()] == ['2'], (
+            "Unlink did not remove the right connection."
+        )
+
+
+    @async_test
+    async def test_cascades_bulk_deletes_in_chunks(self):
+        # record the messages sent by the service
+        self.service.event_broker = MockEventBroker()
+        # remove the connections two at a time
+        self.service.cascade_chunk_size = 2
+        # connect the first two records of one service to a few of the other
+        for related_id in (1, 2):
+            for pk in range(3):
+                self.model.create(**{
+                    model_service_name(self.service1): related_id,
+                    model_service_name(self.service2): pk
+                })
+        # and a connection that should be left alone
+        self.model.create(**{
+            model_service_name(self.service1): 3,
+            model_service_name(self.service2): 1
+        })
+
+        # remove the related records at once
+        await self.service.action_handler().handle_action(
+            action_type=conventions.get_crud_action('delete_many', self.service1, status='success'),
+            payload=json.dumps({'status': 'ok', 'pk': [1, 2]}),
+            props={}
+        )
+
+        # make sure only the unrelated connection is left
+        assert [getattr(record, model_service_name(self.service1)) for record in self.model.select()] == ['3'], (
+            "Related connections were not removed."
+        )
+        # make sure the removal was announced in chunks
+        sent = [json.loads(message['payload'])['pk'] for message in self.service.event_broker.sent]
+        assert sorted(len(chunk) for chunk in sent) == [2, 2, 2] and \
+                    all(message['action_type'].startswith('delete_many.') for message in self.service.event_broker.sent), (
+            "Cascade was not announced in chunks."
+        )
+
+
+    @async_test
+    async def test_records_cascades_in_the_outbox(self):
+        # record the messages sent by the service
+        self.service.event_broker = MockEventBroker()
+        # publish the events of the service through an outbox
+        self.service.outbox = nautilus.network.events.Outbox(self.service.event_broker)
+        nautilus.network.events.OutboxEvent.create_table(True)
+        # connect a record of one service to a few of the other
+        for pk in range(3):
+            self.model.create(**{
+                model_service_name(self.service1): 1,
+                model_service_name(self.service2): pk
+            })
+
+        try:
+            # remove the related record
+            await self.service.action_handler().handle_action(
+                action_type=conventions.get_crud_action('delete', self.service1, status='success'),
+                payload=json.dumps({'status': 'ok', 'pk': 1}),
+                props={}
+            )
+            # the events waiting in the outbox
+            events = list(nautilus.network.events.OutboxEvent.select())
+        finally:
+            nautilus.network.events.OutboxEvent.drop_table()
+
+        # make sure nothing was sent right away
+        assert self.service.event_broker.sent == [], (
+            "Cascade was announced before being published from the outbox."
+        )
+        # make sure the removal was recorded instead
+        assert [len(json.loads(event.payload)['pk']) for event in events] == [3] and \
+                    events[0].action_type.startswith('delete_many.'), (
+            "Cascade was not recorded in the outbox."
+        )
+
+
+    @async_test
+    async def test_traverses_co_located_chains(self):
+        # record the messages sent by the service
+        self.service.event_broker = MockEventBroker()
+
+        # a second connection that continues from the end of the first one
+        class TestNextConnectionService(nautilus.ConnectionService):
+            from_service = (self.service2,)
+            to_service = ('TestService3',)
+        next_service = TestNextConnectionService()
+        next_service.model.create_table(True)
+
+        # connect a few records through both connections
+        for first, second in [(1, 1), (1, 2), (2, 2)]:
+            self.model.create(**{
+                model_service_name(self.service1): first,
+                model_service_name(self.service2): second
+            })
+        for second, third in [(1, 10), (2, 20)]:
+            next_service.model.create(**{
+                model_service_name(self.service2): second,
+                model_service_name('TestService3'): third
+            })
+
+        try:
+            # walk the chain from the first record
+            await self.service.action_handler().handle_action(
+                action_type=conventions.get_crud_action('traverse', self.service.name),
+                payload={'ids': [1], 'hops': [self.service.name, next_service.name]},
+                props={'correlation_id': 1}
+            )
+        finally:
+            next_service.model.drop_table()
+
+        # the reply of the service
+        reply = json.loads(self.service.event_broker.sent[0]['payload'])
+        # make sure the whole chain was walked
+        assert reply['resolved'] == 2 and sorted(reply['data']) == [['1', '1', '10'], ['1', '2', '20']], (
+            "Connection service did not walk the co-located chain."
+        )
+
+
     def test_can_summarize(self):
 
         # the target summary
@@ -180,6 +364,14 @@ class TestUtil(unittest.TestCase):
         assert summarized['connection'] == target['connection'], (
             "Summarized connection info was incorrect."
         )
+        # make sure the connection can be walked backwards
+        assert summarized['reverse'] == {'name': 'testConnectionService_reverse'}, (
+            "Summarized reverse connection was incorrect."
+        )
+        # make sure the connection can be traversed
+        assert summarized['traversal'], (
+            "Summarized connection did not advertise traversals."
+        )
 
 
 
@@ -105,6 +105,13 @@ class TestUtil(unittest.TestCase):
                     'inputs': api_conventions.update_mutation_inputs(self),
                     'outputs': api_conventions.update_mutation_outputs(self),
                 },
+                {
+                    'name': api_conventions.crud_mutation_name(action='upsert', model=self.model),
+                    'event': conventions.get_crud_action(method='upsert', model=self.model),
+                    'isAsync': False,
+                    'inputs': api_conventions.upsert_mutation_inputs(self),
+                    'outputs': api_conventions.upsert_mutation_outputs(self),
+                },
                 {
                     'name': api_conventions.crud_mutation_name(action='delete', model=self.model),
                     'event': conventions.get_crud_action(method='delete', model=self.model),
@@ -216,3 +223,43 @@ class TestUtil(unittest.TestCase):
         )
         # expect an error
         self.assertRaises(Exception, self.model.get, model_id)
+
+
+    def test_shares_its_action_handler(self):
+        # make sure every caller sees the same handler (and pending writes)
+        assert self.service.action_handler is self.service.action_handler, (
+            "Model service built a new action handler for each caller."
+        )
+
+
+    @async_test
+    async def test_batched_writes_are_not_overtaken(self):
+        # a service that batches its writes
+        service = self.service_record(config={
+            'database_url': 'sqlite:///test.db',
+            'database_write_batch_size': 10,
+            'database_write_batch_window': 1,
+        })
+        action_handler = service.action_handler()
+        # make sure the table exists in the database the service points to
+        self.model.create_table(True)
+
+        # create a record (which waits for its batch)
+        await action_handler.handle_action(
+            action_type=conventions.get_crud_action('create', self.model),
+            payload=dict(name='foo'),
+            props={},
+            notify=False
+        )
+        # and remove it right away
+        await action_handler.handle_action(
+            action_type=conventions.get_crud_action('delete', self.model),
+            payload=dict(id=1),
+            props={},
+            notify=False
+        )
+
+        # make sure the delete was applied after the create
+        assert self.model.select().count() == 0, (
+            "Delete overtook the batched create of the same record."
+        )
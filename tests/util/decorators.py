@@ -17,7 +17,5 @@ def async_test(test_function):
 
         # execute the test on the event loop
         loop.run_until_complete(test_function(*args, **kwds))
-        # close the event loop
-        loop.stop()
 
     return function
\ No newline at end of file